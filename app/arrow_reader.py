@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+ARROW_SUFFIXES = {
+    ".parquet": "parquet",
+    ".feather": "ipc",
+    ".arrow": "ipc",
+    ".ipc": "ipc",
+}
+BATCH_SIZE = 65536
+
+
+def _pyarrow():
+    # Dependencia opcional: so quem le Parquet/Arrow precisa instalar.
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ValueError(
+            "Leitura de Parquet/Arrow requer o pacote pyarrow (pip install pyarrow)."
+        ) from exc
+    return pyarrow
+
+
+def arrow_column_names(path: Path) -> list[str]:
+    pa = _pyarrow()
+    if ARROW_SUFFIXES[path.suffix.lower()] == "parquet":
+        return list(pa.parquet.ParquetFile(path, memory_map=True).schema_arrow.names)
+    with pa.memory_map(str(path), "r") as source:
+        return list(_open_ipc(pa, source).schema.names)
+
+
+def iter_arrow_batches(path: Path, columns: list[str]) -> Iterator[dict[str, list]]:
+    """Le so as colunas pedidas, em lotes, a partir do arquivo mapeado em memoria.
+
+    Os buffers do Arrow apontam direto para o mmap (sem copia); a conversao
+    para objetos Python acontece apenas nas colunas selecionadas.
+    """
+    pa = _pyarrow()
+    if ARROW_SUFFIXES[path.suffix.lower()] == "parquet":
+        parquet_file = pa.parquet.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=columns):
+            yield _batch_to_lists(batch, columns)
+        return
+
+    with pa.memory_map(str(path), "r") as source:
+        reader = _open_ipc(pa, source)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+        else:
+            batches = iter(reader)
+        for batch in batches:
+            yield _batch_to_lists(batch, columns)
+
+
+def _open_ipc(pa, source):
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+def _batch_to_lists(batch, columns: list[str]) -> dict[str, list]:
+    return {name: batch.column(name).to_pylist() for name in columns}
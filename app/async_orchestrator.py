@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+import time
+from typing import AsyncIterator
+
+from app.concurrency import AimdGovernor
+from app.metrics import PhaseTimer
+from app.models import GuideContext
+from app.orchestrator import AutomationOrchestrator
+from app.tracing import span, start_span
+
+
+class AsyncAutomationOrchestrator(AutomationOrchestrator):
+    """Laco do AutomationOrchestrator para um portal client asyncio.
+
+    Estado, contadores e pause/resume/skip/stop sao os da classe base (podem ser
+    chamados de outra thread, como a da interface). Screenshots de erro rodam em
+    segundo plano: o status sai na hora, com o nome do arquivo ja definido, e a
+    espera por acao manual comeca enquanto a captura termina.
+    """
+
+    def __init__(self, *args, governor: AimdGovernor | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Compartilhado entre abas: limita quantas preenchem/avancam ao mesmo tempo.
+        self.governor = governor
+        self._artifact_tasks: set[asyncio.Task] = set()
+
+    async def run_async(self) -> None:
+        if self.state == "RUNNING":
+            return
+        try:
+            await self._run_guides()
+        finally:
+            await self._drain_artifacts()
+
+    async def _run_guides(self) -> None:
+        self._set_state("RUNNING")
+        total = await self.portal_client.get_total_guides()
+        self._log(f"Total de guias no lote: {total}")
+        end = self._range_end(total)
+        await self._seek_first_guide_async(end)
+
+        while self.processed < end:
+            # O avanco depois de um erro roda apos o registro da guia: seus tempos
+            # entram nas amostras aqui.
+            self._flush_phase_timer()
+            if self._stop_event.is_set():
+                self._set_state("PARADO")
+                return
+
+            if not self._resume_event.is_set():
+                self._next_context = None
+                await asyncio.to_thread(self._resume_event.wait)
+            if self._stop_event.is_set():
+                self._set_state("PARADO")
+                return
+
+            position = self.processed
+            self._guide_span = start_span("guide", position=position + 1)
+            context = self._next_context
+            if context is None:
+                with self._phase("read"):
+                    context = await self.portal_client.read_current_context()
+            self._next_context = None
+            self._guide_span.set(key=context.key)
+            self._log(
+                f"Processando guia {self.processed + 1} de {total} - chave {context.key}"
+            )
+
+            row = self.spreadsheet_index.get(context.key)
+            if row is None:
+                self.errors += 1
+                screenshot = self._start_error_screenshot(context)
+                self._emit_status(
+                    total=total,
+                    context=context,
+                    status="ERRO",
+                    message=self._build_error_message(
+                        "Guia/senha nao encontrada na planilha", screenshot
+                    ),
+                )
+                self._log(
+                    f"Guia nao encontrada na planilha: {context.key}. "
+                    "Execucao pausada para acao manual."
+                )
+                if self.config.pause_on_missing:
+                    self.pause()
+                    if not self.config.wait_for_manual_action:
+                        return
+                    action = await self._wait_for_manual_action_async()
+                    if action == "STOP":
+                        self._set_state("PARADO")
+                        return
+                    if action == "SKIP":
+                        await self._advance_to_next_guide_async(total, context.key)
+                    continue
+
+                await self._advance_to_next_guide_async(total, context.key)
+                continue
+
+            try:
+                async with self._guide_slot():
+                    with self._phase("fill"):
+                        await self.portal_client.fill_current_guide(
+                            **self._fill_arguments(row)
+                        )
+                    self.successes += 1
+                    try:
+                        await self._advance_to_next_guide_async(total, context.key)
+                    finally:
+                        self._emit_status(
+                            total=total,
+                            context=context,
+                            status="SUCESSO",
+                            message="Guia preenchida com sucesso",
+                            position=position,
+                        )
+            except Exception as exc:
+                self.errors += 1
+                screenshot = self._start_error_screenshot(context)
+                self._emit_status(
+                    total=total,
+                    context=context,
+                    status="ERRO",
+                    message=self._build_error_message(
+                        f"Falha no preenchimento: {exc}", screenshot
+                    ),
+                )
+                self._log(f"Erro no preenchimento da guia {context.key}: {exc}")
+                self.pause()
+                if not self.config.wait_for_manual_action:
+                    return
+                action = await self._wait_for_manual_action_async()
+                if action == "STOP":
+                    self._set_state("PARADO")
+                    return
+                if action == "SKIP":
+                    await self._advance_to_next_guide_async(total, context.key)
+
+        self._flush_phase_timer()
+        self._set_state("FINALIZADO")
+        self._log(
+            f"Processamento finalizado. Sucessos: {self.successes} | Erros: {self.errors}"
+        )
+
+    @asynccontextmanager
+    async def _guide_slot(self) -> AsyncIterator[None]:
+        # A vaga cobre preencher + avancar; a espera por acao manual fica fora.
+        if self.governor is None:
+            yield
+            return
+        async with self.governor.slot():
+            started = time.monotonic()
+            try:
+                yield
+            except Exception:
+                self.governor.record(time.monotonic() - started, ok=False)
+                raise
+            self.governor.record(time.monotonic() - started, ok=True)
+
+    async def _wait_for_manual_action_async(self) -> str:
+        # A captura de tela em andamento termina enquanto o usuario decide.
+        return await asyncio.to_thread(self._wait_for_manual_action)
+
+    async def _seek_first_guide_async(self, end: int) -> None:
+        start = min(self.config.start_guide, end)
+        if self.processed >= start:
+            return
+        self._log(f"Avancando ate a guia {start + 1}.")
+        context = await self.portal_client.read_current_context()
+        while self.processed < start and not self._stop_event.is_set():
+            await self.portal_client.click_next_guide()
+            await self._wait_next_guide_async(context.key)
+            context = self._next_context or await self.portal_client.read_current_context()
+            self._next_context = context
+            self.processed += 1
+
+    async def _advance_to_next_guide_async(self, total: int, previous_key: str) -> None:
+        if self.processed < self._range_end(total) - 1:
+            # O clique navega a pagina: screenshots pendentes precisam da guia atual.
+            await self._drain_artifacts()
+            with self._phase("next"):
+                await self.portal_client.click_next_guide()
+            with self._phase("wait"):
+                await self._wait_next_guide_async(previous_key)
+        self.processed += 1
+
+    async def _wait_next_guide_async(self, previous_key: str) -> None:
+        wait_for_change = getattr(self.portal_client, "wait_for_guide_change", None)
+        if not self.config.wait_for_guide_change or not callable(wait_for_change):
+            if self.config.delay_after_next_seconds > 0:
+                await asyncio.sleep(self.config.delay_after_next_seconds)
+            return
+
+        timeout_ms = self.config.guide_change_timeout_seconds * 1000
+        try:
+            self._next_context = await wait_for_change(previous_key, timeout_ms)
+        except Exception as exc:
+            self._log(f"Troca de guia nao confirmada ({exc}). Seguindo com a leitura atual.")
+
+    def _start_error_screenshot(self, context: GuideContext) -> Path | None:
+        if not self.config.capture_screenshot_on_error:
+            return None
+        capture = getattr(self.portal_client, "capture_screenshot", None)
+        if not callable(capture):
+            return None
+
+        output = self._screenshot_path(context)
+        task = asyncio.ensure_future(self._capture(capture, output))
+        self._artifact_tasks.add(task)
+        task.add_done_callback(self._artifact_tasks.discard)
+        return output
+
+    async def _capture(self, capture, output: Path) -> None:
+        # Roda fora da guia: o tempo entra so nas amostras, nao no registro.
+        started = time.monotonic()
+        try:
+            with span("screenshot", path=output.name):
+                await capture(output)
+            self.phase_samples.setdefault("screenshot", []).append(
+                time.monotonic() - started
+            )
+            self._log(f"Screenshot de erro salva em: {output}")
+        except Exception as exc:
+            self._log(f"Falha ao capturar screenshot de erro: {exc}")
+
+    async def _drain_artifacts(self) -> None:
+        if self._artifact_tasks:
+            await asyncio.gather(*list(self._artifact_tasks))
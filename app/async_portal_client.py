@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import time
+from typing import Any
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Frame,
+    Locator,
+    Page,
+    Playwright,
+    async_playwright,
+)
+
+from app.config import AppSettings
+from app.glosa_rules import FillPlan, GlosaRuleTable
+from app.models import GuideContext
+from app.portal_client import (
+    GUIDE_CHANGE_POLL_MS,
+    POLL_INTERVAL_SECONDS,
+    WAIT_SLICE_SECONDS,
+    PortalClientBase,
+    context_from_snapshot,
+    page_frames,
+    parse_total_guides,
+    query_key,
+    snapshot_queries,
+)
+from app.portal_scripts import (
+    FILL_SCRIPT,
+    FRAME_READY_SCRIPT,
+    GUIDE_CHANGE_SCRIPT,
+    GUIDE_MARK_LOST_SCRIPT,
+    MARK_GUIDE_SCRIPT,
+    SNAPSHOT_SCRIPT,
+    WATCH_SCRIPT,
+)
+from app.tracing import span
+
+
+class AsyncPortalClient(PortalClientBase):
+    """Versao asyncio do PortalClient (Playwright async_api).
+
+    Mesmas regras de leitura e preenchimento; o que e independente roda junto:
+    o snapshot consulta todos os frames ao mesmo tempo, assim como os
+    observadores de DOM e a leitura dos campos opcionais.
+    """
+
+    def __init__(self, settings: AppSettings):
+        self.settings = settings
+        self._rules = GlosaRuleTable.from_settings(settings)
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._context: BrowserContext | None = None
+        self._page: Page | None = None
+        # Com aba fixa (varias abas no mesmo lote) so ela e consultada.
+        self._pinned = False
+        self._frame_cache: dict[str, tuple[Page, Frame]] = {}
+        self._watched_pages: set[int] = set()
+
+    @property
+    def page(self) -> Page:
+        if not self._page:
+            raise RuntimeError("PortalClient ainda nao conectado.")
+        return self._page
+
+    async def connect(self) -> None:
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.connect_over_cdp(
+            self.settings.cdp_url
+        )
+        await self.attach(
+            self._browser.contexts[0]
+            if self._browser.contexts
+            else await self._browser.new_context()
+        )
+
+    async def attach(self, context: BrowserContext, page: Page | None = None) -> None:
+        """Usa um contexto ja conectado.
+
+        Com `page`, o cliente fica preso a essa aba: buscas, esperas e
+        screenshots ignoram as demais abas do contexto.
+        """
+        self._context = context
+        self._pinned = page is not None
+        if not self._pinned:
+            context.on("page", self._watch_page)
+        try:
+            await context.add_init_script(FRAME_READY_SCRIPT)
+        except Exception:
+            pass
+
+        if page is not None:
+            self._page = page
+            self._watch_page(page)
+        elif context.pages:
+            self._page = context.pages[-1]
+        else:
+            self._page = await context.new_page()
+
+    async def close(self) -> None:
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+            self._browser = None
+            self._context = None
+            self._page = None
+        self._pinned = False
+        self._frame_cache.clear()
+        self._watched_pages.clear()
+
+    async def get_total_guides(self) -> int:
+        return parse_total_guides(
+            await self._read_text_or_value(self.settings.selectors.total_guias)
+        )
+
+    async def read_current_context(self) -> GuideContext:
+        if self.settings.batched_reads:
+            context = await self._read_context_snapshot()
+            if context is not None:
+                return context
+        selectors = self.settings.selectors
+        numero_guia, senha, lote, protocolo = await asyncio.gather(
+            self._read_text_or_value(selectors.numero_guia),
+            self._read_text_or_value(selectors.senha),
+            self._read_optional_text_or_value(selectors.lote),
+            self._read_optional_text_or_value(selectors.protocolo),
+        )
+        return GuideContext(
+            numero_guia=numero_guia, senha=senha, lote=lote, protocolo=protocolo
+        )
+
+    async def wait_for_guide_change(
+        self, previous_key: str, timeout_ms: float | None = None
+    ) -> GuideContext:
+        if timeout_ms is None:
+            timeout_ms = self.settings.timeout_ms
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            replaced = await self._guide_mark_lost()
+            context = await self._try_read_context()
+            if self._is_new_guide(context, previous_key, replaced):
+                self._guide_mark = None
+                return context
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._guide_change_timeout(previous_key)
+            await self._wait_for_context_change(previous_key, remaining)
+
+    async def fill_current_guide(
+        self,
+        valor_glosa: float,
+        justificativa: str,
+        codigo_glosa: str | None = None,
+        fill_plan: FillPlan | None = None,
+    ) -> None:
+        plan, fields = self._plan_fill(valor_glosa, justificativa, codigo_glosa, fill_plan)
+        target = fields[0][0]
+        if await self._fill_batch(fields):
+            return
+
+        fallback = self._fallback_selector(plan)
+        if fallback is None:
+            await self._fill(target, justificativa)
+        else:
+            available = (await self._find_first_locator([target, fallback]))[0]
+            if available == target:
+                try:
+                    await self._fill(target, justificativa)
+                except Exception:
+                    available = fallback
+            if available != target:
+                await self._fill(fallback, justificativa)
+                return
+
+        for selector, value in fields[1:]:
+            await self._fill(selector, value)
+
+    async def click_next_guide(self) -> None:
+        locator = await self._find_locator(self.settings.selectors.proxima_guia)
+        await self._mark_current_guide()
+        with span("cdp.click"):
+            await locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
+            await locator.click(timeout=self.settings.timeout_ms)
+        with span("cdp.wait_for_load_state"):
+            await self.page.wait_for_load_state(
+                "domcontentloaded", timeout=self.settings.timeout_ms
+            )
+
+    async def capture_screenshot(self, output_path: Path) -> Path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with span("cdp.screenshot"):
+            await self.page.screenshot(path=str(output_path), full_page=True)
+        return output_path
+
+    async def _mark_current_guide(self) -> None:
+        token = self._new_guide_token()
+        targets = self._guide_mark_targets()
+        with span("cdp.evaluate", script="mark", frames=len(targets)):
+            results = await asyncio.gather(
+                *(
+                    frame.evaluate(MARK_GUIDE_SCRIPT, [queries, token])
+                    for frame, queries in targets
+                ),
+                return_exceptions=True,
+            )
+        marked = [
+            target
+            for target, result in zip(targets, results)
+            if not isinstance(result, BaseException)
+        ]
+        self._guide_mark = (token, marked) if marked else None
+
+    async def _guide_mark_lost(self) -> bool:
+        if self._guide_mark is None:
+            return False
+        token, marked = self._guide_mark
+        with span("cdp.evaluate", script="mark_lost", frames=len(marked)):
+            results = await asyncio.gather(
+                *(
+                    frame.evaluate(GUIDE_MARK_LOST_SCRIPT, [queries, token])
+                    for frame, queries in marked
+                ),
+                return_exceptions=True,
+            )
+        # Erro no evaluate: frame removido ou navegando, o documento marcado se foi.
+        return any(isinstance(result, BaseException) or result for result in results)
+
+    async def _fill(self, selector: str, value: str) -> None:
+        locator = await self._find_locator(selector)
+        with span("cdp.fill", selector=selector):
+            await locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
+            await locator.fill(value, timeout=self.settings.timeout_ms)
+
+    async def _fill_batch(self, fields: list[tuple[str, str]]) -> bool:
+        payload = self._batch_fill_payload(fields)
+        if payload is None:
+            return False
+        first = query_key(payload[0])
+        try:
+            location = self._frame_cache.get(first)
+            if location is None:
+                location = await self._scan_pages(first)
+                if location is None:
+                    return False
+            with span("cdp.evaluate", script="fill"):
+                result = await location[1].evaluate(FILL_SCRIPT, payload)
+        except Exception:
+            return False
+        return self._accept_batch_fill(result, fields, payload, location)
+
+    async def _read_text_or_value(self, selector: str) -> str:
+        with span("cdp.read", selector=selector):
+            return await self._read_locator(selector)
+
+    async def _read_locator(self, selector: str) -> str:
+        locator = await self._find_locator(selector)
+        await locator.wait_for(state="attached", timeout=self.settings.timeout_ms)
+
+        value = await _safe_call(locator.input_value(timeout=400))
+        if value is not None and str(value).strip():
+            return str(value).strip()
+
+        text = (await _safe_call(locator.inner_text(timeout=400)) or "").strip()
+        if not text:
+            text = (
+                await locator.text_content(timeout=self.settings.timeout_ms) or ""
+            ).strip()
+        if not text:
+            raise RuntimeError(f"Campo do portal sem valor para seletor: {selector}")
+        return text
+
+    async def _read_optional_text_or_value(self, selector: str) -> str:
+        if not str(selector or "").strip():
+            return ""
+        try:
+            return await self._read_text_or_value(selector)
+        except Exception:
+            return ""
+
+    async def _read_context_snapshot(self) -> GuideContext | None:
+        fields = snapshot_queries(self.settings.selectors)
+        if fields is None:
+            return None
+
+        preferred = self._preferred_locations(fields)
+        values, locations = await self._snapshot(preferred, fields)
+        if context_from_snapshot(values) is None:
+            candidates = [
+                (page, frame)
+                for page in reversed(self._candidate_pages())
+                for frame in page_frames(page)
+                if (page, frame) not in preferred
+            ]
+            pending = {name: query for name, query in fields.items() if name not in values}
+            more_values, more_locations = await self._snapshot(candidates, pending)
+            values.update(more_values)
+            locations.update(more_locations)
+        return self._accept_snapshot(fields, values, locations)
+
+    async def _snapshot(
+        self, candidates: list[tuple[Any, Any]], fields: dict[str, dict[str, str]]
+    ) -> tuple[dict[str, str], dict[str, tuple[Any, Any]]]:
+        """Avalia o snapshot em todos os frames ao mesmo tempo.
+
+        Na fusao vale a ordem dos candidatos (ultima aba primeiro), como no
+        cliente sync.
+        """
+        if not fields or not candidates:
+            return {}, {}
+        with span("cdp.evaluate", script="snapshot", frames=len(candidates)):
+            results = await asyncio.gather(
+                *(frame.evaluate(SNAPSHOT_SCRIPT, fields) for _page, frame in candidates),
+                return_exceptions=True,
+            )
+        values: dict[str, str] = {}
+        locations: dict[str, tuple[Any, Any]] = {}
+        for location, found in zip(candidates, results):
+            if isinstance(found, BaseException) or not found:
+                continue
+            for name, text in found.items():
+                if name in fields and name not in values:
+                    values[name] = text
+                    locations[name] = location
+        return values, locations
+
+    async def _try_read_context(self) -> GuideContext | None:
+        if self._reads_by_snapshot():
+            return await self._read_context_snapshot()
+        try:
+            return await self.read_current_context()
+        except Exception:
+            return None
+
+    async def _wait_for_context_change(self, previous_key: str, remaining: float) -> None:
+        wait_seconds, frame, arguments = self._guide_change_wait(previous_key, remaining)
+        if frame is None:
+            await self._wait_for_dom_change(
+                [self.settings.selectors.numero_guia], time.monotonic() + wait_seconds
+            )
+            return
+        try:
+            with span("cdp.wait_for_function"):
+                await frame.wait_for_function(
+                    GUIDE_CHANGE_SCRIPT,
+                    arg=arguments,
+                    timeout=wait_seconds * 1000,
+                    polling=GUIDE_CHANGE_POLL_MS,
+                )
+        except Exception:
+            pass
+
+    async def _find_locator(self, selector: str) -> Locator:
+        return (await self._find_first_locator([selector]))[1]
+
+    async def _find_first_locator(self, selectors: list[str]) -> tuple[str, Locator]:
+        resolved = self._resolve_all(selectors)
+        deadline = time.monotonic() + self.settings.timeout_ms / 1000
+        while True:
+            found = await self._locate_first(selectors, resolved)
+            if found is not None:
+                return found
+            if time.monotonic() >= deadline:
+                raise self._selector_timeout(selectors)
+            await self._wait_for_dom_change(selectors, deadline)
+
+    async def _locate_first(
+        self, selectors: list[str], resolved: list[str]
+    ) -> tuple[str, Locator] | None:
+        # Como no cliente sync: o cache nao pula seletores de maior prioridade.
+        for selector, item in zip(selectors, resolved):
+            cached = self._frame_cache.get(item)
+            if cached is not None:
+                locator = await _find_locator_in_frame(cached[1], item)
+                if locator is not None:
+                    self._page = cached[0]
+                    return selector, locator
+                self._frame_cache.pop(item, None)
+            location = await self._scan_pages(item)
+            if location is not None:
+                self._page = location[0]
+                self._remember_frame(item, *location)
+                return selector, location[1].locator(item).first
+        return None
+
+    async def _scan_pages(self, resolved: str) -> tuple[Any, Any] | None:
+        # Conta o seletor em todos os frames de uma vez; vence a ultima aba.
+        candidates = [
+            (page, frame)
+            for page in reversed(self._candidate_pages())
+            for frame in page_frames(page)
+        ]
+        found = await asyncio.gather(
+            *(_find_locator_in_frame(frame, resolved) for _page, frame in candidates)
+        )
+        for location, locator in zip(candidates, found):
+            if locator is not None:
+                return location
+        return None
+
+    async def _wait_for_dom_change(self, selectors: list[str], deadline: float) -> None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        wait_seconds = min(remaining, WAIT_SLICE_SECONDS)
+        watch = self._watch_arguments(selectors, wait_seconds)
+        source = self._page if self._pinned else self._context
+        if watch is None or source is None:
+            await asyncio.sleep(min(wait_seconds, POLL_INTERVAL_SECONDS))
+            return
+
+        token, arguments = watch
+        # O aviso pode chegar antes de todos os frames serem armados: a espera
+        # pelo console comeca antes dos evaluate.
+        waiter = asyncio.ensure_future(
+            source.wait_for_event(
+                "console",
+                predicate=lambda message: self._is_watch_message(message, token),
+                timeout=wait_seconds * 1000,
+            )
+        )
+        try:
+            with span("cdp.evaluate", script="watch"):
+                results = await asyncio.gather(
+                    *(
+                        frame.evaluate(WATCH_SCRIPT, arguments)
+                        for page in self._candidate_pages()
+                        for frame in page_frames(page)
+                    ),
+                    return_exceptions=True,
+                )
+            if any(result is True for result in results):
+                return
+            if all(isinstance(result, BaseException) for result in results):
+                await asyncio.sleep(min(wait_seconds, POLL_INTERVAL_SECONDS))
+                return
+            with span("cdp.wait_console"):
+                await waiter
+        except Exception:
+            pass
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            elif not waiter.cancelled():
+                waiter.exception()
+
+    def _candidate_pages(self) -> list[Page]:
+        if self._pinned:
+            return [self.page]
+        if self._context and self._context.pages:
+            return list(self._context.pages)
+        return [self.page]
+
+
+async def _find_locator_in_frame(frame: Any, selector: str) -> Any | None:
+    try:
+        locator = frame.locator(selector).first
+        if int(await locator.count()) > 0:
+            return locator
+    except Exception:
+        pass
+    return None
+
+
+async def _safe_call(awaitable) -> Any:
+    try:
+        return await awaitable
+    except Exception:
+        return None
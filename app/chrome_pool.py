@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import shutil
+import subprocess
+from tempfile import gettempdir
+import time
+from typing import Sequence
+from urllib.request import urlopen
+
+from app.chrome_launcher import DEFAULT_START_URL, is_debug_port_open, launch_chrome_debug
+
+DEFAULT_TEMPLATE_PROFILE = Path(gettempdir()) / "amil-glosa-chrome-profile"
+DEFAULT_POOL_DIR = Path(gettempdir()) / "amil-glosa-chrome-pool"
+
+# Travas e caches do Chrome: nao fazem parte do login e impedem abrir a copia.
+_PROFILE_IGNORE = shutil.ignore_patterns(
+    "Singleton*",
+    "lockfile",
+    "LOCK",
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "ShaderCache",
+    "GrShaderCache",
+    "Crashpad",
+)
+
+
+def pool_ports(base_port: int, size: int) -> list[int]:
+    """Portas das instancias do pool, logo apos a porta do Chrome principal."""
+    return [base_port + offset for offset in range(1, size + 1)]
+
+
+def clone_profile(template: Path, target: Path) -> None:
+    if not template.is_dir():
+        raise ValueError(f"Perfil modelo do Chrome nao encontrado: {template}")
+    shutil.rmtree(target, ignore_errors=True)
+    try:
+        shutil.copytree(template, target, ignore=_PROFILE_IGNORE)
+    except shutil.Error as exc:
+        raise RuntimeError(
+            f"Falha ao copiar o perfil modelo ({template}). "
+            "Feche o Chrome que usa esse perfil e tente novamente."
+        ) from exc
+
+
+def wait_for_debug_port(port: int, timeout_seconds: float = 15.0) -> None:
+    # Processo externo: nao ha evento para esperar, so tentar conectar.
+    deadline = time.monotonic() + timeout_seconds
+    while not is_debug_port_open(port):
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Chrome nao abriu a porta de depuracao {port} no tempo limite.")
+        time.sleep(0.2)
+
+
+def wait_for_debug_port_closed(port: int, timeout_seconds: float = 10.0) -> bool:
+    """Espera o Chrome da porta fechar; False se ainda estiver aberto no limite."""
+    deadline = time.monotonic() + timeout_seconds
+    while is_debug_port_open(port):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.2)
+    return True
+
+
+def current_tab_url(port: int, host: str = "127.0.0.1") -> str:
+    """URL da aba mais recente do Chrome em depuracao (endpoint /json/list)."""
+    try:
+        with urlopen(f"http://{host}:{port}/json/list", timeout=2) as response:
+            targets = json.loads(response.read().decode("utf-8"))
+    except OSError as exc:
+        raise RuntimeError(
+            f"Nao foi possivel conectar ao Chrome em depuracao na porta {port} "
+            "para ler a URL do lote. Abra o Chrome no lote desejado "
+            "ou informe os lotes em pool_lote_urls."
+        ) from exc
+    for target in targets:
+        if target.get("type") == "page" and target.get("url"):
+            return str(target["url"])
+    raise RuntimeError("Nao foi possivel ler a URL do lote na aba atual do Chrome.")
+
+
+@dataclass(frozen=True)
+class PoolJob:
+    """Uma faixa de um lote: a parte `part` de `parts` (calculada pelo worker)."""
+
+    url: str
+    part: int = 0
+    parts: int = 1
+
+
+def plan_pool_jobs(lote_urls: Sequence[str], size: int) -> list[list[PoolJob]]:
+    """Distribui o trabalho entre as instancias.
+
+    Um unico lote e dividido em faixas, uma por instancia; varios lotes sao
+    distribuidos inteiros, em rodizio.
+    """
+    if not lote_urls:
+        raise ValueError("Nenhum lote informado para o pool de Chrome.")
+    size = max(1, size)
+    if len(lote_urls) == 1:
+        return [[PoolJob(lote_urls[0], part, size)] for part in range(size)]
+    return [
+        [PoolJob(url) for url in lote_urls[worker::size]]
+        for worker in range(min(size, len(lote_urls)))
+    ]
+
+
+@dataclass
+class ChromeInstance:
+    port: int
+    profile_dir: Path
+    process: subprocess.Popen[bytes] | None
+
+
+class ChromePool:
+    """K instancias do Chrome em portas seguidas, cada uma com copia do perfil modelo."""
+
+    def __init__(
+        self,
+        template_profile: Path,
+        pool_dir: Path,
+        size: int,
+        base_port: int = 9222,
+        chrome_binary: str | None = None,
+    ) -> None:
+        self.template_profile = template_profile
+        self.pool_dir = pool_dir
+        self.size = size
+        self.base_port = base_port
+        self.chrome_binary = chrome_binary
+        self.instances: list[ChromeInstance] = []
+
+    def launch(self, start_url: str = DEFAULT_START_URL) -> list[ChromeInstance]:
+        for port in pool_ports(self.base_port, self.size):
+            profile_dir = self.pool_dir / f"perfil-{port}"
+            if not is_debug_port_open(port):
+                # Instancia ja aberta mantem o proprio perfil (e a sessao).
+                clone_profile(self.template_profile, profile_dir)
+            process = launch_chrome_debug(
+                port=port,
+                profile_dir=profile_dir,
+                chrome_binary=self.chrome_binary,
+                start_url=start_url,
+            )
+            self.instances.append(ChromeInstance(port, profile_dir, process))
+        for instance in self.instances:
+            wait_for_debug_port(instance.port)
+        return self.instances
+
+    def close(self) -> None:
+        for instance in self.instances:
+            if instance.process is not None and instance.process.poll() is None:
+                instance.process.terminate()
+        self.instances = []
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+import threading
+from typing import AsyncIterator
+
+from app.metrics import latency_percentiles
+
+
+class AimdGovernor:
+    """Limite de guias simultaneas ajustado por AIMD (como o controle do TCP).
+
+    Cada guia concluida informa a latencia de preencher + avancar e se deu
+    certo. Uma rodada inteira (tantas guias quanto o limite) rapida e sem erro
+    soma 1 ao limite; um erro ou uma guia acima de `target_latency_seconds`
+    multiplica o limite por `decrease_factor`. Depois de um corte, as guias
+    que ja estavam em andamento nao cortam de novo.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: int | None = None,
+        target_latency_seconds: float = 10.0,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.target_latency_seconds = target_latency_seconds
+        self.decrease_factor = decrease_factor
+        self.limit = min(max(initial_limit or self.min_limit, self.min_limit), self.max_limit)
+        self.active = 0
+        self.samples = 0
+        self.failures = 0
+        self._latencies: list[float] = []
+        self._good_streak = 0
+        self._ignore_until = 0
+        self._lock = threading.Lock()
+        self._condition: asyncio.Condition | None = None
+
+    def record(self, latency_seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples += 1
+            self._latencies.append(latency_seconds)
+            if not ok:
+                self.failures += 1
+            if not ok or latency_seconds > self.target_latency_seconds:
+                self._good_streak = 0
+                if self.samples > self._ignore_until:
+                    self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+                    self._ignore_until = self.samples + max(self.active - 1, 0)
+                return
+            self._good_streak += 1
+            if self._good_streak >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._good_streak = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Espera uma vaga dentro do limite atual (mesmo event loop para todos)."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+        async with condition:
+            await condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with condition:
+                self.active -= 1
+                # O limite pode ter subido com a amostra desta guia.
+                condition.notify_all()
+
+    def summary(self) -> dict[str, int | float]:
+        with self._lock:
+            latencies = list(self._latencies)
+            result: dict[str, int | float] = {
+                "concurrency": self.limit,
+                "max_concurrency": self.max_limit,
+                "error_rate": round(self.failures / self.samples, 3) if self.samples else 0.0,
+            }
+        for name, value in latency_percentiles(latencies).items():
+            result[f"latency_{name}"] = value
+        return result
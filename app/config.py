@@ -18,12 +18,44 @@ class PortalSelectors:
     proxima_guia: str = "//*[@id='btn_guia_posterior']"
 
 
+@dataclass
+class GlosaRule:
+    # Campos referem-se a nomes de PortalSelectors (ex.: "justificativa_3052");
+    # em extra_fields tambem vale um seletor direto.
+    codes: tuple[str, ...]
+    justificativa_field: str = "justificativa_3052"
+    fill_valor: bool = False
+    extra_fields: dict[str, str] = field(default_factory=dict)
+
+
+def default_glosa_rules() -> list[GlosaRule]:
+    return [GlosaRule(codes=("3052", "1702"))]
+
+
 @dataclass
 class AppSettings:
     debug_port: int = 9222
     timeout_ms: int = 15000
     chrome_binary: str | None = None
     portal_url: str = "https://credenciado.amil.com.br/"
+    index_cache_enabled: bool = True
+    index_cache_max_mb: int = 256
+    xlsx_engine: str = "openpyxl"
+    read_all_sheets: bool = False
+    index_backend: str = "memory"
+    batched_reads: bool = True
+    batched_fill: bool = True
+    async_runtime: bool = False
+    parallel_tabs: int = 1
+    adaptive_concurrency: bool = False
+    target_guide_latency_seconds: float = 10.0
+    chrome_pool_size: int = 1
+    pool_lote_urls: list[str] = field(default_factory=list)
+    profile_runs: bool = False
+    playwright_trace: bool = False
+    trace_spans: bool = False
+    trace_max_mb: int = 20
+    glosa_rules: list[GlosaRule] = field(default_factory=default_glosa_rules)
     selectors: PortalSelectors = field(default_factory=PortalSelectors)
 
     @property
@@ -46,6 +78,57 @@ def load_settings(path: Path | None = None) -> AppSettings:
         base.chrome_binary = content["chrome_binary"]
     if "portal_url" in content:
         base.portal_url = str(content["portal_url"])
+    if "index_cache_enabled" in content:
+        base.index_cache_enabled = bool(content["index_cache_enabled"])
+    if "index_cache_max_mb" in content:
+        base.index_cache_max_mb = int(content["index_cache_max_mb"])
+    if "xlsx_engine" in content:
+        base.xlsx_engine = str(content["xlsx_engine"])
+    if "read_all_sheets" in content:
+        base.read_all_sheets = bool(content["read_all_sheets"])
+    if "index_backend" in content:
+        base.index_backend = str(content["index_backend"])
+    if "batched_reads" in content:
+        base.batched_reads = bool(content["batched_reads"])
+    if "batched_fill" in content:
+        base.batched_fill = bool(content["batched_fill"])
+    if "async_runtime" in content:
+        base.async_runtime = bool(content["async_runtime"])
+    if "parallel_tabs" in content:
+        base.parallel_tabs = max(1, int(content["parallel_tabs"]))
+    if "adaptive_concurrency" in content:
+        base.adaptive_concurrency = bool(content["adaptive_concurrency"])
+    if "target_guide_latency_seconds" in content:
+        base.target_guide_latency_seconds = float(content["target_guide_latency_seconds"])
+    if "chrome_pool_size" in content:
+        base.chrome_pool_size = max(1, int(content["chrome_pool_size"]))
+    if isinstance(content.get("pool_lote_urls"), list):
+        base.pool_lote_urls = [str(url) for url in content["pool_lote_urls"] if url]
+    if "profile_runs" in content:
+        base.profile_runs = bool(content["profile_runs"])
+    if "playwright_trace" in content:
+        base.playwright_trace = bool(content["playwright_trace"])
+    if "trace_spans" in content:
+        base.trace_spans = bool(content["trace_spans"])
+    if "trace_max_mb" in content:
+        base.trace_max_mb = max(1, int(content["trace_max_mb"]))
+
+    rules_payload = content.get("glosa_rules")
+    if isinstance(rules_payload, list):
+        base.glosa_rules = [
+            GlosaRule(
+                codes=tuple(str(code) for code in item.get("codes", [])),
+                justificativa_field=str(
+                    item.get("justificativa_field", "justificativa_3052")
+                ),
+                fill_valor=bool(item.get("fill_valor", False)),
+                extra_fields={
+                    str(k): str(v) for k, v in (item.get("extra_fields") or {}).items()
+                },
+            )
+            for item in rules_payload
+            if isinstance(item, dict)
+        ]
 
     selectors_payload = content.get("selectors")
     if isinstance(selectors_payload, dict):
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 import csv
+from dataclasses import dataclass
+import os
 from pathlib import Path
 import re
-from typing import Dict, Iterable
+from typing import Iterable, Iterator, Sequence
 import unicodedata
 
 from openpyxl import load_workbook
 
-from app.models import SpreadsheetRow
+from app.arrow_reader import ARROW_SUFFIXES, arrow_column_names, iter_arrow_batches
+from app.models import SpreadsheetIssue, SpreadsheetRow
+from app.spreadsheet_index import DuplicateKeyError, SpreadsheetIndex
+from app.sqlite_index import SqliteSpreadsheetIndex
+from app.xlsx_xml import XlsxXmlSheet, sheet_names
 
 REQUIRED_COLUMNS = ("numero_guia", "senha", "valor_glosa", "justificativa")
 OPTIONAL_COLUMNS = ("codigo_glosa",)
+XLSX_ENGINES = ("openpyxl", "xml")
+# Colunas lidas como texto: no Parquet/Arrow podem vir como float64 (pandas usa
+# float64 em colunas inteiras com nulos), e 123.0 tem de virar "123".
+IDENTIFIER_COLUMNS = ("numero_guia", "senha", "codigo_glosa")
 HEADER_ALIASES: dict[str, tuple[str, ...]] = {
     "numero_guia": (
         "numero_da_guia_no_prestador",
@@ -56,6 +67,18 @@ HEADER_ALIASES: dict[str, tuple[str, ...]] = {
 }
 
 
+@dataclass(frozen=True)
+class SpreadsheetSource:
+    path: Path
+    sheet: str | None = None
+
+    @property
+    def label(self) -> str:
+        if self.sheet is None:
+            return self.path.name
+        return f"{self.path.name} [{self.sheet}]"
+
+
 def _normalize_header(name: str) -> str:
     if name is None:
         return ""
@@ -112,101 +135,330 @@ def _build_header_mapping(headers: Iterable[str]) -> dict[str, str]:
     return mapping
 
 
-def _row_to_model(data: dict[str, object], line_number: int) -> SpreadsheetRow:
-    numero_guia = str(data["numero_guia"]).strip()
-    senha = str(data["senha"]).strip()
-    justificativa = str(data["justificativa"]).strip()
+def _cell_text(value: object) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _check_row(
+    data: dict[str, object], line_number: int
+) -> tuple[SpreadsheetRow | None, list[SpreadsheetIssue]]:
+    numero_guia = _cell_text(data["numero_guia"])
+    senha = _cell_text(data["senha"])
+    justificativa = _cell_text(data["justificativa"])
 
-    if not numero_guia or not senha:
-        raise ValueError(f"numero_guia/senha vazios na linha {line_number}")
+    issues = []
+    # Uma so ocorrencia por linha sem chave, apontando a(s) coluna(s) vazia(s).
+    missing = [
+        column for column, text in (("numero_guia", numero_guia), ("senha", senha)) if not text
+    ]
+    if missing:
+        issues.append(
+            SpreadsheetIssue(line_number, "|".join(missing), "numero_guia/senha vazios")
+        )
     if not justificativa:
-        raise ValueError(f"justificativa vazia na linha {line_number}")
-
-    codigo_glosa_raw = data.get("codigo_glosa")
-    codigo_glosa = None
-    if codigo_glosa_raw is not None:
-        text = str(codigo_glosa_raw).strip()
-        codigo_glosa = text or None
-
-    return SpreadsheetRow(
-        numero_guia=numero_guia,
-        senha=senha,
-        valor_glosa=_parse_decimal(data["valor_glosa"], line_number),
-        justificativa=justificativa,
-        codigo_glosa=codigo_glosa,
+        issues.append(SpreadsheetIssue(line_number, "justificativa", "justificativa vazia"))
+
+    raw_valor = data["valor_glosa"]
+    valor_glosa = None
+    try:
+        valor_glosa = _parse_decimal(raw_valor, line_number)
+    except ValueError:
+        if _cell_text(raw_valor):
+            issues.append(
+                SpreadsheetIssue(line_number, "valor_glosa", "valor_glosa invalido", raw_valor)
+            )
+        else:
+            issues.append(SpreadsheetIssue(line_number, "valor_glosa", "valor_glosa vazio"))
+
+    if issues:
+        return None, issues
+    return (
+        SpreadsheetRow(
+            numero_guia=numero_guia,
+            senha=senha,
+            valor_glosa=valor_glosa,
+            justificativa=justificativa,
+            codigo_glosa=_cell_text(data.get("codigo_glosa")) or None,
+        ),
+        issues,
     )
 
 
-def _read_csv_rows(path: Path) -> list[dict[str, object]]:
+def _row_to_model(data: dict[str, object], line_number: int) -> SpreadsheetRow:
+    model, issues = _check_row(data, line_number)
+    if model is None:
+        raise ValueError(issues[0].message)
+    return model
+
+
+def _resolve_column_positions(
+    headers: list[str], header_mapping: dict[str, str]
+) -> dict[str, int]:
+    # Em cabecalhos repetidos vale a ultima coluna, como no mapeamento por dict.
+    positions = {name: index for index, name in enumerate(headers) if name}
+    return {canonical: positions[source] for canonical, source in header_mapping.items()}
+
+
+def _pick_columns(
+    values: tuple[object, ...] | list[object], positions: dict[str, int]
+) -> dict[str, object]:
+    size = len(values)
+    return {
+        canonical: values[index] if index < size else None
+        for canonical, index in positions.items()
+    }
+
+
+def _read_csv_rows(path: Path) -> Iterator[tuple[int, dict[str, object]]]:
     with path.open("r", encoding="utf-8-sig", newline="") as stream:
-        reader = csv.DictReader(stream)
-        if not reader.fieldnames:
+        reader = csv.reader(stream)
+        header_row = next(reader, None)
+        if not header_row:
             raise ValueError("Arquivo CSV sem cabecalho.")
-        headers = [_normalize_header(item) for item in reader.fieldnames]
-        header_mapping = _build_header_mapping(headers)
-
-        result = []
-        for raw_row in reader:
-            normalized_row = {
-                _normalize_header(key): value for key, value in raw_row.items() if key
-            }
-            canonical_row = {
-                canonical: normalized_row.get(source)
-                for canonical, source in header_mapping.items()
-            }
-            result.append(canonical_row)
-        return result
-
-
-def _read_xlsx_rows(path: Path) -> list[dict[str, object]]:
-    workbook = load_workbook(filename=path, read_only=True, data_only=True)
-    worksheet = workbook.active
-    rows = worksheet.iter_rows(values_only=True)
+        headers = [_normalize_header(item) for item in header_row]
+        positions = _resolve_column_positions(headers, _build_header_mapping(headers))
+
+        # Numera registros, nao linhas fisicas: um campo entre aspas com quebra
+        # de linha continua sendo uma linha da planilha.
+        records = (values for values in reader if values)
+        for line_number, values in enumerate(records, start=2):
+            yield line_number, _pick_columns(values, positions)
+
 
+def _read_xlsx_rows(
+    path: Path, sheet: str | None = None
+) -> Iterator[tuple[int, dict[str, object]]]:
+    workbook = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            worksheet = workbook.active
+        elif sheet in workbook.sheetnames:
+            worksheet = workbook[sheet]
+        else:
+            raise ValueError(f"Aba nao encontrada na planilha: {sheet!r}")
+        rows = worksheet.iter_rows(values_only=True)
+
+        try:
+            headers_row = next(rows)
+        except StopIteration as exc:
+            raise ValueError("Planilha XLSX vazia.") from exc
+
+        headers = [_normalize_header(item) for item in headers_row]
+        positions = _resolve_column_positions(headers, _build_header_mapping(headers))
+
+        for line_number, values in enumerate(rows, start=2):
+            if not values or all(item is None for item in values):
+                continue
+            yield line_number, _pick_columns(values, positions)
+    finally:
+        workbook.close()
+
+
+def _read_xlsx_rows_xml(
+    path: Path, sheet_name: str | None = None
+) -> Iterator[tuple[int, dict[str, object]]]:
+    sheet = XlsxXmlSheet(path, sheet_name)
+    rows = sheet.rows()
     try:
-        headers_row = next(rows)
+        _header_number, header_cells = next(rows)
     except StopIteration as exc:
         raise ValueError("Planilha XLSX vazia.") from exc
 
-    headers = [_normalize_header(item) for item in headers_row]
-    header_mapping = _build_header_mapping(headers)
-
-    parsed = []
-    for values in rows:
-        if not values or all(item is None for item in values):
-            continue
-        normalized_row = {headers[index]: value for index, value in enumerate(values)}
-        canonical_row = {
-            canonical: normalized_row.get(source)
-            for canonical, source in header_mapping.items()
+    width = max(header_cells, default=-1) + 1
+    headers = [_normalize_header(header_cells.get(index)) for index in range(width)]
+    positions = _resolve_column_positions(headers, _build_header_mapping(headers))
+    sheet.columns = set(positions.values())
+
+    for line_number, cells in rows:
+        yield line_number, {
+            canonical: cells.get(index) for canonical, index in positions.items()
         }
-        parsed.append(canonical_row)
 
-    workbook.close()
-    return parsed
 
+def _integral_floats_to_int(values: list[object]) -> list[object]:
+    return [
+        int(value) if isinstance(value, float) and value.is_integer() else value
+        for value in values
+    ]
 
-def _read_rows(path: Path) -> list[dict[str, object]]:
+
+def _read_arrow_rows(path: Path) -> Iterator[tuple[int, dict[str, object]]]:
+    names = arrow_column_names(path)
+    headers = [_normalize_header(name) for name in names]
+    positions = _resolve_column_positions(headers, _build_header_mapping(headers))
+    selected = {canonical: names[index] for canonical, index in positions.items()}
+
+    line_number = 1
+    for batch in iter_arrow_batches(path, list(dict.fromkeys(selected.values()))):
+        columns = [
+            (
+                canonical,
+                _integral_floats_to_int(batch[name])
+                if canonical in IDENTIFIER_COLUMNS
+                else batch[name],
+            )
+            for canonical, name in selected.items()
+        ]
+        for offset in range(len(columns[0][1])):
+            line_number += 1
+            row = {canonical: values[offset] for canonical, values in columns}
+            if all(value is None for value in row.values()):
+                continue
+            yield line_number, row
+
+
+def _read_rows(
+    path: Path, xlsx_engine: str = "openpyxl", sheet: str | None = None
+) -> Iterator[tuple[int, dict[str, object]]]:
     suffix = path.suffix.lower()
     if suffix == ".csv":
         return _read_csv_rows(path)
     if suffix == ".xlsx":
-        return _read_xlsx_rows(path)
-    raise ValueError("Formato nao suportado. Use .csv ou .xlsx.")
+        if xlsx_engine == "xml":
+            return _read_xlsx_rows_xml(path, sheet)
+        if xlsx_engine == "openpyxl":
+            return _read_xlsx_rows(path, sheet)
+        raise ValueError(
+            f"Motor XLSX desconhecido: {xlsx_engine!r}. Use {' ou '.join(XLSX_ENGINES)}."
+        )
+    if suffix in ARROW_SUFFIXES:
+        return _read_arrow_rows(path)
+    raise ValueError("Formato nao suportado. Use .csv, .xlsx, .parquet ou .feather/.arrow.")
+
 
+def iter_spreadsheet_rows(
+    path: Path, xlsx_engine: str = "openpyxl", sheet: str | None = None
+) -> Iterator[tuple[int, SpreadsheetRow]]:
+    """Le, normaliza e valida a planilha linha a linha, sem materializar a lista."""
+    for line_number, row_data in _read_rows(path, xlsx_engine, sheet):
+        yield line_number, _row_to_model(row_data, line_number)
 
-def load_spreadsheet_index(path: Path) -> Dict[str, SpreadsheetRow]:
+
+def _index_rows(
+    index: SpreadsheetIndex,
+    rows: Iterable[tuple[int, SpreadsheetRow]],
+    label: str | None = None,
+) -> SpreadsheetIndex:
+    for line_number, model in rows:
+        if model.key in index:
+            raise DuplicateKeyError(model.key, line_number, label)
+        index.add(model, line_number)
+    return index
+
+
+def load_spreadsheet_index(
+    path: Path,
+    xlsx_engine: str = "openpyxl",
+    sheet: str | None = None,
+    sqlite_path: Path | None = None,
+) -> SpreadsheetIndex | SqliteSpreadsheetIndex:
     if not path.exists():
         raise FileNotFoundError(f"Arquivo nao encontrado: {path}")
 
-    rows = _read_rows(path)
-    index: Dict[str, SpreadsheetRow] = {}
-    for line_number, row_data in enumerate(rows, start=2):
-        model = _row_to_model(row_data, line_number)
-        if model.key in index:
-            raise ValueError(
-                f"Planilha contem chave duplicada ({model.key}) na linha {line_number}."
-            )
-        index[model.key] = model
+    rows = iter_spreadsheet_rows(path, xlsx_engine, sheet)
+    if sqlite_path is not None:
+        return SqliteSpreadsheetIndex.build(sqlite_path, rows)
+    return _index_rows(SpreadsheetIndex(), rows)
+
+
+@dataclass
+class SpreadsheetValidationReport:
+    index: SpreadsheetIndex
+    issues: list[SpreadsheetIssue]
+    rows_read: int
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.issues
+
+
+def validate_spreadsheet(
+    path: Path,
+    xlsx_engine: str = "openpyxl",
+    sheet: str | None = None,
+    keep_rows: bool = True,
+) -> SpreadsheetValidationReport:
+    """Valida todas as linhas numa unica leitura, sem parar no primeiro erro.
 
+    Linhas com problema ficam fora do indice; chaves repetidas mantem a
+    primeira ocorrencia. Ausencia de colunas obrigatorias continua sendo fatal.
+    Com `keep_rows=False` so as chaves ficam em memoria e o indice volta vazio
+    (validacao antes de gravar o indice em SQLite ou juntar varias fontes).
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Arquivo nao encontrado: {path}")
+
+    index = SpreadsheetIndex()
+    seen: set[str] = set()
+    issues: list[SpreadsheetIssue] = []
+    rows_read = 0
+    for line_number, row_data in _read_rows(path, xlsx_engine, sheet):
+        rows_read += 1
+        model, row_issues = _check_row(row_data, line_number)
+        if model is None:
+            issues.extend(row_issues)
+        elif model.key in seen:
+            issues.append(
+                SpreadsheetIssue(
+                    line_number, "numero_guia|senha", f"chave duplicada ({model.key})"
+                )
+            )
+        else:
+            seen.add(model.key)
+            if keep_rows:
+                index.add(model, line_number)
+    return SpreadsheetValidationReport(index=index, issues=issues, rows_read=rows_read)
+
+
+def expand_sources(
+    paths: Iterable[Path], all_sheets: bool = False
+) -> list[SpreadsheetSource]:
+    sources = []
+    for path in paths:
+        if all_sheets and path.suffix.lower() == ".xlsx" and path.exists():
+            sources.extend(SpreadsheetSource(path, name) for name in sheet_names(path))
+        else:
+            sources.append(SpreadsheetSource(path))
+    return sources
+
+
+def _load_source_index(source: SpreadsheetSource, xlsx_engine: str) -> SpreadsheetIndex:
+    try:
+        return load_spreadsheet_index(source.path, xlsx_engine, source.sheet)
+    except ValueError as exc:
+        raise ValueError(f"{source.label}: {exc}") from exc
+
+
+def load_spreadsheet_sources(
+    sources: Sequence[SpreadsheetSource],
+    xlsx_engine: str = "openpyxl",
+    max_workers: int | None = None,
+    sqlite_path: Path | None = None,
+) -> SpreadsheetIndex | SqliteSpreadsheetIndex:
+    """Le varios arquivos/abas em paralelo e junta tudo num unico indice."""
+    if not sources:
+        raise ValueError("Nenhuma planilha informada.")
+    if len(sources) == 1:
+        source = sources[0]
+        return load_spreadsheet_index(source.path, xlsx_engine, source.sheet, sqlite_path)
+
+    workers = min(len(sources), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_load_source_index, source, xlsx_engine) for source in sources
+        ]
+        # A fusao segue a ordem informada para que a duplicata apontada seja estavel.
+        if sqlite_path is not None:
+            merged = SqliteSpreadsheetIndex.create(sqlite_path)
+            try:
+                for source, future in zip(sources, futures):
+                    merged.extend(future.result().iter_with_lines(), source.label)
+            except Exception:
+                merged.close(delete=True)
+                raise
+            return merged
+
+        index = SpreadsheetIndex()
+        for source, future in zip(sources, futures):
+            _index_rows(index, future.result().iter_with_lines(), source.label)
     return index
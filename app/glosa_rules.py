@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from functools import lru_cache
+import re
+
+from app.config import AppSettings, GlosaRule, PortalSelectors
+
+_NON_DIGITS = re.compile(r"\D+")
+_SELECTOR_FIELDS = frozenset(item.name for item in fields(PortalSelectors))
+
+
+@lru_cache(maxsize=1024)
+def normalize_glosa_code(codigo_glosa: str | None) -> str:
+    text = str(codigo_glosa or "").strip()
+    if not text:
+        return ""
+    numeric = _NON_DIGITS.sub("", text)
+    return numeric or text
+
+
+@dataclass(frozen=True)
+class FillPlan:
+    """O que preencher numa guia; campos sao nomes de PortalSelectors.
+
+    Em `extra_fields`, nomes que nao sao de PortalSelectors valem como seletor.
+
+    `fallback_field` so existe no plano padrao: se o campo principal de
+    justificativa nao aparecer, usa-se o secundario e o valor nao e preenchido.
+    """
+
+    justificativa_field: str
+    fill_valor: bool
+    fallback_field: str | None = None
+    extra_fields: tuple[tuple[str, str], ...] = ()
+
+
+DEFAULT_FILL_PLAN = FillPlan(
+    justificativa_field="justificativa",
+    fill_valor=True,
+    fallback_field="justificativa_3052",
+)
+
+
+class GlosaRuleTable:
+    """Tabela codigo de glosa -> FillPlan, compilada uma vez a partir das regras."""
+
+    def __init__(self, rules: list[GlosaRule]) -> None:
+        self._plans: dict[str, FillPlan] = {}
+        for rule in rules:
+            if rule.justificativa_field not in _SELECTOR_FIELDS:
+                raise ValueError(
+                    f"Campo desconhecido na regra de glosa: {rule.justificativa_field!r}"
+                )
+            plan = FillPlan(
+                justificativa_field=rule.justificativa_field,
+                fill_valor=rule.fill_valor,
+                extra_fields=tuple(rule.extra_fields.items()),
+            )
+            for code in rule.codes:
+                normalized = normalize_glosa_code(code)
+                if normalized:
+                    self._plans[normalized] = plan
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings) -> GlosaRuleTable:
+        return cls(settings.glosa_rules)
+
+    def plan_for(self, codigo_glosa: str | None) -> FillPlan:
+        return self._plans.get(normalize_glosa_code(codigo_glosa), DEFAULT_FILL_PLAN)
+
+    def codes(self) -> list[str]:
+        return list(self._plans)
+
+
+def resolve_field_selector(selectors: PortalSelectors, name: str) -> str:
+    if name in _SELECTOR_FIELDS:
+        return getattr(selectors, name)
+    return name
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from contextlib import suppress
+from dataclasses import dataclass
+import hashlib
+import json
+import marshal
+import os
+from pathlib import Path
+import struct
+import sys
+from tempfile import gettempdir
+from typing import Callable, Mapping
+import zlib
+
+from app.excel_reader import load_spreadsheet_index
+from app.models import SpreadsheetRow
+from app.spreadsheet_index import SpreadsheetIndex
+
+DEFAULT_CACHE_DIR = Path(gettempdir()) / "amil-glosa-index-cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# O marshal muda entre versoes do Python; a versao entra no cabecalho.
+_MAGIC = b"AMILIDX1"
+_MAGIC_SIZE = len(_MAGIC)
+_FORMAT_VERSION = 3
+_HEADER_SIZE = struct.Struct("<I")
+_ENTRY_SUFFIX = ".idx"
+_DIGEST_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+def stat_fingerprint(path: Path) -> tuple[str, int, int]:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def edge_digest(path: Path, block_size: int = _DIGEST_BLOCK_SIZE) -> str:
+    """Hash do primeiro e do ultimo bloco: complementa tamanho e mtime sem ler tudo."""
+    digest = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as stream:
+        digest.update(stream.read(block_size))
+        size = stream.seek(0, os.SEEK_END)
+        if size > block_size:
+            stream.seek(max(block_size, size - block_size))
+            digest.update(stream.read(block_size))
+    return digest.hexdigest()
+
+
+def fingerprint_file(path: Path) -> FileFingerprint:
+    resolved, size, mtime_ns = stat_fingerprint(path)
+    return FileFingerprint(
+        path=resolved, size=size, mtime_ns=mtime_ns, digest=edge_digest(path)
+    )
+
+
+class SpreadsheetIndexCache:
+    """Cache em disco do indice ja validado, invalidado pela impressao do arquivo."""
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def load(
+        self,
+        path: Path,
+        loader: Callable[[Path], Mapping[str, SpreadsheetRow]] = load_spreadsheet_index,
+    ) -> tuple[Mapping[str, SpreadsheetRow], bool]:
+        # A impressao vem antes da leitura: se o arquivo mudar durante a carga,
+        # a entrada fica com a impressao antiga e a proxima consulta recarrega.
+        fingerprint = fingerprint_file(path)
+        cached = self.get(path, fingerprint)
+        if cached is not None:
+            return cached, True
+
+        index = loader(path)
+        self.put(path, index, fingerprint)
+        return index, False
+
+    def get(
+        self, path: Path, fingerprint: FileFingerprint | None = None
+    ) -> SpreadsheetIndex | None:
+        if not path.exists():
+            return None
+        entry = self._entry_path(path)
+        if not entry.exists():
+            return None
+
+        try:
+            with entry.open("rb") as stream:
+                header = self._read_header(stream)
+                resolved, size, mtime_ns = stat_fingerprint(path)
+                if (header["path"], header["size"], header["mtime_ns"]) != (
+                    resolved,
+                    size,
+                    mtime_ns,
+                ):
+                    return None
+                fingerprint = fingerprint or fingerprint_file(path)
+                if header["digest"] != fingerprint.digest:
+                    return None
+                payload = marshal.loads(zlib.decompress(stream.read()))
+            index = SpreadsheetIndex.from_columns(payload)
+        except (OSError, ValueError, EOFError, TypeError, KeyError, zlib.error):
+            self._discard(entry)
+            return None
+
+        # Atualiza o mtime da entrada para a politica LRU (pode ter sido removida).
+        with suppress(OSError):
+            os.utime(entry)
+        return index
+
+    def put(
+        self,
+        path: Path,
+        index: Mapping[str, SpreadsheetRow],
+        fingerprint: FileFingerprint | None = None,
+    ) -> Path | None:
+        fingerprint = fingerprint or fingerprint_file(path)
+        header = json.dumps(
+            {
+                "format": _FORMAT_VERSION,
+                "python": _python_tag(),
+                "path": fingerprint.path,
+                "size": fingerprint.size,
+                "mtime_ns": fingerprint.mtime_ns,
+                "digest": fingerprint.digest,
+            }
+        ).encode("utf-8")
+        if not isinstance(index, SpreadsheetIndex):
+            index = SpreadsheetIndex.from_rows(index.values())
+        body = zlib.compress(marshal.dumps(index.to_columns()), 6)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_path(path)
+        if _MAGIC_SIZE + _HEADER_SIZE.size + len(header) + len(body) > self.max_bytes:
+            return None
+
+        temporary = entry.with_suffix(".tmp")
+        with temporary.open("wb") as stream:
+            stream.write(_MAGIC)
+            stream.write(_HEADER_SIZE.pack(len(header)))
+            stream.write(header)
+            stream.write(body)
+        os.replace(temporary, entry)
+        self.evict(keep=entry)
+        return entry
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        if not self.cache_dir.exists():
+            return []
+        entries = []
+        for item in self.cache_dir.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, item))
+
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, item in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            if item == keep:
+                continue
+            self._discard(item)
+            total -= size
+            removed.append(item)
+        return removed
+
+    def clear(self) -> None:
+        if not self.cache_dir.exists():
+            return
+        for item in self.cache_dir.glob(f"*{_ENTRY_SUFFIX}"):
+            self._discard(item)
+
+    def _entry_path(self, path: Path) -> Path:
+        name = hashlib.blake2b(
+            str(path.resolve()).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return self.cache_dir / f"{name}{_ENTRY_SUFFIX}"
+
+    @staticmethod
+    def _read_header(stream) -> dict:
+        if stream.read(_MAGIC_SIZE) != _MAGIC:
+            raise ValueError("Entrada de cache com formato desconhecido.")
+        (length,) = _HEADER_SIZE.unpack(stream.read(_HEADER_SIZE.size))
+        header = json.loads(stream.read(length).decode("utf-8"))
+        if (
+            header.get("format") != _FORMAT_VERSION
+            or header.get("python") != _python_tag()
+        ):
+            raise ValueError("Entrada de cache de outra versao.")
+        return header
+
+    @staticmethod
+    def _discard(entry: Path) -> None:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def _python_tag() -> str:
+    return f"marshal-{marshal.version}-{sys.version_info[0]}.{sys.version_info[1]}"
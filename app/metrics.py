@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import time
+from typing import Iterable, Iterator, Mapping, Sequence
+
+SUMMARY_PERCENTILES = (50, 95, 99)
+# Fases de uma guia, na ordem em que acontecem.
+GUIDE_PHASES = ("read", "fill", "next", "wait", "screenshot")
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Percentil q (0-100) com interpolacao linear; a lista ja deve estar ordenada."""
+    if not sorted_values:
+        raise ValueError("Percentil de lista vazia.")
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def latency_percentiles(
+    values: Iterable[float], quantiles: Sequence[float] = SUMMARY_PERCENTILES
+) -> dict[str, float]:
+    """{"p50": ..., "p95": ..., "p99": ...} em segundos; vazio se nao ha amostras."""
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {f"p{q:g}": round(percentile(ordered, q), 3) for q in quantiles}
+
+
+def phase_percentiles(
+    samples: Mapping[str, Sequence[float]],
+) -> dict[str, dict[str, float]]:
+    """Percentis por fase, na ordem de GUIDE_PHASES (fases sem amostra ficam fora)."""
+    ordered = [name for name in GUIDE_PHASES if name in samples]
+    ordered += [name for name in samples if name not in GUIDE_PHASES]
+    return {
+        name: latency_percentiles(samples[name]) for name in ordered if samples[name]
+    }
+
+
+class PhaseTimer:
+    """Soma o tempo (monotonic) gasto em cada fase de uma guia."""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 6)
@@ -3,22 +3,42 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from app.glosa_rules import FillPlan
+
 
 def build_key(numero_guia: str, senha: str) -> str:
     return f"{str(numero_guia).strip()}|{str(senha).strip()}"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SpreadsheetRow:
     numero_guia: str
     senha: str
     valor_glosa: float
     justificativa: str
     codigo_glosa: str | None = None
+    # Plano de preenchimento pre-calculado pelas regras de glosa (None = o
+    # portal decide pelo codigo).
+    fill_plan: FillPlan | None = field(default=None, repr=False, compare=False)
+    key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "key", build_key(self.numero_guia, self.senha))
+
+
+@dataclass(frozen=True)
+class SpreadsheetIssue:
+    line_number: int
+    column: str
+    reason: str
+    value: object = None
 
     @property
-    def key(self) -> str:
-        return build_key(self.numero_guia, self.senha)
+    def message(self) -> str:
+        text = f"{self.reason} na linha {self.line_number}"
+        if self.value is not None:
+            text = f"{text}: {self.value!r}"
+        return text
 
 
 @dataclass(frozen=True)
@@ -42,3 +62,5 @@ class GuideStatusRecord:
     status: str
     message: str
     timestamp: str = field(default_factory=lambda: datetime.now().strftime("%H:%M:%S"))
+    # Segundos por fase (read, fill, next, wait, screenshot) gastos nesta guia.
+    timings: dict[str, float] = field(default_factory=dict, compare=False)
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 import re
 import threading
 import time
 from dataclasses import dataclass
-from typing import Callable, Dict
+from typing import Callable, Iterator, Mapping
 
+from app.metrics import PhaseTimer, phase_percentiles
 from app.models import GuideContext, GuideStatusRecord, SpreadsheetRow
+from app.tracing import NOOP_SPAN, span, start_span
 
 
 @dataclass
@@ -16,6 +19,11 @@ class OrchestratorConfig:
     pause_on_missing: bool = True
     wait_for_manual_action: bool = True
     delay_after_next_seconds: float = 0.3
+    wait_for_guide_change: bool = True
+    guide_change_timeout_seconds: float = 15.0
+    # Faixa de posicoes do lote [start_guide, end_guide) processada por este robo.
+    start_guide: int = 0
+    end_guide: int | None = None
     capture_screenshot_on_error: bool = True
     error_artifacts_dir: Path = Path("reports") / "screenshots"
 
@@ -24,7 +32,7 @@ class AutomationOrchestrator:
     def __init__(
         self,
         portal_client,
-        spreadsheet_index: Dict[str, SpreadsheetRow],
+        spreadsheet_index: Mapping[str, SpreadsheetRow],
         config: OrchestratorConfig | None = None,
         on_log: Callable[[str], None] | None = None,
         on_status: Callable[[GuideStatusRecord], None] | None = None,
@@ -45,6 +53,11 @@ class AutomationOrchestrator:
         self._resume_event.set()
         self._skip_current = False
         self._lock = threading.Lock()
+        self._next_context: GuideContext | None = None
+        # Tempos da guia atual e amostras de todas as guias, por fase.
+        self._timer = PhaseTimer()
+        self.phase_samples: dict[str, list[float]] = {}
+        self._guide_span = NOOP_SPAN
 
     def run(self) -> None:
         if self.state == "RUNNING":
@@ -53,18 +66,33 @@ class AutomationOrchestrator:
         self._set_state("RUNNING")
         total = self.portal_client.get_total_guides()
         self._log(f"Total de guias no lote: {total}")
+        end = self._range_end(total)
+        self._seek_first_guide(end)
 
-        while self.processed < total:
+        while self.processed < end:
+            # O avanco depois de um erro roda apos o registro da guia: seus tempos
+            # entram nas amostras aqui.
+            self._flush_phase_timer()
             if self._stop_event.is_set():
                 self._set_state("PARADO")
                 return
 
+            if not self._resume_event.is_set():
+                # Durante a pausa o usuario pode navegar: descarta a leitura antecipada.
+                self._next_context = None
             self._resume_event.wait()
             if self._stop_event.is_set():
                 self._set_state("PARADO")
                 return
 
-            context = self.portal_client.read_current_context()
+            position = self.processed
+            self._guide_span = start_span("guide", position=position + 1)
+            context = self._next_context
+            if context is None:
+                with self._phase("read"):
+                    context = self.portal_client.read_current_context()
+            self._next_context = None
+            self._guide_span.set(key=context.key)
             self._log(
                 f"Processando guia {self.processed + 1} de {total} - chave {context.key}"
             )
@@ -94,26 +122,27 @@ class AutomationOrchestrator:
                         self._set_state("PARADO")
                         return
                     if action == "SKIP":
-                        self._advance_to_next_guide(total)
+                        self._advance_to_next_guide(total, context.key)
                     continue
 
-                self._advance_to_next_guide(total)
+                self._advance_to_next_guide(total, context.key)
                 continue
 
             try:
-                self.portal_client.fill_current_guide(
-                    valor_glosa=row.valor_glosa,
-                    justificativa=row.justificativa,
-                    codigo_glosa=row.codigo_glosa,
-                )
+                with self._phase("fill"):
+                    self.portal_client.fill_current_guide(**self._fill_arguments(row))
                 self.successes += 1
-                self._emit_status(
-                    total=total,
-                    context=context,
-                    status="SUCESSO",
-                    message="Guia preenchida com sucesso",
-                )
-                self._advance_to_next_guide(total)
+                try:
+                    self._advance_to_next_guide(total, context.key)
+                finally:
+                    # Depois de avancar, para o registro levar tambem o tempo da troca.
+                    self._emit_status(
+                        total=total,
+                        context=context,
+                        status="SUCESSO",
+                        message="Guia preenchida com sucesso",
+                        position=position,
+                    )
             except Exception as exc:
                 self.errors += 1
                 screenshot = self._capture_error_screenshot(context)
@@ -134,8 +163,9 @@ class AutomationOrchestrator:
                     self._set_state("PARADO")
                     return
                 if action == "SKIP":
-                    self._advance_to_next_guide(total)
+                    self._advance_to_next_guide(total, context.key)
 
+        self._flush_phase_timer()
         self._set_state("FINALIZADO")
         self._log(
             f"Processamento finalizado. Sucessos: {self.successes} | Erros: {self.errors}"
@@ -167,29 +197,83 @@ class AutomationOrchestrator:
         self._set_state("PARADO")
         self._log("Execucao encerrada manualmente.")
 
-    def summary(self) -> dict[str, int | str]:
-        return {
+    def summary(self) -> dict[str, int | str | dict]:
+        result: dict[str, int | str | dict] = {
             "state": self.state,
-            "processed": self.processed,
+            "processed": max(self.processed - self.config.start_guide, 0),
             "successes": self.successes,
             "errors": self.errors,
         }
+        if self.phase_samples:
+            result["phases"] = phase_percentiles(self.phase_samples)
+        return result
 
     def _wait_for_manual_action(self) -> str:
-        while True:
-            if self._stop_event.is_set():
-                return "STOP"
-            if self._resume_event.wait(timeout=0.2):
-                if self._consume_skip():
-                    return "SKIP"
-                return "RETRY"
-
-    def _advance_to_next_guide(self, total: int) -> None:
-        if self.processed < total - 1:
+        # resume(), skip_current_guide() e stop() setam _resume_event: a espera
+        # acorda na hora, sem polling.
+        self._resume_event.wait()
+        if self._stop_event.is_set():
+            return "STOP"
+        if self._consume_skip():
+            return "SKIP"
+        return "RETRY"
+
+    def _range_end(self, total: int) -> int:
+        if self.config.end_guide is None:
+            return total
+        return min(self.config.end_guide, total)
+
+    def _seek_first_guide(self, end: int) -> None:
+        start = min(self.config.start_guide, end)
+        if self.processed >= start:
+            return
+        self._log(f"Avancando ate a guia {start + 1}.")
+        context = self.portal_client.read_current_context()
+        while self.processed < start and not self._stop_event.is_set():
             self.portal_client.click_next_guide()
+            self._wait_next_guide(context.key)
+            context = self._next_context or self.portal_client.read_current_context()
+            self._next_context = context
+            self.processed += 1
+
+    def _advance_to_next_guide(self, total: int, previous_key: str) -> None:
+        if self.processed < self._range_end(total) - 1:
+            with self._phase("next"):
+                self.portal_client.click_next_guide()
+            with self._phase("wait"):
+                self._wait_next_guide(previous_key)
+        self.processed += 1
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        with span(name), self._timer.phase(name):
+            yield
+
+    def _wait_next_guide(self, previous_key: str) -> None:
+        wait_for_change = getattr(self.portal_client, "wait_for_guide_change", None)
+        if not self.config.wait_for_guide_change or not callable(wait_for_change):
             if self.config.delay_after_next_seconds > 0:
                 time.sleep(self.config.delay_after_next_seconds)
-        self.processed += 1
+            return
+
+        timeout_ms = self.config.guide_change_timeout_seconds * 1000
+        try:
+            # O contexto ja lido e reaproveitado na proxima volta do laco.
+            self._next_context = wait_for_change(previous_key, timeout_ms)
+        except Exception as exc:
+            self._log(f"Troca de guia nao confirmada ({exc}). Seguindo com a leitura atual.")
+
+    @staticmethod
+    def _fill_arguments(row: SpreadsheetRow) -> dict:
+        arguments = {
+            "valor_glosa": row.valor_glosa,
+            "justificativa": row.justificativa,
+            "codigo_glosa": row.codigo_glosa,
+        }
+        # So envia o plano quando existe: clientes antigos nao conhecem o argumento.
+        if row.fill_plan is not None:
+            arguments["fill_plan"] = row.fill_plan
+        return arguments
 
     def _consume_skip(self) -> bool:
         with self._lock:
@@ -198,17 +282,33 @@ class AutomationOrchestrator:
                 return True
         return False
 
+    def _flush_phase_timer(self) -> dict[str, float]:
+        """Passa os tempos do timer atual para `phase_samples` e comeca outro."""
+        timings, self._timer = self._timer.timings, PhaseTimer()
+        for name, seconds in timings.items():
+            self.phase_samples.setdefault(name, []).append(seconds)
+        return timings
+
     def _emit_status(
-        self, total: int, context: GuideContext, status: str, message: str
+        self,
+        total: int,
+        context: GuideContext,
+        status: str,
+        message: str,
+        position: int | None = None,
     ) -> None:
+        # Cada registro leva o tempo desde o anterior da mesma guia.
+        timings = self._flush_phase_timer()
+        self._guide_span.end(status=status)
         self.on_status(
             GuideStatusRecord(
-                processed_index=self.processed + 1,
+                processed_index=(self.processed if position is None else position) + 1,
                 total_guides=total,
                 numero_guia=context.numero_guia,
                 senha=context.senha,
                 status=status,
                 message=message,
+                timings=timings,
             )
         )
 
@@ -226,19 +326,23 @@ class AutomationOrchestrator:
         if not callable(capture):
             return None
 
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
-        guia = self._safe_slug(context.numero_guia)
-        senha = self._safe_slug(context.senha)
-        self.config.error_artifacts_dir.mkdir(parents=True, exist_ok=True)
-        output = self.config.error_artifacts_dir / f"{timestamp}-{guia}-{senha}.png"
+        output = self._screenshot_path(context)
         try:
-            capture(output)
+            with self._phase("screenshot"):
+                capture(output)
             self._log(f"Screenshot de erro salva em: {output}")
             return output
         except Exception as exc:
             self._log(f"Falha ao capturar screenshot de erro: {exc}")
             return None
 
+    def _screenshot_path(self, context: GuideContext) -> Path:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        guia = self._safe_slug(context.numero_guia)
+        senha = self._safe_slug(context.senha)
+        self.config.error_artifacts_dir.mkdir(parents=True, exist_ok=True)
+        return self.config.error_artifacts_dir / f"{timestamp}-{guia}-{senha}.png"
+
     @staticmethod
     def _safe_slug(value: str) -> str:
         text = re.sub(r"[^A-Za-z0-9_-]+", "_", str(value).strip())
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Callable, Sequence
+
+from app.concurrency import AimdGovernor
+from app.metrics import phase_percentiles
+
+# Ordem de prioridade do estado exibido quando varios robos rodam juntos:
+# uma pausa pede acao manual, entao aparece antes de "RUNNING".
+_STATE_PRIORITY = ("PAUSADO", "RUNNING", "PARADO", "IDLE", "FINALIZADO")
+
+
+def split_guide_ranges(total: int, parts: int) -> list[tuple[int, int]]:
+    """Divide as posicoes [0, total) em faixas contiguas de tamanho parecido."""
+    parts = max(1, min(parts, total))
+    size, extra = divmod(total, parts)
+    ranges = []
+    start = 0
+    for index in range(parts):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def prefixed_log(on_log: Callable[[str], None], prefix: str) -> Callable[[str], None]:
+    return lambda message: on_log(f"{prefix} {message}")
+
+
+class OrchestratorGroup:
+    """Varios orquestradores vistos pela interface como um so.
+
+    Pausar, retomar e encerrar valem para todos; pular afeta apenas quem esta
+    pausado esperando acao manual. Contadores e estado sao agregados.
+    """
+
+    def __init__(self, workers: Sequence, governor: AimdGovernor | None = None) -> None:
+        self.workers = list(workers)
+        self.governor = governor
+
+    @property
+    def state(self) -> str:
+        states = {worker.state for worker in self.workers}
+        for state in _STATE_PRIORITY:
+            if state in states:
+                return state
+        return "IDLE"
+
+    @property
+    def processed(self) -> int:
+        return sum(worker.summary()["processed"] for worker in self.workers)
+
+    @property
+    def successes(self) -> int:
+        return sum(worker.successes for worker in self.workers)
+
+    @property
+    def errors(self) -> int:
+        return sum(worker.errors for worker in self.workers)
+
+    def pause(self) -> None:
+        for worker in self.workers:
+            worker.pause()
+
+    def resume(self) -> None:
+        for worker in self.workers:
+            worker.resume()
+
+    def skip_current_guide(self) -> None:
+        paused = [worker for worker in self.workers if worker.state == "PAUSADO"]
+        for worker in paused or self.workers:
+            worker.skip_current_guide()
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.stop()
+
+    def summary(self) -> dict[str, int | float | str | dict]:
+        result: dict[str, int | float | str | dict] = {
+            "state": self.state,
+            "processed": self.processed,
+            "successes": self.successes,
+            "errors": self.errors,
+            "workers": len(self.workers),
+        }
+        samples: dict[str, list[float]] = {}
+        for worker in self.workers:
+            # Processos remotos so mandam percentis prontos, sem as amostras.
+            for name, values in getattr(worker, "phase_samples", {}).items():
+                samples.setdefault(name, []).extend(values)
+        if samples:
+            result["phases"] = phase_percentiles(samples)
+        if self.governor is not None:
+            result.update(self.governor.summary())
+        return result
+
+
+class RemoteWorker:
+    """Orquestrador rodando em outro processo.
+
+    Comandos da interface vao por uma fila; estado e contadores chegam pelo
+    ultimo resumo enviado pelo processo.
+    """
+
+    def __init__(self, commands, label: str = "") -> None:
+        self.commands = commands
+        self.label = label
+        self._summary: dict[str, int | str] = {
+            "state": "IDLE",
+            "processed": 0,
+            "successes": 0,
+            "errors": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        return str(self._summary["state"])
+
+    @property
+    def successes(self) -> int:
+        return int(self._summary["successes"])
+
+    @property
+    def errors(self) -> int:
+        return int(self._summary["errors"])
+
+    def update(self, summary: dict[str, int | str]) -> None:
+        self._summary = dict(summary)
+
+    def summary(self) -> dict[str, int | str]:
+        return dict(self._summary)
+
+    def pause(self) -> None:
+        self.commands.put("pause")
+
+    def resume(self) -> None:
+        self.commands.put("resume")
+
+    def skip_current_guide(self) -> None:
+        self.commands.put("skip_current_guide")
+
+    def stop(self) -> None:
+        self.commands.put("stop")
@@ -4,18 +4,43 @@ from pathlib import Path
 import re
 import time
 from typing import Any
+import uuid
 
 from playwright.sync_api import (
     Browser,
     BrowserContext,
+    Frame,
     Locator,
     Page,
     Playwright,
     sync_playwright,
 )
 
-from app.config import AppSettings
+from app.config import AppSettings, PortalSelectors
+from app.glosa_rules import (
+    FillPlan,
+    GlosaRuleTable,
+    normalize_glosa_code,
+    resolve_field_selector,
+)
 from app.models import GuideContext
+from app.portal_scripts import (
+    FILL_SCRIPT,
+    FRAME_READY_SCRIPT,
+    FRAME_READY_TOKEN,
+    GUIDE_CHANGE_SCRIPT,
+    GUIDE_MARK_LOST_SCRIPT,
+    MARK_GUIDE_SCRIPT,
+    SNAPSHOT_SCRIPT,
+    WATCH_SCRIPT,
+)
+from app.tracing import span
+
+WAIT_SLICE_SECONDS = 1.0
+POLL_INTERVAL_SECONDS = 0.2
+# Intervalo (ms) do wait_for_function da troca de guia. "raf" nao serve: o
+# Chrome suspende requestAnimationFrame em abas em segundo plano (varias abas).
+GUIDE_CHANGE_POLL_MS = 50
 
 
 def resolve_selector(selector: str) -> str:
@@ -25,12 +50,19 @@ def resolve_selector(selector: str) -> str:
     return normalized
 
 
-def normalize_glosa_code(codigo_glosa: str | None) -> str:
-    text = str(codigo_glosa or "").strip()
-    if not text:
-        return ""
-    numeric = re.sub(r"\D+", "", text)
-    return numeric or text
+def dom_query(selector: str) -> dict[str, str] | None:
+    """Traduz o seletor para consulta direta no DOM (xpath ou css), se possivel."""
+    resolved = resolve_selector(selector)
+    if not resolved:
+        return None
+    if resolved.startswith("xpath="):
+        return {"kind": "xpath", "selector": resolved[len("xpath=") :]}
+    if resolved.startswith("css="):
+        return {"kind": "css", "selector": resolved[len("css=") :]}
+    if re.match(r"^[a-z_-]+=", resolved) or ">>" in resolved:
+        # Motores proprios do Playwright (text=, id=, encadeamento) ficam no caminho antigo.
+        return None
+    return {"kind": "css", "selector": resolved}
 
 
 def is_glosa_3052(codigo_glosa: str | None) -> bool:
@@ -53,27 +85,154 @@ def resolve_justificativa_selector(codigo_glosa: str | None, settings: AppSettin
 
 
 def find_locator_in_pages(pages: list[Any], selector: str) -> tuple[Any | None, Any | None]:
+    locator, page, _frame = locate_in_pages(pages, selector)
+    return locator, page
+
+
+def locate_in_pages(pages: list[Any], selector: str) -> tuple[Any | None, Any | None, Any | None]:
     # Prioriza a ultima aba/pagina aberta.
     for page in reversed(pages):
-        locator = find_locator_in_page_frames(page, selector)
-        if locator is not None:
-            return locator, page
-    return None, None
+        for frame in page_frames(page):
+            locator = find_locator_in_frame(frame, selector)
+            if locator is not None:
+                return locator, page, frame
+    return None, None, None
 
 
 def find_locator_in_page_frames(page: Any, selector: str) -> Any | None:
+    for frame in page_frames(page):
+        locator = find_locator_in_frame(frame, selector)
+        if locator is not None:
+            return locator
+    return None
+
+
+def find_locator_in_frame(frame: Any, selector: str) -> Any | None:
+    try:
+        locator = frame.locator(selector).first
+        if _safe_locator_count(locator) > 0:
+            return locator
+    except Exception:
+        pass
+    return None
+
+
+def page_frames(page: Any) -> list[Any]:
     frames = list(getattr(page, "frames", []) or [])
     if not frames and hasattr(page, "main_frame"):
         frames = [page.main_frame]
-
-    for frame in frames:
+    return frames
+
+
+def snapshot_pages(
+    pages: list[Any],
+    fields: dict[str, dict[str, str]],
+    preferred: list[tuple[Any, Any]] | None = None,
+) -> tuple[dict[str, str], dict[str, tuple[Any, Any]]]:
+    """Executa SNAPSHOT_SCRIPT uma vez por frame ate encontrar todos os campos.
+
+    Os pares (pagina, frame) de `preferred` sao consultados primeiro. Retorna os
+    valores encontrados e, para cada campo, a pagina e o frame onde estava.
+    """
+    values: dict[str, str] = {}
+    locations: dict[str, tuple[Any, Any]] = {}
+    candidates = list(preferred or [])
+    candidates.extend(
+        (page, frame) for page in reversed(pages) for frame in page_frames(page)
+    )
+    visited: set[int] = set()
+    for page, frame in candidates:
+        pending = {name: query for name, query in fields.items() if name not in values}
+        if not pending:
+            break
+        if id(frame) in visited:
+            continue
+        visited.add(id(frame))
         try:
-            locator = frame.locator(selector).first
-            if _safe_locator_count(locator) > 0:
-                return locator
+            with span("cdp.evaluate", script="snapshot"):
+                found = frame.evaluate(SNAPSHOT_SCRIPT, pending) or {}
         except Exception:
             continue
-    return None
+        for name, text in found.items():
+            if name in pending:
+                values[name] = text
+                locations[name] = (page, frame)
+    return values, locations
+
+
+def snapshot_queries(selectors: PortalSelectors) -> dict[str, dict[str, str]] | None:
+    """Consultas DOM dos campos da guia; None se algum seletor nao for xpath/css."""
+    fields = {}
+    for name in ("numero_guia", "senha", "lote", "protocolo"):
+        selector = getattr(selectors, name)
+        if not str(selector or "").strip():
+            continue
+        query = dom_query(selector)
+        if query is None:
+            return None
+        fields[name] = query
+    return fields
+
+
+def context_from_snapshot(values: dict[str, str]) -> GuideContext | None:
+    if not values.get("numero_guia") or not values.get("senha"):
+        return None
+    return GuideContext(
+        numero_guia=values["numero_guia"],
+        senha=values["senha"],
+        lote=values.get("lote", ""),
+        protocolo=values.get("protocolo", ""),
+    )
+
+
+def parse_total_guides(raw: str) -> int:
+    matches = [int(value) for value in re.findall(r"\d+", raw)]
+    if not matches:
+        raise RuntimeError(
+            "Nao foi possivel identificar o total de guias no portal. "
+            f"Valor capturado: {raw!r}"
+        )
+    return matches[-1]
+
+
+def plan_fill_fields(
+    plan: FillPlan, selectors: PortalSelectors, valor_glosa: float, justificativa: str
+) -> list[tuple[str, str]]:
+    """(seletor, texto) na ordem de preenchimento; a justificativa vem primeiro."""
+    fields = [(getattr(selectors, plan.justificativa_field), justificativa)]
+    if plan.fill_valor:
+        valor_text = f"{valor_glosa:.2f}".replace(".", ",")
+        fields.append((selectors.valor_glosa, valor_text))
+    fields.extend(
+        (resolve_field_selector(selectors, name), value) for name, value in plan.extra_fields
+    )
+    return fields
+
+
+def fill_payload(fields: list[tuple[str, str]]) -> list[dict[str, str]] | None:
+    queries = [dom_query(selector) for selector, _value in fields]
+    if any(query is None for query in queries):
+        return None
+    return [{**query, "value": value} for query, (_selector, value) in zip(queries, fields)]
+
+
+def fill_result_matches(result: dict | None, fields: list[tuple[str, str]]) -> bool:
+    if not result or not result.get("ok"):
+        return False
+    expected = [value.replace("\r\n", "\n") for _selector, value in fields]
+    # Mascara do portal pode alterar o texto: nesse caso o fill do Playwright digita de novo.
+    return [str(value) for value in result.get("values", [])] == expected
+
+
+def query_key(query: dict[str, str]) -> str:
+    # Mesma chave que _find_locator usa (seletor resolvido para o Playwright).
+    if query["kind"] == "xpath":
+        return f"xpath={query['selector']}"
+    return query["selector"]
+
+
+class _StopWaiting(Exception):
+    """Encerra a espera pelo console sem aguardar o evento."""
 
 
 def _safe_locator_count(locator: Any) -> int:
@@ -83,13 +242,234 @@ def _safe_locator_count(locator: Any) -> int:
         return 0
 
 
-class PortalClient:
+class FrameCacheMixin:
+    """Cache seletor -> (pagina, frame), descartado em navegacao/remocao do frame.
+
+    Compartilhado pelos clientes sync e async: os eventos do Playwright chamam
+    os handlers de forma sincrona nos dois casos.
+    """
+
+    _frame_cache: dict[str, tuple[Any, Any]]
+    _watched_pages: set[int]
+
+    def _remember_frame(self, resolved: str, page: Any, frame: Any) -> None:
+        self._watch_page(page)
+        self._frame_cache[resolved] = (page, frame)
+
+    def _watch_page(self, page: Any) -> None:
+        # Navegacao ou remocao de frame invalida os seletores guardados nele.
+        if id(page) in self._watched_pages or not hasattr(page, "on"):
+            return
+        self._watched_pages.add(id(page))
+        page.on("framenavigated", self._forget_frame)
+        page.on("framedetached", self._forget_frame)
+        page.on("close", self._forget_page)
+
+    def _forget_frame(self, frame: Any) -> None:
+        for resolved, (_page, cached_frame) in list(self._frame_cache.items()):
+            if cached_frame is frame:
+                del self._frame_cache[resolved]
+
+    def _forget_page(self, page: Any) -> None:
+        self._watched_pages.discard(id(page))
+        for resolved, (cached_page, _frame) in list(self._frame_cache.items()):
+            if cached_page is page:
+                del self._frame_cache[resolved]
+
+
+class PortalClientBase(FrameCacheMixin):
+    """Regras sem I/O comuns aos clientes sync e async.
+
+    Planejamento do preenchimento, conferencia do script de fill, registro dos
+    frames do snapshot e montagem das esperas ficam aqui; cada cliente so faz
+    as chamadas ao Playwright (com ou sem await).
+    """
+
+    settings: AppSettings
+    _rules: GlosaRuleTable
+    _page: Any
+    # Token e frames marcados antes do ultimo clique em "proxima guia".
+    _guide_mark: tuple[str, list[tuple[Any, list[dict[str, str]]]]] | None = None
+
+    def _plan_fill(
+        self,
+        valor_glosa: float,
+        justificativa: str,
+        codigo_glosa: str | None,
+        fill_plan: FillPlan | None,
+    ) -> tuple[FillPlan, list[tuple[str, str]]]:
+        # Linhas carregadas com as regras ja trazem o plano; sem ele, classifica aqui.
+        plan = fill_plan or self._rules.plan_for(codigo_glosa)
+        return plan, plan_fill_fields(
+            plan, self.settings.selectors, valor_glosa, justificativa
+        )
+
+    def _fallback_selector(self, plan: FillPlan) -> str | None:
+        if plan.fallback_field is None:
+            return None
+        return getattr(self.settings.selectors, plan.fallback_field)
+
+    def _batch_fill_payload(
+        self, fields: list[tuple[str, str]]
+    ) -> list[dict[str, str]] | None:
+        if not self.settings.batched_fill:
+            return None
+        return fill_payload(fields)
+
+    def _accept_batch_fill(
+        self,
+        result: dict | None,
+        fields: list[tuple[str, str]],
+        payload: list[dict[str, str]],
+        location: tuple[Any, Any],
+    ) -> bool:
+        if not fill_result_matches(result, fields):
+            return False
+        for query in payload:
+            self._remember_frame(query_key(query), *location)
+        self._page = location[0]
+        return True
+
+    def _reads_by_snapshot(self) -> bool:
+        return (
+            self.settings.batched_reads
+            and snapshot_queries(self.settings.selectors) is not None
+        )
+
+    def _preferred_locations(
+        self, fields: dict[str, dict[str, str]]
+    ) -> list[tuple[Any, Any]]:
+        """Frames onde os campos estavam da ultima vez: normalmente uma chamada basta."""
+        preferred = []
+        for query in fields.values():
+            cached = self._frame_cache.get(query_key(query))
+            if cached is not None and cached not in preferred:
+                preferred.append(cached)
+        return preferred
+
+    def _accept_snapshot(
+        self,
+        fields: dict[str, dict[str, str]],
+        values: dict[str, str],
+        locations: dict[str, tuple[Any, Any]],
+    ) -> GuideContext | None:
+        for name, location in locations.items():
+            self._remember_frame(query_key(fields[name]), *location)
+        context = context_from_snapshot(values)
+        if context is None:
+            # Campo ainda nao carregado: o caminho campo a campo espera com timeout.
+            return None
+        self._page = locations["numero_guia"][0]
+        return context
+
+    @staticmethod
+    def _is_new_guide(
+        context: GuideContext | None, previous_key: str, replaced: bool = False
+    ) -> bool:
+        return context is not None and (replaced or context.key != previous_key)
+
+    @staticmethod
+    def _guide_change_timeout(previous_key: str) -> RuntimeError:
+        return RuntimeError(
+            "Portal nao mudou de guia no tempo limite. "
+            f"Chave anterior: {previous_key}"
+        )
+
+    def _guide_mark_targets(self) -> list[tuple[Any, list[dict[str, str]]]]:
+        """Frames em cache com numero_guia/senha e as consultas DOM de cada um."""
+        selectors = self.settings.selectors
+        targets: dict[int, tuple[Any, list[dict[str, str]]]] = {}
+        for selector in (selectors.numero_guia, selectors.senha):
+            query = dom_query(selector)
+            cached = self._frame_cache.get(resolve_selector(selector))
+            if query is not None and cached is not None:
+                targets.setdefault(id(cached[1]), (cached[1], []))[1].append(query)
+        return list(targets.values())
+
+    @staticmethod
+    def _new_guide_token() -> str:
+        return f"amil-glosa-guia:{uuid.uuid4().hex}"
+
+    def _guide_change_wait(
+        self, previous_key: str, remaining: float
+    ) -> tuple[float, Any | None, list | None]:
+        """Fatia de espera, frame da guia e argumentos de GUIDE_CHANGE_SCRIPT.
+
+        Sem frame conhecido (ou seletor fora de xpath/css), frame e argumentos
+        vem como None e o chamador espera o campo aparecer.
+        """
+        selectors = self.settings.selectors
+        wait_seconds = min(remaining, WAIT_SLICE_SECONDS)
+        guia = dom_query(selectors.numero_guia)
+        cached = self._frame_cache.get(resolve_selector(selectors.numero_guia))
+        if guia is None or cached is None:
+            return wait_seconds, None, None
+        frame = cached[1]
+        senha = self._frame_cache.get(resolve_selector(selectors.senha))
+        if senha is None or senha[1] is not frame:
+            # Senha fora do frame da guia: o script so ve o numero. Fatias curtas
+            # fazem a leitura completa (com a senha) rodar a cada poucos ms.
+            wait_seconds = min(wait_seconds, POLL_INTERVAL_SECONDS)
+        token = None
+        if self._guide_mark is not None:
+            mark_token, marked = self._guide_mark
+            if any(item is frame for item, _queries in marked):
+                token = mark_token
+        return wait_seconds, frame, [guia, dom_query(selectors.senha), previous_key, token]
+
+    @staticmethod
+    def _resolve_all(selectors: list[str]) -> list[str]:
+        resolved = [resolve_selector(selector) for selector in selectors]
+        if not all(resolved):
+            raise ValueError("Seletor vazio nao pode ser usado.")
+        return resolved
+
+    def _selector_timeout(self, selectors: list[str]) -> RuntimeError:
+        pages_info = " | ".join(self._describe_pages())
+        return RuntimeError(
+            "Seletor nao encontrado no tempo limite. "
+            f"Seletor: {' | '.join(selectors)} | Paginas/frames: {pages_info}"
+        )
+
+    @staticmethod
+    def _watch_arguments(
+        selectors: list[str], wait_seconds: float
+    ) -> tuple[str, list] | None:
+        """Token e argumentos de WATCH_SCRIPT; None se algum seletor nao vira consulta DOM."""
+        queries = [dom_query(selector) for selector in selectors]
+        if any(query is None for query in queries):
+            return None
+        token = f"amil-glosa:{uuid.uuid4().hex}"
+        return token, [queries, token, int(wait_seconds * 1000)]
+
+    @staticmethod
+    def _is_watch_message(message: Any, token: str) -> bool:
+        return message.text in (token, FRAME_READY_TOKEN)
+
+    def _candidate_pages(self) -> list[Any]:
+        raise NotImplementedError
+
+    def _describe_pages(self) -> list[str]:
+        result = []
+        for page in self._candidate_pages():
+            frame_urls = ", ".join(
+                frame.url for frame in page_frames(page) if getattr(frame, "url", None)
+            )
+            result.append(f"page={getattr(page, 'url', '<sem-url>')};frames=[{frame_urls}]")
+        return result or ["<nenhuma pagina>"]
+
+
+class PortalClient(PortalClientBase):
     def __init__(self, settings: AppSettings):
         self.settings = settings
+        self._rules = GlosaRuleTable.from_settings(settings)
         self._playwright: Playwright | None = None
         self._browser: Browser | None = None
         self._context: BrowserContext | None = None
         self._page: Page | None = None
+        # Seletor resolvido -> (pagina, frame) onde foi encontrado da ultima vez.
+        self._frame_cache: dict[str, tuple[Page, Frame]] = {}
+        self._watched_pages: set[int] = set()
 
     @property
     def page(self) -> Page:
@@ -106,6 +486,11 @@ class PortalClient:
             self._context = contexts[0]
         else:
             self._context = self._browser.new_context()
+        self._context.on("page", self._watch_page)
+        try:
+            self._context.add_init_script(FRAME_READY_SCRIPT)
+        except Exception:
+            pass
 
         if self._context.pages:
             self._page = self._context.pages[-1]
@@ -119,18 +504,19 @@ class PortalClient:
             self._browser = None
             self._context = None
             self._page = None
+        self._frame_cache.clear()
+        self._watched_pages.clear()
 
     def get_total_guides(self) -> int:
-        raw = self._read_text_or_value(self.settings.selectors.total_guias)
-        matches = [int(value) for value in re.findall(r"\d+", raw)]
-        if not matches:
-            raise RuntimeError(
-                "Nao foi possivel identificar o total de guias no portal. "
-                f"Valor capturado: {raw!r}"
-            )
-        return matches[-1]
+        return parse_total_guides(
+            self._read_text_or_value(self.settings.selectors.total_guias)
+        )
 
     def read_current_context(self) -> GuideContext:
+        if self.settings.batched_reads:
+            context = self._read_context_snapshot()
+            if context is not None:
+                return context
         selectors = self.settings.selectors
         return GuideContext(
             numero_guia=self._read_text_or_value(selectors.numero_guia),
@@ -139,43 +525,153 @@ class PortalClient:
             protocolo=self._read_optional_text_or_value(selectors.protocolo),
         )
 
+    def wait_for_guide_change(
+        self, previous_key: str, timeout_ms: float | None = None
+    ) -> GuideContext:
+        """Espera a tela mostrar outra guia depois do clique em "proxima guia".
+
+        Vale uma chave guia|senha diferente de `previous_key` ou, para guias
+        seguidas com a mesma chave, a perda da marca posta antes do clique
+        (documento novo ou campos recriados). Retorna o contexto da nova guia
+        assim que ele aparece, sem atraso fixo.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.settings.timeout_ms
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            # A marca e conferida antes da leitura: perdida, a leitura ja e da nova tela.
+            replaced = self._guide_mark_lost()
+            context = self._try_read_context()
+            if self._is_new_guide(context, previous_key, replaced):
+                self._guide_mark = None
+                return context
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._guide_change_timeout(previous_key)
+            self._wait_for_context_change(previous_key, remaining)
+
     def fill_current_guide(
         self,
         valor_glosa: float,
         justificativa: str,
         codigo_glosa: str | None = None,
+        fill_plan: FillPlan | None = None,
     ) -> None:
-        selectors = self.settings.selectors
-        if requires_secondary_justificativa(codigo_glosa):
-            self._fill(selectors.justificativa_3052, justificativa)
-            return
-
-        try:
-            self._fill(selectors.justificativa, justificativa)
-        except Exception:
-            self._fill(selectors.justificativa_3052, justificativa)
+        plan, fields = self._plan_fill(valor_glosa, justificativa, codigo_glosa, fill_plan)
+        target = fields[0][0]
+        if self._fill_batch(fields):
             return
 
-        valor_text = f"{valor_glosa:.2f}".replace(".", ",")
-        self._fill(selectors.valor_glosa, valor_text)
+        fallback = self._fallback_selector(plan)
+        if fallback is None:
+            self._fill(target, justificativa)
+        else:
+            # Os dois campos de justificativa sao esperados juntos: guias que so
+            # tem o secundario nao pagam o timeout inteiro do principal.
+            available = self._first_available([target, fallback])
+            if available == target:
+                try:
+                    self._fill(target, justificativa)
+                except Exception:
+                    available = fallback
+            if available != target:
+                self._fill(fallback, justificativa)
+                return
+
+        for selector, value in fields[1:]:
+            self._fill(selector, value)
 
     def click_next_guide(self) -> None:
         locator = self._find_locator(self.settings.selectors.proxima_guia)
-        locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
-        locator.click(timeout=self.settings.timeout_ms)
-        self.page.wait_for_load_state("domcontentloaded", timeout=self.settings.timeout_ms)
+        self._mark_current_guide()
+        with span("cdp.click"):
+            locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
+            locator.click(timeout=self.settings.timeout_ms)
+        with span("cdp.wait_for_load_state"):
+            self.page.wait_for_load_state(
+                "domcontentloaded", timeout=self.settings.timeout_ms
+            )
+
+    def open_url(self, url: str) -> None:
+        if self.page.url == url:
+            return
+        # O evento framenavigated limpa o cache de frames desta aba.
+        with span("cdp.goto"):
+            self.page.goto(
+                url, wait_until="domcontentloaded", timeout=self.settings.timeout_ms
+            )
 
     def capture_screenshot(self, output_path: Path) -> Path:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        self.page.screenshot(path=str(output_path), full_page=True)
+        with span("cdp.screenshot"):
+            self.page.screenshot(path=str(output_path), full_page=True)
         return output_path
 
+    def _mark_current_guide(self) -> None:
+        """Marca a guia na tela para reconhecer a troca mesmo com chave repetida."""
+        token = self._new_guide_token()
+        marked = []
+        for frame, queries in self._guide_mark_targets():
+            try:
+                with span("cdp.evaluate", script="mark"):
+                    frame.evaluate(MARK_GUIDE_SCRIPT, [queries, token])
+            except Exception:
+                continue
+            marked.append((frame, queries))
+        self._guide_mark = (token, marked) if marked else None
+
+    def _guide_mark_lost(self) -> bool:
+        if self._guide_mark is None:
+            return False
+        token, marked = self._guide_mark
+        for frame, queries in marked:
+            try:
+                with span("cdp.evaluate", script="mark_lost"):
+                    if frame.evaluate(GUIDE_MARK_LOST_SCRIPT, [queries, token]):
+                        return True
+            except Exception:
+                # Frame removido ou contexto destruido por navegacao: o documento
+                # marcado nao existe mais.
+                return True
+        return False
+
+    def _first_available(self, selectors: list[str]) -> str:
+        return self._find_first_locator(selectors)[0]
+
     def _fill(self, selector: str, value: str) -> None:
         locator = self._find_locator(selector)
-        locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
-        locator.fill(value, timeout=self.settings.timeout_ms)
+        with span("cdp.fill", selector=selector):
+            locator.wait_for(state="visible", timeout=self.settings.timeout_ms)
+            locator.fill(value, timeout=self.settings.timeout_ms)
+
+    def _fill_batch(self, fields: list[tuple[str, str]]) -> bool:
+        """Preenche e confere os campos numa unica chamada `evaluate`.
+
+        So funciona com todos os campos no mesmo frame, ja presentes. Retorna
+        False (sem levantar erro) para o chamador seguir com `_fill` campo a campo.
+        """
+        payload = self._batch_fill_payload(fields)
+        if payload is None:
+            return False
+        first = query_key(payload[0])
+        try:
+            location = self._frame_cache.get(first)
+            if location is None:
+                _locator, page, frame = locate_in_pages(self._candidate_pages(), first)
+                if frame is None:
+                    return False
+                location = (page, frame)
+            with span("cdp.evaluate", script="fill"):
+                result = location[1].evaluate(FILL_SCRIPT, payload)
+        except Exception:
+            return False
+        return self._accept_batch_fill(result, fields, payload, location)
 
     def _read_text_or_value(self, selector: str) -> str:
+        with span("cdp.read", selector=selector):
+            return self._read_locator(selector)
+
+    def _read_locator(self, selector: str) -> str:
         locator = self._find_locator(selector)
         locator.wait_for(state="attached", timeout=self.settings.timeout_ms)
 
@@ -190,6 +686,15 @@ class PortalClient:
             raise RuntimeError(f"Campo do portal sem valor para seletor: {selector}")
         return text
 
+    def _read_context_snapshot(self) -> GuideContext | None:
+        fields = snapshot_queries(self.settings.selectors)
+        if fields is None:
+            return None
+        values, locations = snapshot_pages(
+            self._candidate_pages(), fields, self._preferred_locations(fields)
+        )
+        return self._accept_snapshot(fields, values, locations)
+
     def _read_optional_text_or_value(self, selector: str) -> str:
         if not str(selector or "").strip():
             return ""
@@ -205,42 +710,129 @@ class PortalClient:
         return self.page.locator(resolved)
 
     def _find_locator(self, selector: str) -> Locator:
-        resolved = resolve_selector(selector)
-        if not resolved:
-            raise ValueError("Seletor vazio nao pode ser usado.")
-
-        timeout_seconds = self.settings.timeout_ms / 1000
-        deadline = time.monotonic() + timeout_seconds
-        while time.monotonic() < deadline:
-            pages = self._candidate_pages()
-            locator, selected_page = find_locator_in_pages(pages, resolved)
+        return self._find_first_locator([selector])[1]
+
+    def _find_first_locator(self, selectors: list[str]) -> tuple[str, Locator]:
+        """Espera o primeiro dos seletores aparecer, todos ao mesmo tempo.
+
+        A ordem da lista desempata quando mais de um ja esta na tela.
+        """
+        resolved = self._resolve_all(selectors)
+        deadline = time.monotonic() + self.settings.timeout_ms / 1000
+        while True:
+            found = self._locate_first(selectors, resolved)
+            if found is not None:
+                return found
+            if time.monotonic() >= deadline:
+                raise self._selector_timeout(selectors)
+            self._wait_for_dom_change(selectors, deadline)
+
+    def _locate_first(
+        self, selectors: list[str], resolved: list[str]
+    ) -> tuple[str, Locator] | None:
+        """Primeiro seletor, na ordem da lista, presente em algum frame.
+
+        O cache so encurta a busca de cada seletor: um seletor mais abaixo na
+        lista, mesmo em cache, so vale depois de os de cima serem procurados.
+        """
+        pages = None
+        for selector, item in zip(selectors, resolved):
+            cached = self._frame_cache.get(item)
+            if cached is not None:
+                locator = find_locator_in_frame(cached[1], item)
+                if locator is not None:
+                    self._page = cached[0]
+                    return selector, locator
+                self._frame_cache.pop(item, None)
+            if pages is None:
+                pages = self._candidate_pages()
+            locator, selected_page, frame = locate_in_pages(pages, item)
             if locator is not None and selected_page is not None:
                 self._page = selected_page
-                return locator
-            time.sleep(0.2)
+                self._remember_frame(item, selected_page, frame)
+                return selector, locator
+        return None
+
+    def _try_read_context(self) -> GuideContext | None:
+        if self._reads_by_snapshot():
+            # Sem o caminho campo a campo: ele bloquearia ate timeout_ms.
+            return self._read_context_snapshot()
+        try:
+            return self.read_current_context()
+        except Exception:
+            return None
 
-        pages_info = " | ".join(self._describe_pages())
-        raise RuntimeError(
-            "Seletor nao encontrado no tempo limite. "
-            f"Seletor: {selector} | Paginas/frames: {pages_info}"
-        )
+    def _wait_for_context_change(self, previous_key: str, remaining: float) -> None:
+        wait_seconds, frame, arguments = self._guide_change_wait(previous_key, remaining)
+        if frame is None:
+            # Frame ainda desconhecido (ou navegou): espera o campo aparecer.
+            self._wait_for_dom_change(
+                [self.settings.selectors.numero_guia], time.monotonic() + wait_seconds
+            )
+            return
+        try:
+            with span("cdp.wait_for_function"):
+                frame.wait_for_function(
+                    GUIDE_CHANGE_SCRIPT,
+                    arg=arguments,
+                    timeout=wait_seconds * 1000,
+                    polling=GUIDE_CHANGE_POLL_MS,
+                )
+        except Exception:
+            # Timeout da fatia ou frame navegou no meio da espera: le de novo.
+            pass
+
+    def _wait_for_dom_change(self, selectors: list[str], deadline: float) -> None:
+        """Espera algum dos seletores surgir em algum frame (ou um documento novo).
+
+        Cada frame recebe um MutationObserver que escreve um token no console;
+        a espera termina no primeiro aviso, sem intervalo fixo de polling.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        wait_seconds = min(remaining, WAIT_SLICE_SECONDS)
+        watch = self._watch_arguments(selectors, wait_seconds)
+        expect_event = getattr(self._context, "expect_event", None)
+        if watch is None or not callable(expect_event):
+            time.sleep(min(wait_seconds, POLL_INTERVAL_SECONDS))
+            return
+
+        token, arguments = watch
+        armed = present = False
+        try:
+            # A escuta do console comeca antes dos evaluate: um aviso disparado
+            # enquanto os outros frames sao armados nao se perde.
+            with span("cdp.wait_console"), expect_event(
+                "console",
+                predicate=lambda message: self._is_watch_message(message, token),
+                timeout=wait_seconds * 1000,
+            ):
+                for page in self._candidate_pages():
+                    for frame in page_frames(page):
+                        try:
+                            with span("cdp.evaluate", script="watch"):
+                                present = bool(frame.evaluate(WATCH_SCRIPT, arguments))
+                        except Exception:
+                            continue
+                        if present:
+                            raise _StopWaiting
+                        armed = True
+                if not armed:
+                    raise _StopWaiting
+        except _StopWaiting:
+            # Sair do bloco com excecao cancela a escuta do console.
+            if not present:
+                time.sleep(min(wait_seconds, POLL_INTERVAL_SECONDS))
+        except Exception:
+            # Timeout da fatia: a proxima varredura confere todos os frames de novo.
+            pass
 
     def _candidate_pages(self) -> list[Page]:
         if self._context and self._context.pages:
             return list(self._context.pages)
         return [self.page]
 
-    def _describe_pages(self) -> list[str]:
-        result = []
-        for page in self._candidate_pages():
-            frames = list(getattr(page, "frames", []) or [])
-            frame_urls = ", ".join(
-                frame.url for frame in frames if getattr(frame, "url", None)
-            )
-            page_url = getattr(page, "url", "<sem-url>")
-            result.append(f"page={page_url};frames=[{frame_urls}]")
-        return result or ["<nenhuma pagina>"]
-
     @staticmethod
     def _safe_input_value(locator: Any) -> str | None:
         try:
@@ -0,0 +1,212 @@
+"""Scripts executados dentro das paginas do portal via `evaluate`."""
+
+FRAME_READY_TOKEN = "amil-glosa:frame-ready"
+
+# Le varios campos do documento do frame numa unica chamada, com a mesma ordem
+# de tentativa de _read_text_or_value: value, innerText e textContent.
+SNAPSHOT_SCRIPT = """
+(fields) => {
+  const result = {};
+  for (const [name, query] of Object.entries(fields)) {
+    let node = null;
+    try {
+      node = query.kind === "xpath"
+        ? document.evaluate(query.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(query.selector);
+    } catch (error) {
+      node = null;
+    }
+    if (!node) {
+      continue;
+    }
+    let text = typeof node.value === "string" ? node.value.trim() : "";
+    if (!text) {
+      text = (node.innerText || "").trim();
+    }
+    if (!text) {
+      text = (node.textContent || "").trim();
+    }
+    result[name] = text;
+  }
+  return result;
+}
+"""
+
+
+# Avisa pelo console quando algum dos seletores aparece no documento do frame.
+# Retorna true se um deles ja existe; o observador se desliga apos timeoutMs.
+WATCH_SCRIPT = """
+([queries, token, timeoutMs]) => {
+  const found = () => queries.some((query) => {
+    try {
+      return query.kind === "xpath"
+        ? document.evaluate(query.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(query.selector);
+    } catch (error) {
+      return null;
+    }
+  });
+  if (found()) {
+    return true;
+  }
+  const observer = new MutationObserver(() => {
+    if (found()) {
+      observer.disconnect();
+      clearTimeout(timer);
+      console.debug(token);
+    }
+  });
+  const timer = setTimeout(() => observer.disconnect(), timeoutMs);
+  observer.observe(document, { childList: true, subtree: true, attributes: true });
+  return false;
+}
+"""
+
+# Marca o documento do frame e os nos dos campos da guia antes do clique em
+# "proxima guia". Sem a marca depois (documento novo ou no recriado), a tela
+# mudou mesmo que a chave seja igual a anterior.
+MARK_GUIDE_SCRIPT = """
+([queries, token]) => {
+  window.__amilGlosaGuide = token;
+  for (const query of queries) {
+    let node = null;
+    try {
+      node = query.kind === "xpath"
+        ? document.evaluate(query.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(query.selector);
+    } catch (error) {
+      node = null;
+    }
+    if (node) {
+      node.__amilGlosaGuide = token;
+    }
+  }
+}
+"""
+
+# Verdadeiro quando a marca de MARK_GUIDE_SCRIPT sumiu do documento ou de um
+# campo presente. Campo ausente ainda esta carregando e nao conta.
+GUIDE_MARK_LOST_SCRIPT = """
+([queries, token]) => {
+  if (window.__amilGlosaGuide !== token) {
+    return true;
+  }
+  return queries.some((query) => {
+    let node = null;
+    try {
+      node = query.kind === "xpath"
+        ? document.evaluate(query.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(query.selector);
+    } catch (error) {
+      node = null;
+    }
+    return Boolean(node) && node.__amilGlosaGuide !== token;
+  });
+}
+"""
+
+# Verdadeiro quando o frame mostra outra guia: chave diferente ou, com `token`,
+# marca de MARK_GUIDE_SCRIPT perdida (mesma chave em guias seguidas). Senha em
+# outro frame: compara so o numero aqui; senha ainda vazia conta como carregando.
+GUIDE_CHANGE_SCRIPT = """
+([guia, senha, previousKey, token]) => {
+  const find = (query) => {
+    if (!query) {
+      return null;
+    }
+    try {
+      return query.kind === "xpath"
+        ? document.evaluate(query.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(query.selector);
+    } catch (error) {
+      return null;
+    }
+  };
+  const read = (node) => {
+    if (!node) {
+      return null;
+    }
+    let text = typeof node.value === "string" ? node.value.trim() : "";
+    if (!text) {
+      text = (node.innerText || "").trim();
+    }
+    if (!text) {
+      text = (node.textContent || "").trim();
+    }
+    return text;
+  };
+  const guiaNode = find(guia);
+  const senhaNode = find(senha);
+  const numero = read(guiaNode);
+  if (!numero) {
+    return false;
+  }
+  const senhaText = read(senhaNode);
+  if (senhaText === "") {
+    return false;
+  }
+  const replaced = Boolean(token) && (
+    window.__amilGlosaGuide !== token
+    || [guiaNode, senhaNode].some((node) => node && node.__amilGlosaGuide !== token)
+  );
+  if (senhaText === null) {
+    return replaced || numero !== previousKey.split("|")[0];
+  }
+  return replaced || `${numero}|${senhaText}` !== previousKey;
+}
+"""
+
+# Documentos novos (navegacao, iframe carregado) nao tem observador; este aviso
+# acorda a espera para uma nova varredura.
+FRAME_READY_SCRIPT = f"""
+document.addEventListener("DOMContentLoaded", () => console.debug("{FRAME_READY_TOKEN}"));
+"""
+
+# Preenche todos os campos de uma vez, com os eventos que a validacao do portal
+# escuta, e devolve o valor lido de volta. Nada e alterado se algum campo nao
+# estiver visivel e editavel.
+FILL_SCRIPT = """
+(fields) => {
+  const nodes = [];
+  for (const field of fields) {
+    let node = null;
+    try {
+      node = field.kind === "xpath"
+        ? document.evaluate(field.selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(field.selector);
+    } catch (error) {
+      node = null;
+    }
+    const visible = node && (node.offsetWidth || node.offsetHeight || node.getClientRects().length);
+    if (!visible || node.disabled || node.readOnly || typeof node.value !== "string") {
+      return { ok: false, values: [] };
+    }
+    nodes.push(node);
+  }
+  const values = nodes.map((node, position) => {
+    const descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(node), "value");
+    node.focus();
+    // Setter nativo: frameworks que interceptam `value` tambem veem a mudanca.
+    if (descriptor && descriptor.set) {
+      descriptor.set.call(node, fields[position].value);
+    } else {
+      node.value = fields[position].value;
+    }
+    node.dispatchEvent(new Event("input", { bubbles: true }));
+    node.dispatchEvent(new Event("change", { bubbles: true }));
+    if (document.activeElement === node) {
+      node.blur();
+    } else {
+      node.dispatchEvent(new FocusEvent("blur"));
+    }
+    return node.value;
+  });
+  return { ok: true, values };
+}
+"""
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections import Counter
+import cProfile
+from datetime import datetime
+from pathlib import Path
+import sys
+import threading
+from types import FrameType
+from typing import Callable
+
+from app.config import AppSettings
+from app.portal_client import PortalClient
+
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def frame_stack(frame: FrameType | None) -> str:
+    """Pilha no formato "collapsed" (raiz;...;folha), como usam os flamegraphs."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def write_collapsed_stacks(stacks: Counter[str], target: Path) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    target.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+    return target
+
+
+class StackSampler:
+    """Amostra, numa thread propria, a pilha de outra thread a cada `interval`."""
+
+    def __init__(
+        self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL_SECONDS
+    ) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[frame_stack(frame)] += 1
+
+
+class RunProfiler:
+    """Perfila a thread atual: cProfile (.prof) e pilhas amostradas (.folded).
+
+    Os arquivos vao para `output_dir` como perfil-<data>.prof/.folded; abra o
+    .prof com `python -m pstats` ou snakeviz e o .folded com flamegraph.pl ou
+    speedscope. Fora do `with`, nada e medido.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        interval: float = DEFAULT_SAMPLE_INTERVAL_SECONDS,
+        stamp: str | None = None,
+    ) -> None:
+        stamp = stamp or datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.profile_path = output_dir / f"perfil-{stamp}.prof"
+        self.stacks_path = output_dir / f"perfil-{stamp}.folded"
+        self.interval = interval
+        self._profile = cProfile.Profile()
+        self._sampler: StackSampler | None = None
+
+    @property
+    def files(self) -> list[Path]:
+        return [self.profile_path, self.stacks_path]
+
+    def __enter__(self) -> RunProfiler:
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._profile.disable()
+        assert self._sampler is not None
+        self._sampler.stop()
+        self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+        self._profile.dump_stats(str(self.profile_path))
+        write_collapsed_stacks(self._sampler.stacks, self.stacks_path)
+
+
+class TracedPortalClient(PortalClient):
+    """PortalClient que grava um trace do Playwright (abrir com `playwright show-trace`)."""
+
+    def __init__(self, settings: AppSettings, trace_path: Path) -> None:
+        super().__init__(settings)
+        self.trace_path = trace_path
+        self._tracing = False
+
+    def connect(self) -> None:
+        super().connect()
+        assert self._context is not None
+        self._context.tracing.start(screenshots=True, snapshots=True, sources=False)
+        self._tracing = True
+
+    def close(self) -> None:
+        try:
+            if self._tracing and self._context is not None:
+                self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                self._context.tracing.stop(path=str(self.trace_path))
+        finally:
+            self._tracing = False
+            super().close()
+
+
+def traced_client_factory(trace_path: Path) -> Callable[[AppSettings], PortalClient]:
+    return lambda settings: TracedPortalClient(settings, trace_path)
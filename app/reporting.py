@@ -3,9 +3,18 @@ from __future__ import annotations
 import csv
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping
 
-from app.models import GuideStatusRecord
+from app.metrics import GUIDE_PHASES, SUMMARY_PERCENTILES
+from app.models import GuideStatusRecord, SpreadsheetIssue
+
+PHASE_LABELS = {
+    "read": "leitura",
+    "fill": "preenchimento",
+    "next": "proxima",
+    "wait": "espera",
+    "screenshot": "screenshot",
+}
 
 
 def export_status_report(
@@ -30,6 +39,7 @@ def export_status_report(
                 "senha",
                 "status",
                 "mensagem",
+                *(f"tempo_{PHASE_LABELS[name]}_s" for name in GUIDE_PHASES),
             ]
         )
         for item in records:
@@ -42,15 +52,72 @@ def export_status_report(
                     item.senha,
                     item.status,
                     item.message,
+                    *(_seconds(item.timings.get(name)) for name in GUIDE_PHASES),
                 ]
             )
 
     return target
 
 
+def export_validation_report(
+    issues: Iterable[SpreadsheetIssue],
+    output_dir: Path,
+    source_name: str | None = None,
+) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    source = _safe_name(source_name, "planilha")
+    target = output_dir / f"validacao-{source}-{stamp}.csv"
+
+    with target.open("w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(["linha", "coluna", "motivo", "valor"])
+        for item in issues:
+            writer.writerow(
+                [
+                    item.line_number,
+                    item.column,
+                    item.reason,
+                    "" if item.value is None else item.value,
+                ]
+            )
+
+    return target
+
+
+def export_phase_report(
+    phases: Mapping[str, Mapping[str, float]],
+    output_dir: Path,
+    lot_id: str | None = None,
+) -> Path:
+    """Percentis de tempo por fase da guia (segundos), ao lado do relatorio."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    target = output_dir / f"relatorio-fases-{_safe_lot(lot_id)}-{stamp}.csv"
+    quantiles = [f"p{q:g}" for q in SUMMARY_PERCENTILES]
+
+    with target.open("w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(["fase", *(f"{name}_s" for name in quantiles)])
+        for name, values in phases.items():
+            writer.writerow(
+                [PHASE_LABELS.get(name, name), *(values.get(q, "") for q in quantiles)]
+            )
+
+    return target
+
+
+def _seconds(value: float | None) -> str:
+    return "" if value is None else f"{value:.3f}"
+
+
 def _safe_lot(lot_id: str | None) -> str:
-    if not lot_id:
-        return "sem-lote"
-    safe = "".join(ch if ch.isalnum() or ch in {"-", "_"} else "_" for ch in lot_id)
-    return safe.strip("_") or "sem-lote"
+    return _safe_name(lot_id, "sem-lote")
+
+
+def _safe_name(value: str | None, fallback: str) -> str:
+    if not value:
+        return fallback
+    safe = "".join(ch if ch.isalnum() or ch in {"-", "_"} else "_" for ch in value)
+    return safe.strip("_") or fallback
 
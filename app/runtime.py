@@ -1,16 +1,42 @@
 from __future__ import annotations
 
-from typing import Callable, Dict
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+import multiprocessing
+from pathlib import Path
+import queue
+import threading
+from typing import Callable, Mapping, Sequence
 
+from app.async_orchestrator import AsyncAutomationOrchestrator
+from app.async_portal_client import AsyncPortalClient
+from app.chrome_launcher import is_debug_port_open
+from app.chrome_pool import (
+    DEFAULT_POOL_DIR,
+    DEFAULT_TEMPLATE_PROFILE,
+    ChromePool,
+    PoolJob,
+    current_tab_url,
+    plan_pool_jobs,
+)
+from app.concurrency import AimdGovernor
 from app.config import AppSettings
+from app.glosa_rules import GlosaRuleTable
 from app.models import GuideStatusRecord, SpreadsheetRow
 from app.orchestrator import AutomationOrchestrator, OrchestratorConfig
+from app.parallel import (
+    OrchestratorGroup,
+    RemoteWorker,
+    prefixed_log,
+    split_guide_ranges,
+)
 from app.portal_client import PortalClient
 
 
 def run_automation_job(
     settings: AppSettings | None,
-    spreadsheet_index: Dict[str, SpreadsheetRow],
+    spreadsheet_index: Mapping[str, SpreadsheetRow],
     on_log: Callable[[str], None],
     on_status: Callable[[GuideStatusRecord], None],
     config: OrchestratorConfig | None = None,
@@ -41,3 +67,354 @@ def run_automation_job(
         close = getattr(portal_client, "close", None)
         if callable(close):
             close()
+
+
+async def run_automation_job_async(
+    settings: AppSettings | None,
+    spreadsheet_index: Mapping[str, SpreadsheetRow],
+    on_log: Callable[[str], None],
+    on_status: Callable[[GuideStatusRecord], None],
+    config: OrchestratorConfig | None = None,
+    on_ready: Callable[[AutomationOrchestrator], None] | None = None,
+    portal_client_factory=AsyncPortalClient,
+) -> AsyncAutomationOrchestrator:
+    portal_client = portal_client_factory(settings)
+
+    try:
+        await portal_client.connect()
+        on_log(
+            "Conexao com o Chrome estabelecida (modo assincrono). "
+            "Confirme que a aba atual esta no lote desejado."
+        )
+        orchestrator = AsyncAutomationOrchestrator(
+            portal_client=portal_client,
+            spreadsheet_index=spreadsheet_index,
+            config=config or OrchestratorConfig(),
+            on_log=on_log,
+            on_status=on_status,
+        )
+        if on_ready:
+            on_ready(orchestrator)
+        await orchestrator.run_async()
+        return orchestrator
+    finally:
+        close = getattr(portal_client, "close", None)
+        if callable(close):
+            await close()
+
+
+async def run_parallel_job_async(
+    settings: AppSettings,
+    spreadsheet_index: Mapping[str, SpreadsheetRow],
+    on_log: Callable[[str], None],
+    on_status: Callable[[GuideStatusRecord], None],
+    config: OrchestratorConfig | None = None,
+    on_ready: Callable[[OrchestratorGroup], None] | None = None,
+    portal_client_factory=AsyncPortalClient,
+    tabs: int | None = None,
+) -> OrchestratorGroup:
+    """Processa o lote em varias abas do mesmo Chrome, cada uma numa faixa de guias.
+
+    A aba atual fica com a primeira faixa; as demais abrem a mesma URL e avancam
+    ate a sua primeira guia. Planilha e fila de status sao compartilhadas.
+    """
+    config = config or OrchestratorConfig()
+    portal_client = portal_client_factory(settings)
+    opened_pages = []
+
+    try:
+        await portal_client.connect()
+        total = await portal_client.get_total_guides()
+        ranges = split_guide_ranges(total, tabs or settings.parallel_tabs)
+        lote_page = portal_client.page
+        browser_context = lote_page.context
+        on_log(
+            "Conexao com o Chrome estabelecida. "
+            f"Lote de {total} guias dividido em {len(ranges)} abas."
+        )
+
+        governor = None
+        if settings.adaptive_concurrency:
+            governor = AimdGovernor(
+                max_limit=len(ranges),
+                target_latency_seconds=settings.target_guide_latency_seconds,
+            )
+        workers = []
+        for number, (start, end) in enumerate(ranges, start=1):
+            if number == 1:
+                page = lote_page
+            else:
+                page = await browser_context.new_page()
+                opened_pages.append(page)
+                await page.goto(
+                    lote_page.url,
+                    wait_until="domcontentloaded",
+                    timeout=settings.timeout_ms,
+                )
+            tab_client = portal_client_factory(settings)
+            await tab_client.attach(browser_context, page)
+            worker_log = prefixed_log(on_log, f"[Aba {number}]")
+            worker_log(f"Faixa de guias: {start + 1} a {end}.")
+            workers.append(
+                AsyncAutomationOrchestrator(
+                    portal_client=tab_client,
+                    spreadsheet_index=spreadsheet_index,
+                    config=replace(config, start_guide=start, end_guide=end),
+                    on_log=worker_log,
+                    on_status=on_status,
+                    governor=governor,
+                )
+            )
+
+        group = OrchestratorGroup(workers, governor)
+        if on_ready:
+            on_ready(group)
+        await asyncio.gather(*(worker.run_async() for worker in workers))
+        return group
+    finally:
+        for page in opened_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        close = getattr(portal_client, "close", None)
+        if callable(close):
+            await close()
+
+
+def run_pool_job(
+    settings: AppSettings,
+    spreadsheet_index: Mapping[str, SpreadsheetRow],
+    on_log: Callable[[str], None],
+    on_status: Callable[[GuideStatusRecord], None],
+    config: OrchestratorConfig | None = None,
+    on_ready: Callable[[OrchestratorGroup], None] | None = None,
+    template_profile: Path | None = None,
+    pool_dir: Path | None = None,
+    lote_urls: Sequence[str] | None = None,
+) -> OrchestratorGroup:
+    """Processa lotes (ou faixas de um lote) em varias instancias do Chrome.
+
+    Cada instancia e atendida por um processo com o robo sync; logs e status
+    voltam por uma fila e os comandos da interface seguem por outra, por
+    processo. As instancias copiam o perfil do Chrome principal, que precisa
+    estar fechado: sem `lote_urls`, a URL do lote e lida dele antes (a
+    interface le a URL e pede para fechar o Chrome antes de chamar aqui).
+    """
+    config = config or OrchestratorConfig()
+    lote_urls = list(lote_urls or settings.pool_lote_urls)
+    if not lote_urls:
+        lote_urls = [current_tab_url(settings.debug_port)]
+    if is_debug_port_open(settings.debug_port):
+        raise RuntimeError(
+            f"Feche o Chrome principal (porta {settings.debug_port}) antes de iniciar: "
+            "o perfil dele e copiado para as instancias do pool."
+        )
+    job_plan = plan_pool_jobs(lote_urls, settings.chrome_pool_size)
+    pool = ChromePool(
+        template_profile=template_profile or DEFAULT_TEMPLATE_PROFILE,
+        pool_dir=pool_dir or DEFAULT_POOL_DIR,
+        size=len(job_plan),
+        base_port=settings.debug_port,
+        chrome_binary=settings.chrome_binary,
+    )
+
+    try:
+        instances = pool.launch(start_url=lote_urls[0])
+        on_log(
+            f"Pool com {len(instances)} instancias do Chrome "
+            f"(portas {instances[0].port} a {instances[-1].port})."
+        )
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(
+            max_workers=len(instances)
+        ) as executor:
+            events = manager.Queue()
+            workers = [
+                RemoteWorker(manager.Queue(), f"[Chrome {instance.port}]")
+                for instance in instances
+            ]
+            group = OrchestratorGroup(workers)
+            if on_ready:
+                on_ready(group)
+
+            for number, (instance, jobs) in enumerate(zip(instances, job_plan)):
+                future = executor.submit(
+                    run_pool_worker,
+                    replace(settings, debug_port=instance.port),
+                    spreadsheet_index,
+                    config,
+                    jobs,
+                    events,
+                    workers[number].commands,
+                    number,
+                )
+                # O fim do processo tambem chega pela fila: a leitura nao precisa de timeout.
+                future.add_done_callback(
+                    lambda done, number=number: events.put(
+                        ("exit", number, _future_error(done))
+                    )
+                )
+
+            running = len(workers)
+            while running:
+                kind, number, payload = events.get()
+                worker = workers[number]
+                if kind == "log":
+                    on_log(f"{worker.label} {payload}")
+                elif kind == "status":
+                    on_status(payload)
+                elif kind == "summary":
+                    worker.update(payload)
+                elif kind == "exit":
+                    running -= 1
+                    if payload is not None:
+                        on_log(f"{worker.label} Erro critico: {payload}")
+        return group
+    finally:
+        pool.close()
+
+
+def _future_error(future) -> str | None:
+    error = future.exception()
+    return None if error is None else str(error)
+
+
+POOL_COMMANDS = {"pause", "resume", "skip_current_guide", "stop"}
+COMMAND_POLL_SECONDS = 0.1
+
+
+def run_pool_worker(
+    settings: AppSettings,
+    spreadsheet_index: Mapping[str, SpreadsheetRow],
+    config: OrchestratorConfig,
+    jobs: Sequence[PoolJob],
+    events,
+    commands,
+    number: int,
+    portal_client_factory=PortalClient,
+) -> dict[str, int | str]:
+    """Executa, num processo do pool, os trabalhos de uma instancia do Chrome."""
+    apply_rules = getattr(spreadsheet_index, "apply_rules", None)
+    if callable(apply_rules):
+        # O indice SQLite chega reaberto, sem as regras.
+        apply_rules(GlosaRuleTable.from_settings(settings))
+
+    totals = {"processed": 0, "successes": 0, "errors": 0}
+    # `current` e compartilhado com a thread que le os comandos, sempre com `lock`.
+    lock = threading.Lock()
+    current: list[AutomationOrchestrator] = []
+    stopped = threading.Event()
+    # Pausa pedida fora de uma execucao (entre lotes ou antes de run() comecar):
+    # o proximo lote so comeca depois do resume.
+    released = threading.Event()
+    released.set()
+
+    def summary() -> dict[str, int | str]:
+        result: dict[str, int | str] = dict(
+            totals, state="RUNNING" if released.is_set() else "PAUSADO"
+        )
+        with lock:
+            running_orchestrator = current[-1] if current else None
+        if running_orchestrator is not None:
+            running = running_orchestrator.summary()
+            result["state"] = running["state"]
+            for name in totals:
+                result[name] += running[name]
+        return result
+
+    def report() -> None:
+        events.put(("summary", number, summary()))
+
+    def on_status(record: GuideStatusRecord) -> None:
+        events.put(("status", number, record))
+        report()
+
+    def apply(command: str) -> bool:
+        # Chamada com `lock`; devolve True se o estado mudou.
+        orchestrator = current[-1] if current else None
+        if command:
+            if command not in POOL_COMMANDS:
+                raise ValueError(f"Comando desconhecido: {command}")
+            if command == "stop":
+                stopped.set()
+                released.set()
+                if orchestrator is not None:
+                    orchestrator.stop()
+                return True
+            if orchestrator is not None and orchestrator.state in ("RUNNING", "PAUSADO"):
+                getattr(orchestrator, command)()
+            elif command == "pause":
+                released.clear()
+            else:
+                released.set()
+            return True
+        # Pausa que chegou antes de run() sair de IDLE passa para a execucao.
+        if (
+            orchestrator is not None
+            and orchestrator.state == "RUNNING"
+            and not released.is_set()
+        ):
+            orchestrator.pause()
+            released.set()
+            return True
+        return False
+
+    def listen() -> None:
+        while True:
+            try:
+                command = commands.get(timeout=COMMAND_POLL_SECONDS)
+            except queue.Empty:
+                command = ""
+            if command is None:
+                return
+            try:
+                with lock:
+                    changed = apply(command)
+                if changed:
+                    report()
+            except Exception as exc:
+                events.put(("log", number, f"Falha ao aplicar o comando {command}: {exc}"))
+
+    listener = threading.Thread(target=listen, daemon=True)
+    listener.start()
+    portal_client = portal_client_factory(settings)
+    try:
+        portal_client.connect()
+        for job in jobs:
+            if stopped.is_set():
+                break
+            portal_client.open_url(job.url)
+            ranges = split_guide_ranges(portal_client.get_total_guides(), job.parts)
+            if job.part >= len(ranges):
+                continue
+            start, end = ranges[job.part]
+            orchestrator = AutomationOrchestrator(
+                portal_client=portal_client,
+                spreadsheet_index=spreadsheet_index,
+                config=replace(config, start_guide=start, end_guide=end),
+                on_log=lambda message: events.put(("log", number, message)),
+                on_status=on_status,
+            )
+            if not released.is_set():
+                report()
+                released.wait()
+            with lock:
+                current.append(orchestrator)
+                if stopped.is_set():
+                    orchestrator.stop()
+            orchestrator.run()
+            with lock:
+                current.clear()
+            for name in totals:
+                totals[name] += orchestrator.summary()[name]
+            if orchestrator.state == "PARADO":
+                stopped.set()
+        final = dict(totals, state="PARADO" if stopped.is_set() else "FINALIZADO")
+        events.put(("summary", number, final))
+        return final
+    finally:
+        commands.put(None)
+        listener.join()
+        close = getattr(portal_client, "close", None)
+        if callable(close):
+            close()
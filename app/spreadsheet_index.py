@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+
+from app.glosa_rules import FillPlan, GlosaRuleTable
+from app.models import SpreadsheetRow
+
+
+class DuplicateKeyError(ValueError):
+    def __init__(self, key: str, line_number: int, label: str | None = None) -> None:
+        origin = f" de {label}" if label else ""
+        super().__init__(
+            f"Planilha contem chave duplicada ({key}) na linha {line_number}{origin}."
+        )
+        self.key = key
+        self.line_number = line_number
+
+
+class SpreadsheetIndex(Mapping[str, SpreadsheetRow]):
+    """Indice da planilha em colunas, com textos repetidos guardados uma unica vez.
+
+    Cada linha ocupa apenas a chave `numero_guia|senha` e algumas posicoes em
+    `array`; o `SpreadsheetRow` e montado somente quando a chave e consultada.
+    """
+
+    def __init__(self) -> None:
+        self._positions: dict[str, int] = {}
+        self._splits = array("I")
+        self._valores = array("d")
+        self._text_ids = array("I")
+        self._codigo_ids = array("I")
+        self._lines = array("I")
+        self._texts: list[str] = []
+        self._text_lookup: dict[str, int] = {}
+        self._codigos: list[str | None] = [None]
+        self._codigo_lookup: dict[str | None, int] = {None: 0}
+        self._rules: GlosaRuleTable | None = None
+        self._codigo_plans: list[FillPlan] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[SpreadsheetRow]) -> SpreadsheetIndex:
+        index = cls()
+        for row in rows:
+            index.add(row)
+        return index
+
+    def add(self, row: SpreadsheetRow, line_number: int = 0) -> None:
+        key = row.key
+        if key in self._positions:
+            raise DuplicateKeyError(key, line_number)
+        self._positions[key] = len(self._splits)
+        self._splits.append(len(row.numero_guia.strip()))
+        self._valores.append(row.valor_glosa)
+        self._text_ids.append(self._intern_text(row.justificativa))
+        self._codigo_ids.append(self._intern_codigo(row.codigo_glosa))
+        self._lines.append(line_number)
+
+    def apply_rules(self, rules: GlosaRuleTable | None) -> None:
+        """Pre-calcula o plano de preenchimento de cada codigo de glosa distinto."""
+        self._rules = rules
+        self._codigo_plans = (
+            [rules.plan_for(codigo) for codigo in self._codigos] if rules else []
+        )
+
+    def line_of(self, key: str) -> int:
+        return self._lines[self._positions[key]]
+
+    def iter_with_lines(self) -> Iterator[tuple[int, SpreadsheetRow]]:
+        for key, position in self._positions.items():
+            yield self._lines[position], self._row(key, position)
+
+    def distinct_texts(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, key: str) -> SpreadsheetRow:
+        return self._row(key, self._positions[key])
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __repr__(self) -> str:
+        return f"SpreadsheetIndex({len(self)} linhas, {len(self._texts)} justificativas)"
+
+    def to_columns(self) -> tuple:
+        return (
+            list(self._positions),
+            self._splits.tobytes(),
+            self._valores.tobytes(),
+            self._text_ids.tobytes(),
+            self._codigo_ids.tobytes(),
+            self._lines.tobytes(),
+            list(self._texts),
+            list(self._codigos),
+        )
+
+    @classmethod
+    def from_columns(cls, columns: tuple) -> SpreadsheetIndex:
+        keys, splits, valores, text_ids, codigo_ids, lines, texts, codigos = columns
+        index = cls()
+        index._positions = {key: position for position, key in enumerate(keys)}
+        index._splits.frombytes(splits)
+        index._valores.frombytes(valores)
+        index._text_ids.frombytes(text_ids)
+        index._codigo_ids.frombytes(codigo_ids)
+        index._lines.frombytes(lines)
+        index._texts = list(texts)
+        index._text_lookup = {text: position for position, text in enumerate(texts)}
+        index._codigos = list(codigos)
+        index._codigo_lookup = {codigo: position for position, codigo in enumerate(codigos)}
+        if not (
+            len(index._positions)
+            == len(index._splits)
+            == len(index._valores)
+            == len(index._text_ids)
+            == len(index._codigo_ids)
+            == len(index._lines)
+        ):
+            raise ValueError("Colunas do indice com tamanhos diferentes.")
+        return index
+
+    def _row(self, key: str, position: int) -> SpreadsheetRow:
+        split = self._splits[position]
+        codigo_id = self._codigo_ids[position]
+        return SpreadsheetRow(
+            numero_guia=key[:split],
+            senha=key[split + 1 :],
+            valor_glosa=self._valores[position],
+            justificativa=self._texts[self._text_ids[position]],
+            codigo_glosa=self._codigos[codigo_id],
+            fill_plan=self._codigo_plans[codigo_id] if self._rules else None,
+        )
+
+    def _intern_text(self, text: str) -> int:
+        position = self._text_lookup.get(text)
+        if position is None:
+            position = len(self._texts)
+            self._texts.append(text)
+            self._text_lookup[text] = position
+        return position
+
+    def _intern_codigo(self, codigo: str | None) -> int:
+        position = self._codigo_lookup.get(codigo)
+        if position is None:
+            position = len(self._codigos)
+            self._codigos.append(codigo)
+            self._codigo_lookup[codigo] = position
+            if self._rules is not None:
+                self._codigo_plans.append(self._rules.plan_for(codigo))
+        return position
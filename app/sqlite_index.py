@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+import sqlite3
+import threading
+
+from app.glosa_rules import GlosaRuleTable
+from app.models import SpreadsheetRow
+from app.spreadsheet_index import DuplicateKeyError
+
+_SCHEMA = (
+    "CREATE TABLE justificativas (id INTEGER PRIMARY KEY, texto TEXT NOT NULL)",
+    "CREATE TABLE linhas ("
+    " chave TEXT PRIMARY KEY,"
+    " numero_guia TEXT NOT NULL,"
+    " senha TEXT NOT NULL,"
+    " valor_glosa REAL NOT NULL,"
+    " justificativa_id INTEGER NOT NULL REFERENCES justificativas(id),"
+    " codigo_glosa TEXT,"
+    " linha INTEGER NOT NULL)",
+)
+_INSERT = "INSERT INTO linhas VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SELECT = (
+    "SELECT l.numero_guia, l.senha, l.valor_glosa, j.texto, l.codigo_glosa"
+    " FROM linhas l JOIN justificativas j ON j.id = l.justificativa_id"
+    " WHERE l.chave = ?"
+)
+
+
+class SqliteSpreadsheetIndex(Mapping[str, SpreadsheetRow]):
+    """Indice da planilha num arquivo SQLite local, com LRU pequeno em memoria.
+
+    A memoria usada nao depende do tamanho da planilha. A conexao e criada na
+    thread da interface e consultada pela thread do robo, por isso o acesso e
+    serializado por um lock.
+    """
+
+    def __init__(self, db_path: Path, cache_size: int = 1024) -> None:
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, SpreadsheetRow] = OrderedDict()
+        self._length: int | None = None
+        self._texts: dict[str, int] = {}
+        self._pending_texts: dict[str, int] = {}
+        self._pending: list[tuple] = []
+        self._rules: GlosaRuleTable | None = None
+
+    @classmethod
+    def create(cls, db_path: Path, cache_size: int = 1024) -> SqliteSpreadsheetIndex:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        index = cls(db_path, cache_size)
+        with index._lock:
+            # Arquivo descartavel: durabilidade nao importa, velocidade de carga sim.
+            index._connection.execute("PRAGMA journal_mode = MEMORY")
+            index._connection.execute("PRAGMA synchronous = OFF")
+            for statement in _SCHEMA:
+                index._connection.execute(statement)
+        return index
+
+    @classmethod
+    def build(
+        cls,
+        db_path: Path,
+        rows: Iterable[tuple[int, SpreadsheetRow]],
+        cache_size: int = 1024,
+    ) -> SqliteSpreadsheetIndex:
+        index = cls.create(db_path, cache_size)
+        try:
+            index.extend(rows)
+        except Exception:
+            index.close(delete=True)
+            raise
+        return index
+
+    def extend(
+        self,
+        rows: Iterable[tuple[int, SpreadsheetRow]],
+        label: str | None = None,
+        batch_size: int = 5000,
+    ) -> None:
+        for line_number, row in rows:
+            self._pending.append(
+                (
+                    row.key,
+                    row.numero_guia,
+                    row.senha,
+                    row.valor_glosa,
+                    self._text_id(row.justificativa),
+                    row.codigo_glosa,
+                    line_number,
+                )
+            )
+            if len(self._pending) >= batch_size:
+                self._flush(label)
+        self._flush(label)
+        self._length = None
+
+    def apply_rules(self, rules: GlosaRuleTable | None) -> None:
+        with self._lock:
+            self._rules = rules
+            self._cache.clear()
+
+    def close(self, delete: bool = False) -> None:
+        with self._lock:
+            self._connection.close()
+            self._cache.clear()
+        if delete:
+            self.db_path.unlink(missing_ok=True)
+
+    def __getitem__(self, key: str) -> SpreadsheetRow:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            found = self._connection.execute(_SELECT, (key,)).fetchone()
+            if found is None:
+                raise KeyError(key)
+            plan = self._rules.plan_for(found[4]) if self._rules else None
+            row = SpreadsheetRow(*found, fill_plan=plan)
+            self._cache[key] = row
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return row
+
+    def __iter__(self) -> Iterator[str]:
+        last_rowid = 0
+        while True:
+            with self._lock:
+                page = self._connection.execute(
+                    "SELECT rowid, chave FROM linhas"
+                    " WHERE rowid > ? ORDER BY rowid LIMIT 1000",
+                    (last_rowid,),
+                ).fetchall()
+            if not page:
+                return
+            for last_rowid, key in page:
+                yield key
+
+    def __len__(self) -> int:
+        if self._length is None:
+            with self._lock:
+                (self._length,) = self._connection.execute(
+                    "SELECT COUNT(*) FROM linhas"
+                ).fetchone()
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"SqliteSpreadsheetIndex({self.db_path})"
+
+    def __reduce__(self):
+        # Em outro processo basta reabrir o mesmo arquivo.
+        return type(self), (self.db_path, self.cache_size)
+
+    def _text_id(self, text: str) -> int:
+        text_id = self._texts.get(text) or self._pending_texts.get(text)
+        if text_id is None:
+            text_id = len(self._texts) + len(self._pending_texts) + 1
+            self._pending_texts[text] = text_id
+        return text_id
+
+    def _flush(self, label: str | None) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        texts, self._pending_texts = self._pending_texts, {}
+        with self._lock:
+            try:
+                # Textos novos e linhas do lote na mesma transacao: se o lote
+                # for desfeito, os ids dos textos tambem nao ficam no cache.
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO justificativas VALUES (?, ?)",
+                        [(text_id, text) for text, text_id in texts.items()],
+                    )
+                    self._connection.executemany(_INSERT, batch)
+            except sqlite3.IntegrityError:
+                raise self._find_duplicate(batch, label) from None
+        self._texts.update(texts)
+
+    def _find_duplicate(self, batch: list[tuple], label: str | None) -> DuplicateKeyError:
+        # O lote inteiro foi desfeito; a primeira chave repetida (no banco ou
+        # dentro do proprio lote) e a que seria rejeitada na carga em memoria.
+        seen: set[str] = set()
+        for item in batch:
+            key, line_number = item[0], item[-1]
+            exists = self._connection.execute(
+                "SELECT 1 FROM linhas WHERE chave = ?", (key,)
+            ).fetchone()
+            if exists or key in seen:
+                return DuplicateKeyError(key, line_number, label)
+            seen.add(key)
+        return DuplicateKeyError(batch[0][0], batch[0][-1], label)
@@ -0,0 +1,164 @@
+"""Resumo offline de um arquivo de spans (`reports/spans.jsonl`).
+
+Tabela por operacao (quantidade, erros, total, p50/p95/p99, maximo) e, com
+--timeline, a arvore de spans de uma execucao com o inicio relativo, a duracao
+e uma barra de tempo. Le tambem os arquivos girados (spans.jsonl.1, ...).
+
+Uso: python -m app.trace_report [reports/spans.jsonl] [--trace ID]
+         [--timeline] [--limit 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+import json
+from pathlib import Path
+import sys
+from typing import Any, Iterable
+
+from app.metrics import latency_percentiles
+
+DEFAULT_SPANS_PATH = Path("reports") / "spans.jsonl"
+TIMELINE_WIDTH = 40
+
+
+def trace_files(path: Path) -> list[Path]:
+    """Arquivos girados do mais antigo ao mais novo, terminando em `path`."""
+    rotated = []
+    for candidate in path.parent.glob(f"{path.name}.*"):
+        suffix = candidate.name[len(path.name) + 1 :]
+        if suffix.isdigit():
+            rotated.append((int(suffix), candidate))
+    files = [candidate for _number, candidate in sorted(rotated, reverse=True)]
+    if path.exists():
+        files.append(path)
+    return files
+
+
+def load_spans(path: Path) -> list[dict[str, Any]]:
+    spans = []
+    for source in trace_files(path):
+        with source.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Linha cortada (execucao interrompida no meio da escrita).
+                    continue
+                if isinstance(record, dict) and "name" in record:
+                    spans.append(record)
+    return spans
+
+
+def operation_table(spans: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Uma linha por nome de span, da operacao com mais tempo total para a com menos."""
+    durations: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    for record in spans:
+        durations[record["name"]].append(float(record.get("duration", 0.0)))
+        if "error" in (record.get("attrs") or {}):
+            errors[record["name"]] += 1
+    rows = [
+        {
+            "name": name,
+            "count": len(values),
+            "errors": errors[name],
+            "total": round(sum(values), 3),
+            **latency_percentiles(values),
+            "max": round(max(values), 3),
+        }
+        for name, values in durations.items()
+    ]
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+
+def format_operation_table(rows: list[dict[str, Any]]) -> str:
+    header = (
+        f"{'operacao':<26} {'qtd':>7} {'erros':>6} {'total_s':>10}"
+        f" {'p50_s':>8} {'p95_s':>8} {'p99_s':>8} {'max_s':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<26} {row['count']:>7} {row['errors']:>6} {row['total']:>10.3f}"
+            f" {row['p50']:>8.3f} {row['p95']:>8.3f} {row['p99']:>8.3f} {row['max']:>8.3f}"
+        )
+    return "\n".join(lines)
+
+
+def timeline(
+    spans: list[dict[str, Any]], limit: int = 200, width: int = TIMELINE_WIDTH
+) -> list[str]:
+    """Arvore de spans de uma execucao, em ordem de inicio, com barra de tempo.
+
+    Spans cujo pai nao esta no arquivo (girado para fora) viram raizes.
+    """
+    if not spans:
+        return []
+    ids = {record["id"] for record in spans}
+    children: dict[int | None, list[dict[str, Any]]] = defaultdict(list)
+    for record in spans:
+        parent = record.get("parent")
+        children[parent if parent in ids else None].append(record)
+    for items in children.values():
+        items.sort(key=lambda record: record["start"])
+
+    origin = min(record["start"] for record in spans)
+    finish = max(record["start"] + record["duration"] for record in spans)
+    scale = width / max(finish - origin, 1e-9)
+    lines: list[str] = []
+
+    def visit(record: dict[str, Any], depth: int) -> None:
+        if len(lines) >= limit:
+            return
+        offset = record["start"] - origin
+        begin = min(int(offset * scale), width - 1)
+        length = max(1, round(record["duration"] * scale))
+        bar = (" " * begin + "#" * length)[:width].ljust(width)
+        attrs = record.get("attrs") or {}
+        details = " ".join(f"{key}={value}" for key, value in attrs.items())
+        lines.append(
+            f"{offset:9.3f}s {record['duration']:9.3f}s |{bar}| "
+            f"{'  ' * depth}{record['name']} {details}".rstrip()
+        )
+        for child in children.get(record["id"], []):
+            visit(child, depth + 1)
+
+    for root in children[None]:
+        visit(root, 0)
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_SPANS_PATH)
+    parser.add_argument("--trace", help="execucao (campo trace); padrao: todas na tabela")
+    parser.add_argument("--timeline", action="store_true")
+    parser.add_argument("--limit", type=int, default=200, help="linhas da linha do tempo")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    if not spans:
+        print(f"Nenhum span em {args.path}.")
+        return 1
+    if args.trace:
+        spans = [record for record in spans if record.get("trace") == args.trace]
+        if not spans:
+            print(f"Execucao {args.trace} nao encontrada em {args.path}.")
+            return 1
+
+    traces = list(dict.fromkeys(record.get("trace") for record in spans))
+    print(f"{len(spans)} spans de {len(traces)} execucao(oes): {', '.join(map(str, traces))}")
+    print(format_operation_table(operation_table(spans)))
+    if args.timeline:
+        # A linha do tempo mostra uma execucao so: a pedida ou a ultima.
+        chosen = args.trace or traces[-1]
+        print(f"\nLinha do tempo da execucao {chosen}:")
+        selected = [record for record in spans if record.get("trace") == chosen]
+        print("\n".join(timeline(selected, limit=args.limit)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
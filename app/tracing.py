@@ -0,0 +1,206 @@
+"""Spans aninhados (job > guide > fase > chamada CDP) gravados em JSONL.
+
+Desligado por padrao: `span()` devolve um contexto vazio compartilhado. Com
+`tracing(path)` ativo, cada span terminado vira uma linha JSON:
+
+    {"trace": "9f2c41d0b7aa", "id": 7, "parent": 3, "name": "fill",
+     "start": 1700000000.123, "duration": 0.084, "thread": "Thread-2",
+     "attrs": {...}}
+
+`trace` identifica a execucao (os ids recomecam a cada uma) e `parent` e o
+span que estava aberto no mesmo contexto (thread ou task asyncio).
+
+`start` e o relogio de parede (time.time) e `duration` vem do monotonic. Os
+filhos terminam, e portanto sao gravados, antes dos pais. A escrita fica numa
+thread propria e o arquivo gira ao passar de `max_bytes`
+(spans.jsonl -> spans.jsonl.1 -> ...). Analise com `python -m app.trace_report`.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import itertools
+import json
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Any, ContextManager, Iterator
+import uuid
+
+DEFAULT_TRACE_MAX_BYTES = 20 * 1024 * 1024
+DEFAULT_TRACE_BACKUPS = 3
+
+_current_span: ContextVar[int | None] = ContextVar("current_span", default=None)
+
+
+class JsonlTraceWriter:
+    """Grava registros em JSONL numa thread propria, girando o arquivo por tamanho."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_TRACE_MAX_BYTES,
+        backups: int = DEFAULT_TRACE_BACKUPS,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.SimpleQueue[dict[str, Any] | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = self.path.open("a", encoding="utf-8")
+        size = handle.tell()
+        try:
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    return
+                line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                if size and size + len(line) > self.max_bytes:
+                    handle.close()
+                    self._rotate()
+                    handle = self.path.open("a", encoding="utf-8")
+                    size = 0
+                handle.write(line)
+                size += len(line)
+                if self._queue.empty():
+                    handle.flush()
+        finally:
+            handle.close()
+
+    def _rotate(self) -> None:
+        if self.backups <= 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for number in range(self.backups - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{number}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{number + 1}"))
+        self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+
+class Span:
+    """Span aberto; `set()` acrescenta atributos ate o `end()`."""
+
+    def __init__(self, tracer: Tracer, name: str, attrs: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(tracer._ids)
+        self.parent = _current_span.get()
+        self.start = time.time()
+        self._started = time.monotonic()
+        self._token = _current_span.set(self.id)
+        self._ended = False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def end(self, **attrs: Any) -> None:
+        if self._ended:
+            return
+        self._ended = True
+        duration = time.monotonic() - self._started
+        self.attrs.update(attrs)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Encerrado em outro contexto (outra task): o contexto de origem segue.
+            pass
+        record = {
+            "trace": self.tracer.trace_id,
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration": round(duration, 6),
+            "thread": threading.current_thread().name,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        self.tracer.writer.write(record)
+
+
+class _NoopSpan:
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def end(self, **attrs: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = nullcontext(NOOP_SPAN)
+
+
+class Tracer:
+    def __init__(self, writer: JsonlTraceWriter, trace_id: str | None = None) -> None:
+        self.writer = writer
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self._ids = itertools.count(1)
+
+    def start_span(self, name: str, **attrs: Any) -> Span:
+        return Span(self, name, attrs)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        current = self.start_span(name, **attrs)
+        try:
+            yield current
+        except BaseException as exc:
+            current.end(error=type(exc).__name__)
+            raise
+        current.end()
+
+
+_tracer: Tracer | None = None
+
+
+def set_tracer(tracer: Tracer | None) -> Tracer | None:
+    """Ativa `tracer` para o processo todo; devolve o anterior."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, **attrs: Any) -> ContextManager[Span | _NoopSpan]:
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_CONTEXT
+    return tracer.span(name, **attrs)
+
+
+def start_span(name: str, **attrs: Any) -> Span | _NoopSpan:
+    """Span sem bloco `with`: quem abre chama `end()`."""
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, **attrs)
+
+
+@contextmanager
+def tracing(
+    path: Path,
+    max_bytes: int = DEFAULT_TRACE_MAX_BYTES,
+    backups: int = DEFAULT_TRACE_BACKUPS,
+) -> Iterator[Tracer]:
+    writer = JsonlTraceWriter(path, max_bytes=max_bytes, backups=backups)
+    tracer = Tracer(writer)
+    previous = set_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        set_tracer(previous)
+        writer.close()
@@ -1,19 +1,86 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import nullcontext
+from datetime import datetime
 import threading
 from pathlib import Path
 from tempfile import gettempdir
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
+from typing import Mapping
 
 from app.chrome_launcher import launch_chrome_debug
+from app.chrome_pool import current_tab_url, wait_for_debug_port_closed
 from app.config import AppSettings, load_settings
-from app.excel_reader import load_spreadsheet_index
+from app.excel_reader import (
+    SpreadsheetSource,
+    SpreadsheetValidationReport,
+    expand_sources,
+    load_spreadsheet_index,
+    load_spreadsheet_sources,
+    validate_spreadsheet,
+)
+from app.glosa_rules import GlosaRuleTable
+from app.index_cache import SpreadsheetIndexCache
 from app.models import GuideStatusRecord, SpreadsheetRow
 from app.orchestrator import AutomationOrchestrator, OrchestratorConfig
-from app.reporting import export_status_report
-from app.runtime import run_automation_job
+from app.parallel import OrchestratorGroup
+from app.profiling import RunProfiler, traced_client_factory
+from app.reporting import (
+    PHASE_LABELS,
+    export_phase_report,
+    export_status_report,
+    export_validation_report,
+)
+from app.spreadsheet_index import SpreadsheetIndex
+from app.sqlite_index import SqliteSpreadsheetIndex
+from app.tracing import span, tracing
+from app.runtime import (
+    run_automation_job,
+    run_automation_job_async,
+    run_parallel_job_async,
+    run_pool_job,
+)
+
+
+FILE_SEPARATOR = "; "
+
+
+def parse_selected_files(text: str) -> list[Path]:
+    return [Path(item.strip()) for item in text.split(";") if item.strip()]
+
+
+def select_runner(settings: AppSettings) -> str:
+    """Qual execucao usar: "pool", "abas", "async" ou "sync"."""
+    if settings.chrome_pool_size > 1:
+        return "pool"
+    if settings.parallel_tabs > 1:
+        return "abas"
+    if settings.async_runtime:
+        return "async"
+    return "sync"
+
+
+def build_latency_line(summary: Mapping[str, object]) -> str:
+    parts = [
+        f"{name.removeprefix('latency_')} {value:.2f}s"
+        for name, value in summary.items()
+        if name.startswith("latency_")
+    ]
+    return f"Latencia por guia: {' | '.join(parts)}\n" if parts else ""
+
+
+def build_phase_line(summary: Mapping[str, object]) -> str:
+    phases = summary.get("phases") or {}
+    parts = [
+        f"{PHASE_LABELS.get(name, name)} "
+        + "/".join(f"{seconds:.2f}" for seconds in values.values())
+        + "s"
+        for name, values in phases.items()
+    ]
+    return f"Tempo por fase (p50/p95/p99): {' | '.join(parts)}" if parts else ""
 
 
 def build_usage_instructions() -> str:
@@ -23,7 +90,8 @@ def build_usage_instructions() -> str:
         "Inicie o Google Chrome clicando no botao correspondente dentro do sistema. "
         "Em seguida, navegue ate o lote que sera processado.\n\n"
         "2. Importacao:\n"
-        "Selecione a planilha que contem a base de informacoes.\n\n"
+        "Selecione a planilha que contem a base de informacoes. "
+        "Se a base vier dividida, selecione todos os arquivos de uma vez.\n\n"
         "3. Execucao:\n"
         "Clique no botao [Iniciar] para comecar o processamento.\n\n"
         "Importante:\n"
@@ -41,11 +109,19 @@ class AutomationApp:
         self.settings = settings or load_settings(Path("settings.json"))
         self.profile_dir = Path(gettempdir()) / "amil-glosa-chrome-profile"
         self.reports_dir = Path("reports")
+        self.index_cache = SpreadsheetIndexCache(
+            max_bytes=self.settings.index_cache_max_mb * 1024 * 1024
+        )
+        self.sqlite_index_path = (
+            Path(gettempdir()) / "amil-glosa-index-db" / "indice.sqlite3"
+        )
 
-        self.orchestrator: AutomationOrchestrator | None = None
+        self.orchestrator: AutomationOrchestrator | OrchestratorGroup | None = None
         self.worker: threading.Thread | None = None
         self.status_records: list[GuideStatusRecord] = []
-        self.spreadsheet_index: dict[str, SpreadsheetRow] | None = None
+        self.spreadsheet_index: Mapping[str, SpreadsheetRow] | None = None
+        # Lote lido da aba atual antes de fechar o Chrome principal (modo pool).
+        self.pool_lote_urls: list[str] | None = None
         self._pending_stop_request = False
 
         self.file_var = tk.StringVar()
@@ -124,13 +200,17 @@ class AutomationApp:
         self.log_widget.configure(state="disabled")
 
     def _choose_file(self) -> None:
-        path = filedialog.askopenfilename(
-            title="Selecionar planilha",
-            filetypes=[("Planilhas", "*.xlsx *.csv"), ("Todos", "*.*")],
+        paths = filedialog.askopenfilenames(
+            title="Selecionar planilha(s)",
+            filetypes=[
+                ("Planilhas", "*.xlsx *.csv *.parquet *.feather *.arrow"),
+                ("Todos", "*.*"),
+            ],
         )
-        if path:
-            self.file_var.set(path)
-            self._log(f"Planilha selecionada: {path}")
+        if paths:
+            self.file_var.set(FILE_SEPARATOR.join(paths))
+            for path in paths:
+                self._log(f"Planilha selecionada: {path}")
 
     def _show_how_to_use(self) -> None:
         messagebox.showinfo("Como usar o sistema", build_usage_instructions())
@@ -160,13 +240,23 @@ class AutomationApp:
             self._log("Automacao ja esta em execucao.")
             return
 
-        file_path = Path(self.file_var.get().strip())
-        if not file_path.exists():
-            messagebox.showwarning("Planilha", "Selecione um arquivo .xlsx ou .csv valido.")
+        file_paths = parse_selected_files(self.file_var.get())
+        if not file_paths or not all(path.exists() for path in file_paths):
+            messagebox.showwarning("Planilha", "Selecione um arquivo de planilha valido.")
             return
 
+        self.pool_lote_urls = None
+        if self.settings.chrome_pool_size > 1 and not self.settings.pool_lote_urls:
+            self.pool_lote_urls = self._prepare_pool_lote()
+            if self.pool_lote_urls is None:
+                return
+
+        self._release_spreadsheet_index()
         try:
-            spreadsheet_index = load_spreadsheet_index(file_path)
+            rules = GlosaRuleTable.from_settings(self.settings)
+            spreadsheet_index = self._load_spreadsheet(file_paths)
+            # Cada linha passa a carregar o plano de preenchimento do seu codigo.
+            spreadsheet_index.apply_rules(rules)
         except Exception as exc:
             messagebox.showerror("Erro na planilha", str(exc))
             self._log(f"Erro ao ler planilha: {exc}")
@@ -186,16 +276,131 @@ class AutomationApp:
         self.worker.start()
         self._apply_button_state()
 
+    def _prepare_pool_lote(self) -> list[str] | None:
+        """Le o lote da aba atual e pede para fechar o Chrome principal.
+
+        As instancias do pool copiam o perfil dele, o que falha com o Chrome aberto.
+        """
+        port = self.settings.debug_port
+        try:
+            url = current_tab_url(port)
+        except RuntimeError as exc:
+            messagebox.showerror("Varias instancias do Chrome", str(exc))
+            self._log(str(exc))
+            return None
+        self._log(f"Lote para as instancias do Chrome: {url}")
+        if not messagebox.askokcancel(
+            "Varias instancias do Chrome",
+            (
+                f"Lote: {url}\n\n"
+                "Feche o Chrome principal (o perfil dele sera copiado para as "
+                "instancias) e clique em OK."
+            ),
+        ):
+            return None
+        if not wait_for_debug_port_closed(port):
+            messagebox.showerror(
+                "Varias instancias do Chrome",
+                f"O Chrome principal (porta {port}) continua aberto. Feche-o e tente novamente.",
+            )
+            return None
+        return [url]
+
+    def _load_spreadsheet(
+        self, file_paths: list[Path]
+    ) -> SpreadsheetIndex | SqliteSpreadsheetIndex:
+        engine = self.settings.xlsx_engine
+        sqlite_path = None
+        if self.settings.index_backend == "sqlite":
+            sqlite_path = self.sqlite_index_path
+        if len(file_paths) > 1 or self.settings.read_all_sheets:
+            sources = expand_sources(file_paths, all_sheets=self.settings.read_all_sheets)
+            self._validate_sources(sources)
+            self._log(f"Lendo {len(sources)} planilhas/abas em paralelo...")
+            return load_spreadsheet_sources(
+                sources, xlsx_engine=engine, sqlite_path=sqlite_path
+            )
+        if sqlite_path is not None:
+            self._validate_sources([SpreadsheetSource(file_paths[0])])
+            self._log(f"Gravando indice da planilha em SQLite: {sqlite_path}")
+            return load_spreadsheet_index(
+                file_paths[0], xlsx_engine=engine, sqlite_path=sqlite_path
+            )
+
+        def loader(path: Path) -> Mapping[str, SpreadsheetRow]:
+            report = validate_spreadsheet(path, xlsx_engine=engine)
+            if report.is_valid:
+                return report.index
+            self._raise_validation_failure([(SpreadsheetSource(path), report)])
+
+        if not self.settings.index_cache_enabled:
+            return loader(file_paths[0])
+        spreadsheet_index, from_cache = self.index_cache.load(file_paths[0], loader=loader)
+        if from_cache:
+            self._log(
+                "Planilha sem alteracoes desde a ultima leitura; indice carregado do cache."
+            )
+        return spreadsheet_index
+
+    def _validate_sources(self, sources: list[SpreadsheetSource]) -> None:
+        """Mesma validacao completa da carga em memoria, sem guardar as linhas."""
+        reports = [
+            (
+                source,
+                validate_spreadsheet(
+                    source.path,
+                    xlsx_engine=self.settings.xlsx_engine,
+                    sheet=source.sheet,
+                    keep_rows=False,
+                ),
+            )
+            for source in sources
+        ]
+        if any(not report.is_valid for _source, report in reports):
+            self._raise_validation_failure(reports)
+
+    def _raise_validation_failure(
+        self, reports: list[tuple[SpreadsheetSource, SpreadsheetValidationReport]]
+    ) -> None:
+        report_files = []
+        first = None
+        for source, report in reports:
+            if report.is_valid:
+                continue
+            name = source.path.stem if source.sheet is None else source.label
+            report_file = export_validation_report(
+                report.issues, self.reports_dir, source_name=name
+            )
+            self._log(f"Relatorio de validacao da planilha exportado em: {report_file}")
+            report_files.append(str(report_file))
+            if first is None:
+                first = report.issues[0].message
+                if len(reports) > 1:
+                    first = f"{source.label}: {first}"
+        issues = sum(len(report.issues) for _source, report in reports)
+        rows_read = sum(report.rows_read for _source, report in reports)
+        raise ValueError(
+            f"{issues} problema(s) em {rows_read} linhas lidas. "
+            f"Primeiro: {first}.\n"
+            f"Lista completa: {', '.join(report_files)}"
+        )
+
+    def _release_spreadsheet_index(self) -> None:
+        if isinstance(self.spreadsheet_index, SqliteSpreadsheetIndex):
+            self.spreadsheet_index.close()
+        self.spreadsheet_index = None
+
     def _run_worker(self) -> None:
         assert self.spreadsheet_index is not None
         try:
-            orchestrator = run_automation_job(
+            job = dict(
                 settings=self.settings,
                 spreadsheet_index=self.spreadsheet_index,
                 config=OrchestratorConfig(
                     pause_on_missing=True,
                     wait_for_manual_action=True,
                     delay_after_next_seconds=0.35,
+                    guide_change_timeout_seconds=self.settings.timeout_ms / 1000,
                     capture_screenshot_on_error=True,
                     error_artifacts_dir=self.reports_dir / "screenshots",
                 ),
@@ -203,6 +408,44 @@ class AutomationApp:
                 on_status=lambda item: self.root.after(0, self._push_status, item),
                 on_ready=lambda item: self.root.after(0, self._on_orchestrator_ready, item),
             )
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            runner = select_runner(self.settings)
+            if self.settings.playwright_trace and runner == "sync":
+                trace_file = self.reports_dir / f"trace-{stamp}.zip"
+                job["portal_client_factory"] = traced_client_factory(trace_file)
+                job["on_log"](f"Trace do Playwright sera gravado em: {trace_file}")
+            spans = nullcontext()
+            if self.settings.trace_spans:
+                spans_file = self.reports_dir / "spans.jsonl"
+                spans = tracing(
+                    spans_file, max_bytes=self.settings.trace_max_mb * 1024 * 1024
+                )
+                job["on_log"](f"Spans da execucao serao gravados em: {spans_file}")
+            profiler = (
+                RunProfiler(self.reports_dir, stamp=stamp)
+                if self.settings.profile_runs
+                else nullcontext()
+            )
+            try:
+                with spans, profiler, span("job", runner=runner):
+                    if runner == "pool":
+                        orchestrator = run_pool_job(
+                            **job,
+                            template_profile=self.profile_dir,
+                            lote_urls=self.pool_lote_urls,
+                        )
+                    elif runner == "abas":
+                        orchestrator = asyncio.run(run_parallel_job_async(**job))
+                    elif runner == "async":
+                        orchestrator = asyncio.run(run_automation_job_async(**job))
+                    else:
+                        orchestrator = run_automation_job(**job)
+            finally:
+                if isinstance(profiler, RunProfiler):
+                    job["on_log"](
+                        "Perfil da execucao gravado em: "
+                        + ", ".join(str(path) for path in profiler.files)
+                    )
             self.orchestrator = orchestrator
         except Exception as exc:
             self.root.after(0, self._handle_runtime_error, str(exc))
@@ -267,7 +510,9 @@ class AutomationApp:
             self._set_state(self.orchestrator.state)
             self._apply_button_state()
 
-    def _on_orchestrator_ready(self, orchestrator: AutomationOrchestrator) -> None:
+    def _on_orchestrator_ready(
+        self, orchestrator: AutomationOrchestrator | OrchestratorGroup
+    ) -> None:
         self.orchestrator = orchestrator
         if self._pending_stop_request:
             self._pending_stop_request = False
@@ -304,6 +549,18 @@ class AutomationApp:
         summary = self.orchestrator.summary()
         report_file = export_status_report(self.status_records, self.reports_dir)
         self._log(f"Relatorio CSV exportado em: {report_file}")
+        if summary.get("phases"):
+            self._log(build_phase_line(summary))
+            phase_file = export_phase_report(summary["phases"], self.reports_dir)
+            self._log(f"Tempos por fase exportados em: {phase_file}")
+        concurrency = ""
+        if "concurrency" in summary:
+            concurrency = (
+                f"Abas simultaneas: {summary['concurrency']} de "
+                f"{summary['max_concurrency']}\n"
+                + build_latency_line(summary)
+            )
+            self._log(concurrency.strip().replace("\n", " | "))
         self.root.bell()
         messagebox.showinfo(
             "Lote finalizado",
@@ -312,6 +569,7 @@ class AutomationApp:
                 f"Processadas: {summary['processed']}\n"
                 f"Sucessos: {summary['successes']}\n"
                 f"Erros: {summary['errors']}\n"
+                f"{concurrency}"
                 f"Relatorio: {report_file}"
             ),
         )
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from pathlib import Path, PurePosixPath
+import re
+from typing import Iterator
+from xml.etree import ElementTree
+from xml.parsers import expat
+import zipfile
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_COLUMN_RE = re.compile(r"[A-Z]+")
+_CHUNK_SIZE = 1024 * 1024
+_COLUMN_CACHE: dict[str, int] = {}
+
+
+def column_index(reference: str) -> int:
+    letters = reference.rstrip("0123456789")
+    cached = _COLUMN_CACHE.get(letters)
+    if cached is not None:
+        return cached
+    if not _COLUMN_RE.fullmatch(letters):
+        raise ValueError(f"Referencia de celula invalida: {reference!r}")
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    _COLUMN_CACHE[letters] = index - 1
+    return index - 1
+
+
+def cast_number(text: str) -> int | float:
+    # Mesma regra do openpyxl: inteiros ficam int (ex.: numero_guia 123 -> "123").
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+class XlsxXmlSheet:
+    """Leitor de uma aba XLSX direto do XML, sem objetos de celula do openpyxl.
+
+    Estilos nao sao lidos: datas chegam como numero serial do Excel. `columns`
+    pode ser alterado durante a iteracao para restringir as proximas linhas as
+    colunas de interesse (as demais nem tem valor convertido).
+    """
+
+    def __init__(self, path: Path, sheet_name: str | None = None) -> None:
+        self.path = path
+        self.sheet_name = sheet_name
+        self.columns: set[int] | None = None
+
+    def rows(self) -> Iterator[tuple[int, dict[int, object]]]:
+        with zipfile.ZipFile(self.path) as archive:
+            shared_strings = _read_shared_strings(archive)
+            with archive.open(_sheet_member(archive, self.sheet_name)) as stream:
+                handler = _SheetHandler(self, shared_strings)
+                parser = handler.parser()
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                    parser.Parse(chunk, False)
+                    yield from handler.drain()
+                parser.Parse(b"", True)
+                yield from handler.drain()
+
+
+class _SheetHandler:
+    def __init__(self, sheet: XlsxXmlSheet, shared_strings: list[str]) -> None:
+        self.sheet = sheet
+        self.shared_strings = shared_strings
+        self.pending: list[tuple[int, dict[int, object]]] = []
+        self.columns: set[int] | None = None
+        self.row_number = 0
+        self.values: dict[int, object] = {}
+        self.has_value = False
+        self.position = -1
+        self.cell_type = "n"
+        self.buffer: list[str] = []
+        self.collecting = False
+        self.in_phonetic = False
+
+    def parser(self):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.start
+        parser.EndElementHandler = self.end
+        parser.CharacterDataHandler = self.text
+        return parser
+
+    def drain(self) -> list[tuple[int, dict[int, object]]]:
+        ready, self.pending = self.pending, []
+        return ready
+
+    def start(self, name: str, attrs: dict[str, str]) -> None:
+        tag = _local_name(name)
+        if tag == "c":
+            reference = attrs.get("r")
+            self.position = column_index(reference) if reference else self.position + 1
+            self.cell_type = attrs.get("t", "n")
+            self.buffer = []
+        elif tag == "v" or (tag == "t" and not self.in_phonetic):
+            self.collecting = True
+        elif tag == "rPh":
+            self.in_phonetic = True
+        elif tag == "row":
+            number = attrs.get("r")
+            self.row_number = int(number) if number else self.row_number + 1
+            self.columns = self.sheet.columns
+            self.values = {}
+            self.has_value = False
+            self.position = -1
+
+    def end(self, name: str) -> None:
+        tag = _local_name(name)
+        if tag == "c":
+            self._finish_cell()
+        elif tag in ("v", "t"):
+            self.collecting = False
+        elif tag == "rPh":
+            self.in_phonetic = False
+        elif tag == "row" and self.has_value:
+            self.pending.append((self.row_number, self.values))
+
+    def text(self, data: str) -> None:
+        if self.collecting:
+            self.buffer.append(data)
+
+    def _finish_cell(self) -> None:
+        raw = "".join(self.buffer)
+        if not raw:
+            return
+        self.has_value = True
+        if self.columns is not None and self.position not in self.columns:
+            return
+        cell_type = self.cell_type
+        if cell_type == "s":
+            value: object = self.shared_strings[int(raw)]
+        elif cell_type == "n":
+            value = cast_number(raw)
+        elif cell_type == "b":
+            value = raw == "1"
+        else:
+            # "inlineStr", "str" (formula), "e" (erro) e "d" (data ISO) ficam como texto.
+            value = raw
+        self.values[self.position] = value
+
+
+def _read_shared_strings(archive: zipfile.ZipFile) -> list[str]:
+    member = next(
+        (
+            target
+            for _id, kind, target in _workbook_relationships(archive)
+            if kind.endswith("/sharedStrings")
+        ),
+        "xl/sharedStrings.xml",
+    )
+    if member not in archive.namelist():
+        return []
+
+    strings: list[str] = []
+    parts: list[str] = []
+    state = {"collecting": False, "phonetic": False}
+
+    def start(name: str, _attrs: dict[str, str]) -> None:
+        tag = _local_name(name)
+        if tag == "si":
+            parts.clear()
+        elif tag == "t" and not state["phonetic"]:
+            state["collecting"] = True
+        elif tag == "rPh":
+            state["phonetic"] = True
+
+    def end(name: str) -> None:
+        tag = _local_name(name)
+        if tag == "si":
+            strings.append("".join(parts))
+        elif tag == "t":
+            state["collecting"] = False
+        elif tag == "rPh":
+            state["phonetic"] = False
+
+    def text(data: str) -> None:
+        if state["collecting"]:
+            parts.append(data)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+    with archive.open(member) as stream:
+        parser.ParseFile(stream)
+    return strings
+
+
+def _local_name(name: str) -> str:
+    return name.rpartition(":")[2] if ":" in name else name
+
+
+def sheet_names(path: Path) -> list[str]:
+    with zipfile.ZipFile(path) as archive:
+        return [sheet.get("name", "") for sheet in _workbook_sheets(archive)[1]]
+
+
+def _workbook_sheets(archive: zipfile.ZipFile) -> tuple[int, list[ElementTree.Element]]:
+    workbook = _parse_xml(archive, "xl/workbook.xml")
+    if workbook is None:
+        raise ValueError("Planilha XLSX sem workbook.xml.")
+
+    active_tab = 0
+    view = workbook.find(f"{_MAIN_NS}bookViews/{_MAIN_NS}workbookView")
+    if view is not None:
+        active_tab = int(view.get("activeTab", "0"))
+    return active_tab, workbook.findall(f"{_MAIN_NS}sheets/{_MAIN_NS}sheet")
+
+
+def _sheet_member(archive: zipfile.ZipFile, sheet_name: str | None) -> str:
+    active_tab, sheets = _workbook_sheets(archive)
+    if not sheets:
+        raise ValueError("Planilha XLSX vazia.")
+    if sheet_name is None:
+        sheet = sheets[active_tab] if active_tab < len(sheets) else sheets[0]
+    else:
+        sheet = next((item for item in sheets if item.get("name") == sheet_name), None)
+        if sheet is None:
+            raise ValueError(f"Aba nao encontrada na planilha: {sheet_name!r}")
+
+    targets = {rel_id: target for rel_id, _kind, target in _workbook_relationships(archive)}
+    target = targets.get(sheet.get(f"{_REL_NS}id", ""))
+    if target is None:
+        raise ValueError(f"Aba {sheet.get('name')!r} sem arquivo correspondente no XLSX.")
+    return target
+
+
+def _workbook_relationships(archive: zipfile.ZipFile) -> list[tuple[str, str, str]]:
+    rels = _parse_xml(archive, "xl/_rels/workbook.xml.rels")
+    if rels is None:
+        return []
+    return [
+        (item.get("Id", ""), item.get("Type", ""), _member_name(item.get("Target", "")))
+        for item in rels.iter(f"{_PKG_REL_NS}Relationship")
+    ]
+
+
+def _member_name(target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return str(PurePosixPath("xl") / target)
+
+
+def _parse_xml(archive: zipfile.ZipFile, member: str) -> ElementTree.Element | None:
+    try:
+        with archive.open(member) as stream:
+            return ElementTree.parse(stream).getroot()
+    except KeyError:
+        return None
@@ -0,0 +1 @@
+"""Benchmarks manuais de desempenho (execute com `python -m benchmarks.<nome>`)."""
@@ -0,0 +1,56 @@
+"""Carga da mesma base em XLSX, Parquet e Feather/Arrow IPC.
+
+Requer pyarrow. Uso: python -m benchmarks.bench_arrow_formats [--rows 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+
+import pyarrow
+import pyarrow.feather
+import pyarrow.parquet
+
+from app.excel_reader import load_spreadsheet_index
+from benchmarks.synthetic import AMIL_HEADERS, synthetic_rows, write_xlsx
+
+
+def _arrow_table(total: int) -> pyarrow.Table:
+    columns = list(zip(*synthetic_rows(total)))
+    data = {header: list(values) for header, values in zip(AMIL_HEADERS, columns)}
+    data["Valor Glosa (R$)"] = [
+        float(value.replace(",", ".")) for value in data["Valor Glosa (R$)"]
+    ]
+    return pyarrow.table(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        table = _arrow_table(args.rows)
+        sources = {
+            "xlsx (openpyxl)": (write_xlsx(folder / "glosas.xlsx", args.rows), "openpyxl"),
+            "xlsx (xml)": (folder / "glosas.xlsx", "xml"),
+            "parquet": (folder / "glosas.parquet", None),
+            "feather": (folder / "glosas.feather", None),
+        }
+        pyarrow.parquet.write_table(table, sources["parquet"][0])
+        pyarrow.feather.write_feather(table, sources["feather"][0])
+
+        for label, (path, engine) in sources.items():
+            started = time.perf_counter()
+            index = load_spreadsheet_index(path, xlsx_engine=engine or "openpyxl")
+            elapsed = time.perf_counter() - started
+            size_mb = path.stat().st_size / 2**20
+            print(f"{label:>16}: {elapsed:6.2f}s | {size_mb:6.1f} MB | {len(index)} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Latencia de leitura do contexto da guia: campo a campo x snapshot em lote.
+
+Sem --cdp-url usa o portal simulado (latencia fixa por ida e volta). Com
+--cdp-url conecta no Chrome ja aberto na tela da guia e mede o portal real.
+
+Uso: python -m benchmarks.bench_context_reads [--latency-ms 2] [--reads 50]
+     python -m benchmarks.bench_context_reads --cdp-url http://127.0.0.1:9222
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import statistics
+import time
+
+from app.config import AppSettings
+from app.portal_client import PortalClient
+from benchmarks.simulated_portal import simulated_client
+
+
+def _measure(client: PortalClient, reads: int) -> list[float]:
+    samples = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        client.read_current_context()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float], calls: int | None) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    extra = f" | chamadas/guia {calls / len(samples):.1f}" if calls is not None else ""
+    print(
+        f"{label:<14} mediana {statistics.median(samples):7.2f} ms"
+        f" | p95 {p95:7.2f} ms{extra}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--frames", type=int, default=2, help="iframes vazios antes do formulario")
+    parser.add_argument("--cdp-url", default="")
+    args = parser.parse_args()
+
+    for label, batched in (("campo a campo", False), ("snapshot", True)):
+        settings = replace(AppSettings(), batched_reads=batched)
+        if args.cdp_url:
+            client = PortalClient(settings)
+            client.settings.debug_port = int(args.cdp_url.rsplit(":", 1)[-1])
+            client.connect()
+            try:
+                _report(label, _measure(client, args.reads), None)
+            finally:
+                client.close()
+            continue
+
+        client, page = simulated_client(settings, args.latency_ms / 1000, args.frames)
+        samples = _measure(client, args.reads)
+        _report(label, samples, page.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Tempo de preenchimento por guia: fill campo a campo x script unico.
+
+A ultima linha mede guias em que so existe a justificativa secundaria.
+
+Usa o portal simulado (latencia fixa por ida e volta CDP), com o cache de
+frames ja aquecido como no regime normal da automacao.
+
+Uso: python -m benchmarks.bench_fill [--guides 50] [--latency-ms 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import statistics
+import time
+
+from app.config import AppSettings
+from app.portal_client import resolve_selector
+from benchmarks.simulated_portal import simulated_client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guides", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--frames", type=int, default=2, help="iframes vazios antes do formulario")
+    args = parser.parse_args()
+
+    cases = (
+        ("campo a campo", False, False),
+        ("script unico", True, False),
+        ("so secundario", True, True),
+    )
+    for label, batched, secondary_only in cases:
+        settings = replace(AppSettings(), batched_fill=batched)
+        client, page = simulated_client(settings, args.latency_ms / 1000, args.frames)
+        if secondary_only:
+            # Guia sem o campo principal: antes custava timeout_ms inteiro.
+            del page.frames[-1].fields[resolve_selector(settings.selectors.justificativa)]
+        client.fill_current_guide(10.0, "Aquecimento", "3030")
+        calls_before = page.calls
+        samples = []
+        for item in range(args.guides):
+            started = time.perf_counter()
+            client.fill_current_guide(10.0 + item, "Justificativa do recurso", "3030")
+            samples.append((time.perf_counter() - started) * 1000)
+        calls = (page.calls - calls_before) / args.guides
+        print(
+            f"{label:<14} mediana {statistics.median(samples):6.2f} ms/guia"
+            f" | chamadas/guia {calls:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Atraso fixo apos "proxima guia" x deteccao da troca de guia.
+
+Roda o orquestrador real com o PortalClient sobre o portal simulado, em que a
+nova guia aparece apos uma latencia aleatoria entre --min-ms e --max-ms. Com
+atraso fixo, leituras antes da troca repetem a guia anterior.
+
+Uso: python -m benchmarks.bench_guide_change [--guides 40] [--min-ms 50] [--max-ms 600]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.config import AppSettings
+from app.models import SpreadsheetRow
+from app.orchestrator import AutomationOrchestrator, OrchestratorConfig
+from benchmarks.simulated_portal import install_guide_flow, simulated_client
+
+
+def _run(guides, args, wait_for_change: bool) -> tuple[float, int, int]:
+    settings = AppSettings(timeout_ms=5000)
+    client, page = simulated_client(settings, args.latency_ms / 1000)
+    install_guide_flow(client, page, guides, args.min_ms / 1000, args.max_ms / 1000)
+    index = {
+        f"{numero}|{senha}": SpreadsheetRow(numero, senha, 10.0, "Justificativa")
+        for numero, senha in guides
+    }
+    statuses = []
+    orchestrator = AutomationOrchestrator(
+        portal_client=client,
+        spreadsheet_index=index,
+        config=OrchestratorConfig(
+            wait_for_manual_action=False,
+            delay_after_next_seconds=args.delay,
+            wait_for_guide_change=wait_for_change,
+            capture_screenshot_on_error=False,
+        ),
+        on_status=statuses.append,
+    )
+    started = time.perf_counter()
+    orchestrator.run()
+    elapsed = time.perf_counter() - started
+    keys = [f"{item.numero_guia}|{item.senha}" for item in statuses]
+    return elapsed, len(keys) - len(set(keys)), len(set(keys))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guides", type=int, default=40)
+    parser.add_argument("--min-ms", type=float, default=50)
+    parser.add_argument("--max-ms", type=float, default=600)
+    parser.add_argument("--delay", type=float, default=0.35, help="atraso fixo (s)")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="ida e volta CDP")
+    args = parser.parse_args()
+
+    guides = [(str(100000 + item), f"S{item:05d}") for item in range(args.guides)]
+    for label, wait_for_change in (("atraso fixo", False), ("deteccao", True)):
+        elapsed, repeated, distinct = _run(guides, args, wait_for_change)
+        print(
+            f"{label:<12} {elapsed:6.2f} s | {len(guides) / elapsed * 60:6.1f} guias/min"
+            f" | guias distintas {distinct}/{len(guides)} | leituras repetidas {repeated}"
+        )
+
+
+if __name__ == "__main__":
+    main()
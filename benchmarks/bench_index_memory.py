@@ -0,0 +1,106 @@
+"""Memoria do indice: dict de SpreadsheetRow, SpreadsheetIndex colunar e SQLite.
+
+O modo "dict" reproduz o formato antigo (dataclass sem __slots__ e uma copia
+da justificativa por linha, como sai do leitor de planilha).
+
+Uso: python -m benchmarks.bench_index_memory [--rows 500000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+import tracemalloc
+
+from app.models import SpreadsheetRow, build_key
+from app.spreadsheet_index import SpreadsheetIndex
+from app.sqlite_index import SqliteSpreadsheetIndex
+from benchmarks.synthetic import synthetic_rows
+
+
+@dataclass(frozen=True)
+class _LegacyRow:
+    numero_guia: str
+    senha: str
+    valor_glosa: float
+    justificativa: str
+    codigo_glosa: str | None = None
+
+    @property
+    def key(self) -> str:
+        return build_key(self.numero_guia, self.senha)
+
+
+def _parsed(total: int):
+    # Copia os textos como o leitor faria (um objeto str novo por celula).
+    for _protocolo, _lote, guia, senha, codigo, _desc, valor, texto in synthetic_rows(total):
+        yield guia, senha, float(valor.replace(",", ".")), "".join(texto), "".join(codigo)
+
+
+def _build_dict(total: int) -> dict:
+    index = {}
+    for guia, senha, valor, texto, codigo in _parsed(total):
+        row = _LegacyRow(guia, senha, valor, texto, codigo)
+        index[row.key] = row
+    return index
+
+
+def _build_columnar(total: int) -> SpreadsheetIndex:
+    index = SpreadsheetIndex()
+    for guia, senha, valor, texto, codigo in _parsed(total):
+        index.add(SpreadsheetRow(guia, senha, valor, texto, codigo))
+    return index
+
+
+def _build_sqlite(total: int, db_path: Path) -> SqliteSpreadsheetIndex:
+    rows = (
+        (line_number, SpreadsheetRow(guia, senha, valor, texto, codigo))
+        for line_number, (guia, senha, valor, texto, codigo) in enumerate(
+            _parsed(total), start=2
+        )
+    )
+    return SqliteSpreadsheetIndex.build(db_path, rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    tmp = TemporaryDirectory()
+    builders = (
+        ("dict", _build_dict),
+        ("colunar", _build_columnar),
+        ("sqlite", lambda total: _build_sqlite(total, Path(tmp.name) / "indice.sqlite3")),
+    )
+    results = {}
+    for label, builder in builders:
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = builder(args.rows)
+        elapsed = time.perf_counter() - started
+        retained, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        for key in list(index)[:: max(1, args.rows // 50_000)]:
+            index.get(key)
+        lookup = time.perf_counter() - started
+        results[label] = retained
+        print(
+            f"{label:>8}: {retained / 2**20:8.1f} MB retidos | "
+            f"construcao {elapsed:.2f}s | 50k consultas {lookup * 1000:.0f} ms"
+        )
+        if isinstance(index, SqliteSpreadsheetIndex):
+            index.close()
+        del index
+
+    tmp.cleanup()
+    print(f"reducao do colunar: {results['dict'] / results['colunar']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Custo de localizar um campo: varredura de todos os frames x cache por frame.
+
+Usa o portal simulado com o formulario no ultimo de varios iframes.
+
+Uso: python -m benchmarks.bench_locator_lookup [--frames 8] [--latency-ms 2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.config import AppSettings
+from benchmarks.simulated_portal import simulated_client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=8, help="iframes vazios antes do formulario")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    settings = AppSettings()
+    selector = settings.selectors.senha
+    for label, cached in (("sem cache", False), ("com cache", True)):
+        client, page = simulated_client(settings, args.latency_ms / 1000, args.frames)
+        started = time.perf_counter()
+        for _ in range(args.lookups):
+            if not cached:
+                client._frame_cache.clear()
+            client._find_locator(selector)
+        elapsed = (time.perf_counter() - started) * 1000 / args.lookups
+        print(
+            f"{label:<10} {elapsed:7.2f} ms/busca"
+            f" | chamadas/busca {page.calls / args.lookups:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Guias por minuto do robo real (PortalClient + orquestrador) no portal local.
+
+Sobe o portal local (`benchmarks.portal_server`), abre um Chromium headless
+com depuracao remota e roda o mesmo caminho do app: conexao CDP, leitura,
+preenchimento e "proxima guia". Ao final confere o que o portal recebeu.
+
+Requer `playwright install chromium`.
+
+Uso: python -m benchmarks.bench_portal_e2e [--guides 60] [--latency-ms 80]
+         [--jitter-ms 120] [--modes sync,async,abas] [--tabs 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import replace
+from pathlib import Path
+import socket
+import subprocess
+import tempfile
+import time
+
+from playwright.sync_api import sync_playwright
+
+from app.chrome_launcher import build_chrome_command
+from app.chrome_pool import wait_for_debug_port
+from app.config import AppSettings
+from app.glosa_rules import GlosaRuleTable
+from app.orchestrator import OrchestratorConfig
+from app.runtime import run_automation_job, run_automation_job_async, run_parallel_job_async
+from app.spreadsheet_index import SpreadsheetIndex
+from benchmarks.portal_server import PortalState, StandInPortal, build_guides
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _launch_headless_chromium(port: int, profile_dir: Path, start_url: str):
+    with sync_playwright() as playwright:
+        executable = playwright.chromium.executable_path
+    if not Path(executable).exists():
+        raise SystemExit("Chromium do Playwright nao encontrado: rode `playwright install chromium`.")
+    command = build_chrome_command(port, profile_dir, executable, start_url)
+    command[1:1] = ["--headless=new", "--no-first-run", "--no-default-browser-check"]
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _check_submissions(state: PortalState, settings: AppSettings) -> int:
+    """Quantas guias chegaram ao portal com justificativa (e valor, quando cabe)."""
+    rules = GlosaRuleTable.from_settings(settings)
+    correct = 0
+    for position, guide in enumerate(state.guides):
+        sent = state.submissions.get(position)
+        if sent is None:
+            continue
+        row = guide.row()
+        plan = rules.plan_for(guide.codigo_glosa)
+        field_name = {
+            "justificativa": "justificativa_prestador_procedimento",
+            "justificativa_3052": "justificativa_guia",
+        }[plan.justificativa_field]
+        valor_ok = not plan.fill_valor or sent.get("valor_recursado") == (
+            f"{row.valor_glosa:.2f}".replace(".", ",")
+        )
+        if sent.get(field_name) == row.justificativa and valor_ok:
+            correct += 1
+    return correct
+
+
+def _run_mode(mode: str, settings: AppSettings, index, tabs: int) -> float:
+    job = dict(
+        settings=settings,
+        spreadsheet_index=index,
+        config=OrchestratorConfig(
+            wait_for_manual_action=False,
+            guide_change_timeout_seconds=settings.timeout_ms / 1000,
+            capture_screenshot_on_error=False,
+        ),
+        on_log=lambda _message: None,
+        on_status=lambda _status: None,
+    )
+    started = time.perf_counter()
+    if mode == "sync":
+        run_automation_job(**job)
+    elif mode == "async":
+        asyncio.run(run_automation_job_async(**job))
+    else:
+        asyncio.run(run_parallel_job_async(**job, tabs=tabs))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guides", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=120)
+    parser.add_argument("--frames", type=int, default=2, help="profundidade de iframes")
+    parser.add_argument("--modes", default="sync,async,abas")
+    parser.add_argument("--tabs", type=int, default=3)
+    args = parser.parse_args()
+
+    guides = build_guides(args.guides)
+    index = SpreadsheetIndex.from_rows(guide.row() for guide in guides)
+    base_settings = AppSettings(debug_port=_free_port(), timeout_ms=10000)
+    index.apply_rules(GlosaRuleTable.from_settings(base_settings))
+
+    for mode in args.modes.split(","):
+        state = PortalState(
+            guides,
+            latency=args.latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            frame_depth=args.frames,
+        )
+        settings = replace(base_settings, async_runtime=mode != "sync")
+        with StandInPortal(state) as portal, tempfile.TemporaryDirectory() as profile:
+            chromium = _launch_headless_chromium(
+                settings.debug_port, Path(profile), portal.lote_url
+            )
+            try:
+                wait_for_debug_port(settings.debug_port)
+                elapsed = _run_mode(mode, settings, index, args.tabs)
+            finally:
+                chromium.terminate()
+                chromium.wait(timeout=10)
+        correct = _check_submissions(state, settings)
+        # A ultima guia e preenchida mas nao enviada: nao ha "proxima".
+        sent = len(state.submissions)
+        print(
+            f"{mode:<6} {args.guides / elapsed * 60:8.1f} guias/min"
+            f" | {elapsed:6.1f} s | enviadas {sent}, corretas {correct}"
+            f" | requisicoes HTTP {state.requests}"
+        )
+
+
+if __name__ == "__main__":
+    main()
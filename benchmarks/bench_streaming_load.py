@@ -0,0 +1,63 @@
+"""Memoria e tempo da carga da planilha conforme o numero de linhas cresce.
+
+Compara o pipeline em streaming (`load_spreadsheet_index`) com a carga antiga,
+que materializava todas as linhas antes de indexar. O "overhead" (pico menos
+memoria retida pelo indice) deve ficar estavel no modo streaming.
+
+Uso: python -m benchmarks.bench_streaming_load [--rows 10000 50000 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+import tracemalloc
+
+from app.excel_reader import _read_rows, _row_to_model, load_spreadsheet_index
+from benchmarks.synthetic import write_csv
+
+
+def _load_materialized(path: Path) -> dict:
+    rows = list(_read_rows(path))
+    index = {}
+    for line_number, row_data in rows:
+        model = _row_to_model(row_data, line_number)
+        index[model.key] = model
+    return index
+
+
+def _measure(loader, path: Path) -> tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = loader(path)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del index
+    return elapsed, current, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} {'modo':>12} {'tempo_s':>8} {'retido_mb':>10} {'pico_mb':>8} {'overhead_mb':>12}")
+    with TemporaryDirectory() as tmp:
+        for total in args.rows:
+            source = write_csv(Path(tmp) / f"glosas-{total}.csv", total)
+            for label, loader in (
+                ("streaming", load_spreadsheet_index),
+                ("materializado", _load_materialized),
+            ):
+                elapsed, current, peak = _measure(loader, source)
+                print(
+                    f"{total:>8} {label:>12} {elapsed:>8.2f} {current / 2**20:>10.1f} "
+                    f"{peak / 2**20:>8.1f} {(peak - current) / 2**20:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
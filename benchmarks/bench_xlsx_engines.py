@@ -0,0 +1,38 @@
+"""Motores de leitura XLSX: openpyxl (somente leitura) contra XML direto do zip.
+
+Uso: python -m benchmarks.bench_xlsx_engines [--rows 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+
+from app.excel_reader import XLSX_ENGINES, load_spreadsheet_index
+from benchmarks.synthetic import write_xlsx
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        source = write_xlsx(Path(tmp) / "glosas.xlsx", args.rows)
+        print(f"planilha com {args.rows} linhas gerada em {time.perf_counter() - started:.1f}s")
+
+        timings = {}
+        for engine in XLSX_ENGINES:
+            started = time.perf_counter()
+            index = load_spreadsheet_index(source, xlsx_engine=engine)
+            timings[engine] = time.perf_counter() - started
+            print(f"{engine:>9}: {timings[engine]:.2f}s ({len(index)} linhas)")
+
+    print(f"ganho do motor xml: {timings['openpyxl'] / timings['xml']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
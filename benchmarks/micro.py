@@ -0,0 +1,213 @@
+"""Micro-benchmarks dos caminhos quentes de leitura da planilha e do relatorio.
+
+Cada rodada de um caso vem logo depois de uma rodada de calibracao (trabalho
+fixo em Python puro) no mesmo processo; o caso e medido pela mediana da razao
+caso/calibracao. Assim a maquina ficar mais lenta por um tempo afeta os dois
+lados e some da comparacao. Casos rapidos repetem ate somar MIN_CASE_SECONDS.
+
+Com --save-baseline a razao e o ruido medido (dispersao entre rodadas) viram a
+referencia em benchmarks/baselines.json. Sem ele, cada caso e comparado com a
+referencia e marcado como REGRESSAO acima do seu limite: o maior entre
+`--threshold` (padrao 25%), CASE_THRESHOLDS e NOISE_FACTOR vezes o ruido da
+referencia. So com --strict a saida e 1 quando ha regressao. Referencias valem
+para a maquina onde foram gravadas: regrave ao trocar de maquina.
+
+Uso: python -m benchmarks.micro [--sizes 10000] [--formats csv,xlsx] [--repeat 5]
+     python -m benchmarks.micro --sizes 10000,100000,500000 --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import Callable
+
+from app.excel_reader import (
+    _build_header_mapping,
+    _normalize_header,
+    _parse_decimal,
+    load_spreadsheet_index,
+)
+from app.models import GuideStatusRecord, build_key
+from app.reporting import export_status_report
+from benchmarks.synthetic import AMIL_HEADERS, synthetic_rows, write_csv, write_xlsx
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+WRITERS = {"csv": write_csv, "xlsx": write_xlsx}
+# Casos de poucos milissegundos oscilam muito com o resto da maquina: mais
+# rodadas deixam a mediana menos sensivel a um pico isolado.
+MIN_CASE_SECONDS = 1.0
+# A carga de XLSX descompacta e faz parse de XML: varia bem mais entre rodadas.
+CASE_THRESHOLDS = {"load_spreadsheet_index_xlsx": 0.5}
+# O limite de cada caso fica acima do ruido medido ao gravar a referencia.
+NOISE_FACTOR = 3.0
+
+
+def _calibration() -> int:
+    """Trabalho fixo parecido com os casos: strings, dict e ordenacao."""
+    values = [f"{number:08d}|S" for number in range(20000)]
+    lookup = dict.fromkeys(values)
+    return sum(1 for value in sorted(values, reverse=True) if value in lookup)
+
+
+def _timed(action: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def _measure(
+    action: Callable[[], object], repeat: int, min_seconds: float = MIN_CASE_SECONDS
+) -> dict[str, float]:
+    """Mediana do tempo e da razao caso/calibracao, com a dispersao das razoes.
+
+    `noise` e o intervalo interquartil das razoes dividido pela mediana.
+    """
+    timings: list[float] = []
+    ratios: list[float] = []
+    while len(timings) < repeat or sum(timings) < min_seconds:
+        calibration = _timed(_calibration)
+        elapsed = _timed(action)
+        timings.append(elapsed)
+        ratios.append(elapsed / calibration)
+    ratio = statistics.median(ratios)
+    lower, _middle, upper = statistics.quantiles(ratios, n=4, method="inclusive")
+    return {
+        "seconds": round(statistics.median(timings), 6),
+        "ratio": round(ratio, 4),
+        "noise": round((upper - lower) / ratio, 4),
+    }
+
+
+def _threshold(name: str, baseline: dict[str, float], minimum: float) -> float:
+    return max(
+        minimum,
+        CASE_THRESHOLDS.get(name.split("[")[0], 0.0),
+        NOISE_FACTOR * baseline.get("noise", 0.0),
+    )
+
+
+def _cases(size: int, formats: list[str], workdir: Path) -> dict[str, Callable[[], object]]:
+    headers = list(AMIL_HEADERS) * max(1, size // len(AMIL_HEADERS))
+    normalized = [_normalize_header(item) for item in AMIL_HEADERS]
+    decimals = [row[6] for row in synthetic_rows(size)]
+    decimals[::3] = [float(value.replace(",", ".")) for value in decimals[::3]]
+
+    cases: dict[str, Callable[[], object]] = {
+        f"normalize_header[{size}]": lambda: [_normalize_header(item) for item in headers],
+        f"parse_decimal[{size}]": lambda: [
+            _parse_decimal(value, line) for line, value in enumerate(decimals)
+        ],
+        f"build_header_mapping[{size}]": lambda: [
+            _build_header_mapping(normalized) for _ in range(size // 10)
+        ],
+    }
+
+    files = {}
+    for name in formats:
+        files[name] = WRITERS[name](workdir / f"planilha-{size}.{name}", size)
+        cases[f"load_spreadsheet_index_{name}[{size}]"] = (
+            lambda path=files[name]: load_spreadsheet_index(path)
+        )
+
+    index = load_spreadsheet_index(next(iter(files.values()))) if files else None
+    if index is not None:
+        rng = random.Random(3)
+        rows = [row for row in synthetic_rows(size)]
+        lookups = [(row[2], row[3]) for row in rng.choices(rows, k=size)]
+        lookups += [(f"{guia}0", senha) for guia, senha in lookups[: size // 10]]
+        cases[f"build_key_lookup[{size}]"] = lambda: [
+            index.get(build_key(guia, senha)) for guia, senha in lookups
+        ]
+
+    records = [
+        GuideStatusRecord(
+            processed_index=position + 1,
+            total_guides=size,
+            numero_guia=str(100000000 + position),
+            senha=f"S{position:08d}",
+            status="SUCESSO" if position % 9 else "ERRO",
+            message="Guia preenchida com sucesso",
+        )
+        for position in range(size)
+    ]
+    reports_dir = workdir / "reports"
+    cases[f"export_status_report[{size}]"] = lambda: export_status_report(
+        records, reports_dir
+    )
+    return cases
+
+
+def _load_baselines() -> dict[str, dict[str, float]]:
+    if not BASELINES_PATH.exists():
+        return {}
+    content = json.loads(BASELINES_PATH.read_text(encoding="utf-8"))
+    # Referencias antigas (so o tempo, sem calibracao) nao sao comparaveis.
+    return {name: item for name, item in content.items() if isinstance(item, dict)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000")
+    parser.add_argument("--formats", default="csv,xlsx")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--filter", default="", help="roda so casos com este texto")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--strict", action="store_true", help="sai com 1 se algum caso regredir"
+    )
+    args = parser.parse_args()
+
+    baselines = _load_baselines()
+    results: dict[str, dict[str, float]] = {}
+    regressions: list[tuple[str, float, float]] = []
+    formats = [item for item in args.formats.split(",") if item]
+    for size in (int(item) for item in args.sizes.split(",")):
+        with TemporaryDirectory() as workdir:
+            for name, action in _cases(size, formats, Path(workdir)).items():
+                if args.filter not in name:
+                    continue
+                measured = _measure(action, args.repeat)
+                results[name] = measured
+                line = (
+                    f"{name:<42} {measured['seconds'] * 1000:10.2f} ms"
+                    f"   razao {measured['ratio']:9.3f}   ruido {measured['noise']:5.1%}"
+                )
+                baseline = baselines.get(name)
+                if baseline is None:
+                    print(f"{line}   (sem referencia)")
+                    continue
+                change = measured["ratio"] / baseline["ratio"] - 1
+                threshold = _threshold(name, baseline, args.threshold)
+                flag = ""
+                if change > threshold:
+                    flag = "  REGRESSAO"
+                    regressions.append((name, change, threshold))
+                print(
+                    f"{line}   ref {baseline['ratio']:9.3f}"
+                    f"   {change:+7.1%} (limite {threshold:.0%}){flag}"
+                )
+
+    if args.save_baseline:
+        baselines.update(results)
+        BASELINES_PATH.write_text(
+            json.dumps(dict(sorted(baselines.items())), indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"Referencias gravadas em {BASELINES_PATH}")
+        return 0
+    for name, change, threshold in regressions:
+        print(f"REGRESSAO {name}: {change:+.1%} acima do limite de {threshold:.0%}.")
+    if regressions and args.strict:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Portal local que imita a tela de recurso de glosa da Amil.
+
+Serve um lote com os mesmos ids dos seletores padrao (`PortalSelectors`),
+dentro de iframes aninhados. "Proxima guia" envia o formulario: o servidor
+guarda o que foi preenchido e redireciona para a guia seguinte. Cada resposta
+espera `latency` + ate `jitter` segundos, como um portal remoto.
+
+Uso isolado: python -m benchmarks.portal_server [--guides 50] [--port 8765]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from app.models import SpreadsheetRow
+
+GLOSA_CODES = ("2001", "2010", "3052", "1702")
+
+_FORM = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Recurso de glosa</title></head>
+<body>
+<form method="post" action="/form?pos={pos}">
+  <p>Guia <input id="num_guia_operadora_recurso" value="{numero}" readonly>
+     Senha <input id="senha" value="{senha}" readonly></p>
+  <p>Guia {position} de <span id="guia_final">{total}</span></p>
+  <p>Valor recursado <input id="valor_recursado" name="valor_recursado"></p>
+  <p>Justificativa do procedimento
+     <textarea id="justificativa_prestador_procedimento"
+               name="justificativa_prestador_procedimento"></textarea></p>
+  <p>Justificativa da guia
+     <textarea id="justificativa_guia" name="justificativa_guia"></textarea></p>
+  <button type="submit" id="btn_guia_posterior">Proxima guia</button>
+</form>
+</body></html>"""
+
+
+@dataclass(frozen=True)
+class StandInGuide:
+    numero_guia: str
+    senha: str
+    valor_glosa: float
+    codigo_glosa: str
+
+    def row(self) -> SpreadsheetRow:
+        return SpreadsheetRow(
+            numero_guia=self.numero_guia,
+            senha=self.senha,
+            valor_glosa=self.valor_glosa,
+            justificativa=f"Recurso da guia {self.numero_guia}",
+            codigo_glosa=self.codigo_glosa,
+        )
+
+
+def build_guides(total: int, seed: int = 7) -> list[StandInGuide]:
+    rng = random.Random(seed)
+    return [
+        StandInGuide(
+            numero_guia=str(300000 + item),
+            senha=f"S{item:05d}",
+            valor_glosa=round(rng.uniform(10, 900), 2),
+            codigo_glosa=rng.choice(GLOSA_CODES),
+        )
+        for item in range(total)
+    ]
+
+
+@dataclass
+class PortalState:
+    guides: list[StandInGuide]
+    latency: float = 0.0
+    jitter: float = 0.0
+    frame_depth: int = 2
+    submissions: dict[int, dict[str, str]] = field(default_factory=dict)
+    requests: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def wait(self) -> None:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def submit(self, position: int, values: dict[str, str]) -> None:
+        # Abas avancando ate a propria faixa enviam o formulario vazio: nao
+        # sobrescrevem o envio de quem preencheu a guia.
+        if not any(value.strip() for value in values.values()):
+            return
+        with self._lock:
+            self.submissions[position] = values
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: PortalState
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.state.wait()
+        if url.path.startswith("/lote/"):
+            self._html(self._frame_page("Lote", self.state.frame_depth))
+        elif url.path == "/frame":
+            self._html(self._frame_page("Moldura", int(query.get("depth", ["1"])[0])))
+        elif url.path == "/form":
+            self._form(int(query.get("pos", ["0"])[0]))
+        else:
+            self.send_error(404)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        position = int(parse_qs(url.query).get("pos", ["0"])[0])
+        length = int(self.headers.get("Content-Length") or 0)
+        body = parse_qs(self.rfile.read(length).decode("utf-8"), keep_blank_values=True)
+        self.state.submit(position, {name: values[-1] for name, values in body.items()})
+        self.state.wait()
+        following = min(position + 1, len(self.state.guides) - 1)
+        self.send_response(303)
+        self.send_header("Location", f"/form?pos={following}")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _frame_page(self, title: str, depth: int) -> str:
+        # A ultima moldura carrega o formulario; as outras, mais uma moldura.
+        source = "/form?pos=0" if depth <= 1 else f"/frame?depth={depth - 1}"
+        return (
+            f"<!doctype html><html><body><h1>{title}</h1>"
+            f'<iframe src="{source}" width="900" height="600"></iframe></body></html>'
+        )
+
+    def _form(self, position: int) -> None:
+        guides = self.state.guides
+        if not 0 <= position < len(guides):
+            self.send_error(404)
+            return
+        guide = guides[position]
+        self._html(
+            _FORM.format(
+                pos=position,
+                position=position + 1,
+                numero=escape(guide.numero_guia),
+                senha=escape(guide.senha),
+                total=len(guides),
+            )
+        )
+
+    def _html(self, content: str) -> None:
+        payload = content.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StandInPortal:
+    """Servidor HTTP do portal local, rodando numa thread propria."""
+
+    def __init__(self, state: PortalState, port: int = 0) -> None:
+        self.state = state
+        handler = type("PortalHandler", (_Handler,), {"state": state})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def lote_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/lote/1"
+
+    def __enter__(self) -> StandInPortal:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guides", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=120)
+    parser.add_argument("--frames", type=int, default=2, help="profundidade de iframes")
+    args = parser.parse_args()
+
+    state = PortalState(
+        build_guides(args.guides),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        frame_depth=args.frames,
+    )
+    with StandInPortal(state, args.port) as portal:
+        print(f"Portal local em {portal.lote_url} (Ctrl+C para sair)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
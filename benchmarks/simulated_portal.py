@@ -0,0 +1,191 @@
+"""Portal simulado em memoria para medir quantas idas e voltas o cliente faz.
+
+Cada chamada de locator/evaluate custa `latency` segundos, imitando a ida e
+volta pelo CDP ate o Chrome. Os campos sao indexados pelo seletor ja
+resolvido (ex.: "xpath=//*[@id='senha']").
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable
+
+from app.config import AppSettings
+from app.portal_client import PortalClient, resolve_selector
+from app.portal_scripts import FILL_SCRIPT, SNAPSHOT_SCRIPT
+
+
+class SimulatedLocator:
+    def __init__(self, frame: SimulatedFrame, selector: str) -> None:
+        self.frame = frame
+        self.selector = selector
+        self.first = self
+
+    def count(self) -> int:
+        self.frame.round_trip()
+        return int(self.selector in self.frame.fields)
+
+    def wait_for(self, state: str = "visible", timeout: float | None = None) -> None:
+        self.frame.round_trip()
+
+    def input_value(self, timeout: float | None = None) -> str:
+        self.frame.round_trip()
+        return self.frame.fields[self.selector]
+
+    def inner_text(self, timeout: float | None = None) -> str:
+        self.frame.round_trip()
+        return self.frame.fields[self.selector]
+
+    def text_content(self, timeout: float | None = None) -> str:
+        self.frame.round_trip()
+        return self.frame.fields[self.selector]
+
+    def fill(self, value: str, timeout: float | None = None) -> None:
+        self.frame.round_trip()
+        self.frame.fields[self.selector] = value
+
+    def click(self, timeout: float | None = None) -> None:
+        self.frame.round_trip()
+        if self.frame.on_click is not None:
+            self.frame.on_click(self.selector)
+
+
+class SimulatedFrame:
+    def __init__(self, fields: dict[str, str], latency: float) -> None:
+        self.fields = fields
+        self.latency = latency
+        self.calls = 0
+        self.url = "about:blank"
+        self.on_click: Callable[[str], None] | None = None
+        # (instante, campos) a aplicar quando o relogio passar do instante.
+        self.scheduled: list[tuple[float, dict[str, str]]] = []
+
+    def round_trip(self) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.apply_due_updates()
+
+    def apply_due_updates(self) -> None:
+        now = time.monotonic()
+        while self.scheduled and self.scheduled[0][0] <= now:
+            self.fields.update(self.scheduled.pop(0)[1])
+
+    def wait_for_function(self, script: str, arg=None, timeout: float | None = None, polling=None):
+        # Simula o polling por requestAnimationFrame: acorda ~1 quadro apos a troca.
+        self.round_trip()
+        limit = time.monotonic() + (timeout or 0) / 1000
+        if self.scheduled and self.scheduled[0][0] <= limit:
+            time.sleep(max(0.0, self.scheduled[0][0] - time.monotonic()) + 0.016)
+            self.apply_due_updates()
+            return True
+        time.sleep(max(0.0, limit - time.monotonic()))
+        raise TimeoutError("Timeout simulado.")
+
+    def locator(self, selector: str) -> SimulatedLocator:
+        return SimulatedLocator(self, selector)
+
+    def evaluate(self, script: str, arg=None):
+        self.round_trip()
+        if script == SNAPSHOT_SCRIPT:
+            found = {}
+            for name, query in arg.items():
+                selector = _selector_of(query)
+                if selector in self.fields:
+                    found[name] = self.fields[selector].strip()
+            return found
+        if script == FILL_SCRIPT:
+            selectors = [_selector_of(field) for field in arg]
+            if any(selector not in self.fields for selector in selectors):
+                return {"ok": False, "values": []}
+            for selector, field in zip(selectors, arg):
+                self.fields[selector] = field["value"]
+            return {"ok": True, "values": [self.fields[selector] for selector in selectors]}
+        raise NotImplementedError("Script nao simulado.")
+
+
+def _selector_of(query: dict[str, str]) -> str:
+    prefix = "xpath=" if query["kind"] == "xpath" else ""
+    return f"{prefix}{query['selector']}"
+
+
+class SimulatedPage:
+    def __init__(self, frames: list[SimulatedFrame]) -> None:
+        self.frames = frames
+        self.url = "about:blank"
+        self.handlers: dict[str, list] = {}
+
+    def on(self, event: str, handler) -> None:
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event: str, payload) -> None:
+        for handler in self.handlers.get(event, []):
+            handler(payload)
+
+    @property
+    def calls(self) -> int:
+        return sum(frame.calls for frame in self.frames)
+
+
+    def wait_for_load_state(self, state: str = "load", timeout: float | None = None) -> None:
+        return None
+
+
+class SimulatedContext:
+    def __init__(self, pages: list[SimulatedPage]) -> None:
+        self.pages = pages
+
+
+def simulated_client(
+    settings: AppSettings, latency: float = 0.0, empty_frames: int = 1
+) -> tuple[PortalClient, SimulatedPage]:
+    """Cliente ligado a uma pagina cujo formulario fica no ultimo iframe."""
+    selectors = settings.selectors
+    fields = {
+        resolve_selector(selectors.numero_guia): "123456",
+        resolve_selector(selectors.senha): "ABC987",
+        resolve_selector(selectors.total_guias): "Guia 1 de 40",
+        resolve_selector(selectors.valor_glosa): "",
+        resolve_selector(selectors.justificativa): "",
+        resolve_selector(selectors.justificativa_3052): "",
+    }
+    frames = [SimulatedFrame({}, latency) for _ in range(empty_frames)]
+    frames.append(SimulatedFrame(fields, latency))
+    page = SimulatedPage(frames)
+
+    client = PortalClient(settings)
+    client._context = SimulatedContext([page])
+    client._page = page
+    return client, page
+
+
+def install_guide_flow(
+    client: PortalClient,
+    page: SimulatedPage,
+    guides: list[tuple[str, str]],
+    min_latency: float,
+    max_latency: float,
+    seed: int = 7,
+) -> None:
+    """Faz o botao "proxima guia" trocar guia/senha apos uma latencia aleatoria."""
+    selectors = client.settings.selectors
+    frame = page.frames[-1]
+    guia = resolve_selector(selectors.numero_guia)
+    senha = resolve_selector(selectors.senha)
+    proxima = resolve_selector(selectors.proxima_guia)
+    frame.fields[proxima] = "Proxima"
+    frame.fields[resolve_selector(selectors.total_guias)] = f"Guia 1 de {len(guides)}"
+    frame.fields[guia], frame.fields[senha] = guides[0]
+    generator = random.Random(seed)
+    position = {"current": 0}
+
+    def on_click(selector: str) -> None:
+        if selector != proxima or position["current"] >= len(guides) - 1:
+            return
+        position["current"] += 1
+        numero, codigo = guides[position["current"]]
+        ready_at = time.monotonic() + generator.uniform(min_latency, max_latency)
+        frame.scheduled.append((ready_at, {guia: numero, senha: codigo}))
+
+    frame.on_click = on_click
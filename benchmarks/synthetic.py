@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+import random
+
+from openpyxl import Workbook
+
+AMIL_HEADERS = (
+    "Número do Protocolo",
+    "Número do Lote",
+    "Número da Guia no Prestador",
+    "Senha",
+    "Código da Glosa da Guia",
+    "Descrição Glosa",
+    "Valor Glosa (R$)",
+    "Justificativa para recurso.",
+)
+
+JUSTIFICATIVAS = (
+    "Procedimento realizado conforme solicitação médica e autorização prévia.",
+    "Material utilizado consta na tabela acordada em contrato vigente.",
+    "Cobrança em conformidade com o pacote negociado com a operadora.",
+    "Guia enviada dentro do prazo, segue comprovante de envio em anexo.",
+)
+
+CODIGOS = ("3030", "3052", "1702", "1801", "2010")
+
+
+def synthetic_rows(total: int, seed: int = 42):
+    rng = random.Random(seed)
+    for position in range(total):
+        yield (
+            f"P{position // 500:06d}",
+            f"L{position // 100:06d}",
+            f"{100000000 + position}",
+            f"S{position:08d}",
+            rng.choice(CODIGOS),
+            "Glosa técnica",
+            f"{rng.randint(1, 500000) / 100:.2f}".replace(".", ","),
+            rng.choice(JUSTIFICATIVAS),
+        )
+
+
+def write_csv(path: Path, total: int, seed: int = 42) -> Path:
+    with path.open("w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(AMIL_HEADERS)
+        writer.writerows(synthetic_rows(total, seed))
+    return path
+
+
+def write_xlsx(path: Path, total: int, seed: int = 42) -> Path:
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(AMIL_HEADERS)
+    for row in synthetic_rows(total, seed):
+        values = list(row)
+        values[6] = float(values[6].replace(",", "."))
+        worksheet.append(values)
+    workbook.save(path)
+    return path
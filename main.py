@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+import argparse
+from dataclasses import replace
+from pathlib import Path
 import tkinter as tk
 
+from app.config import load_settings
 from app.ui import AutomationApp
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Automacao de recurso de glosa Amil.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="perfila a execucao (perfil-*.prof e perfil-*.folded em reports/)",
+    )
+    parser.add_argument(
+        "--playwright-trace",
+        action="store_true",
+        help="grava um trace do Playwright (trace-*.zip em reports/)",
+    )
+    parser.add_argument(
+        "--trace-spans",
+        action="store_true",
+        help="grava spans da execucao em reports/spans.jsonl (python -m app.trace_report)",
+    )
+    args = parser.parse_args()
+
+    settings = load_settings(Path("settings.json"))
+    settings = replace(
+        settings,
+        profile_runs=settings.profile_runs or args.profile,
+        playwright_trace=settings.playwright_trace or args.playwright_trace,
+        trace_spans=settings.trace_spans or args.trace_spans,
+    )
     root = tk.Tk()
-    AutomationApp(root)
+    AutomationApp(root, settings)
     root.mainloop()
 
 
 if __name__ == "__main__":
     main()
-
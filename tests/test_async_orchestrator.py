@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+from app.async_orchestrator import AsyncAutomationOrchestrator
+from app.models import GuideContext, SpreadsheetRow
+from app.orchestrator import OrchestratorConfig
+from app.runtime import run_automation_job_async
+
+
+class FakeAsyncPortalClient:
+    def __init__(self, guides, screenshot_delay=0.0):
+        self.guides = guides
+        self.next_clicks = 0
+        self.filled = []
+        self.screenshots = []
+        self.screenshot_delay = screenshot_delay
+        self.events = []
+        self.closed = False
+
+    async def connect(self):
+        self.events.append("connect")
+
+    async def close(self):
+        self.closed = True
+
+    async def get_total_guides(self):
+        return len(self.guides)
+
+    async def read_current_context(self):
+        return self.guides[self.next_clicks]
+
+    async def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        if justificativa == "FALHA":
+            raise RuntimeError("falha de preenchimento")
+        self.filled.append((valor_glosa, justificativa, codigo_glosa))
+
+    async def click_next_guide(self):
+        self.events.append("click")
+        self.next_clicks += 1
+
+    async def wait_for_guide_change(self, previous_key, timeout_ms):
+        return self.guides[self.next_clicks]
+
+    async def capture_screenshot(self, output_path):
+        await asyncio.sleep(self.screenshot_delay)
+        self.events.append("screenshot")
+        self.screenshots.append(output_path)
+        return output_path
+
+
+def _guides(total):
+    return [
+        GuideContext(numero_guia=str(item), senha="A", lote="L", protocolo="P")
+        for item in range(total)
+    ]
+
+
+def _rows(total, failing=()):
+    return {
+        f"{item}|A": SpreadsheetRow(
+            str(item), "A", float(item), "FALHA" if item in failing else "J"
+        )
+        for item in range(total)
+    }
+
+
+def test_async_orchestrator_processes_all_guides():
+    portal = FakeAsyncPortalClient(_guides(3))
+    statuses = []
+    orchestrator = AsyncAutomationOrchestrator(
+        portal_client=portal, spreadsheet_index=_rows(3), on_status=statuses.append
+    )
+
+    asyncio.run(orchestrator.run_async())
+
+    assert orchestrator.state == "FINALIZADO"
+    assert [item.status for item in statuses] == ["SUCESSO"] * 3
+    assert portal.events.count("click") == 2
+
+
+def test_error_status_is_emitted_before_screenshot_finishes(tmp_path):
+    portal = FakeAsyncPortalClient(_guides(2), screenshot_delay=0.05)
+    seen_when_status = []
+    orchestrator = AsyncAutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=_rows(2, failing={0}),
+        config=OrchestratorConfig(
+            wait_for_manual_action=False, error_artifacts_dir=tmp_path
+        ),
+        on_status=lambda item: seen_when_status.append(list(portal.screenshots)),
+    )
+
+    asyncio.run(orchestrator.run_async())
+
+    assert orchestrator.state == "PAUSADO"
+    assert seen_when_status == [[]]
+    assert len(portal.screenshots) == 1
+    assert portal.screenshots[0].parent == tmp_path
+
+
+def test_skip_from_another_thread_resumes_async_loop(tmp_path):
+    portal = FakeAsyncPortalClient(_guides(2), screenshot_delay=0.01)
+    paused = threading.Event()
+    orchestrator = AsyncAutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=_rows(2, failing={0}),
+        config=OrchestratorConfig(error_artifacts_dir=tmp_path),
+        on_log=lambda message: paused.set() if message == "Execucao pausada." else None,
+    )
+    worker = threading.Thread(target=asyncio.run, args=(orchestrator.run_async(),))
+    worker.start()
+    assert paused.wait(timeout=2)
+
+    orchestrator.skip_current_guide()
+    worker.join(timeout=2)
+
+    assert orchestrator.state == "FINALIZADO"
+    assert portal.filled == [(1.0, "J", None)]
+    assert portal.events.index("screenshot") < portal.events.index("click")
+
+
+def test_stop_from_another_thread_ends_async_loop(tmp_path):
+    portal = FakeAsyncPortalClient(_guides(2))
+    paused = threading.Event()
+    orchestrator = AsyncAutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index={},
+        config=OrchestratorConfig(error_artifacts_dir=tmp_path),
+        on_log=lambda message: paused.set() if message == "Execucao pausada." else None,
+    )
+    worker = threading.Thread(target=asyncio.run, args=(orchestrator.run_async(),))
+    worker.start()
+    assert paused.wait(timeout=2)
+
+    orchestrator.stop()
+    worker.join(timeout=2)
+
+    assert orchestrator.state == "PARADO"
+    assert "click" not in portal.events
+
+
+def test_run_automation_job_async_connects_and_closes():
+    created = []
+
+    def factory(_settings):
+        created.append(FakeAsyncPortalClient(_guides(1)))
+        return created[0]
+
+    orchestrator = asyncio.run(
+        run_automation_job_async(
+            settings=None,
+            spreadsheet_index=_rows(1),
+            on_log=lambda _message: None,
+            on_status=lambda _item: None,
+            portal_client_factory=factory,
+        )
+    )
+
+    assert orchestrator.successes == 1
+    assert created[0].events[0] == "connect"
+    assert created[0].closed
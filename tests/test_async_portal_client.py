@@ -0,0 +1,249 @@
+import asyncio
+import time
+
+from app.async_portal_client import AsyncPortalClient
+from app.config import AppSettings
+from app.portal_client import resolve_selector
+from app.portal_scripts import (
+    FILL_SCRIPT,
+    GUIDE_MARK_LOST_SCRIPT,
+    MARK_GUIDE_SCRIPT,
+    SNAPSHOT_SCRIPT,
+)
+
+
+class _AsyncLocator:
+    def __init__(self, frame, selector):
+        self._frame = frame
+        self._selector = selector
+        self.first = self
+
+    async def count(self):
+        return int(self._selector in self._frame.fields)
+
+    async def wait_for(self, state="visible", timeout=None):
+        return None
+
+    async def fill(self, value, timeout=None):
+        self._frame.filled.append((self._selector, value))
+
+    async def input_value(self, timeout=None):
+        return self._frame.fields[self._selector]
+
+
+class _AsyncFrame:
+    def __init__(self, fields, delay=0.0):
+        self.fields = dict(fields)
+        self.delay = delay
+        self.evaluated = 0
+        self.filled = []
+
+    def locator(self, selector):
+        return _AsyncLocator(self, selector)
+
+    async def evaluate(self, script, arg):
+        self.evaluated += 1
+        await asyncio.sleep(self.delay)
+        if script == SNAPSHOT_SCRIPT:
+            return {
+                name: self.fields[f"xpath={query['selector']}"]
+                for name, query in arg.items()
+                if f"xpath={query['selector']}" in self.fields
+            }
+        if script == FILL_SCRIPT:
+            return {"ok": False, "values": []}
+        raise AssertionError("script inesperado")
+
+
+class _FakePage:
+    def __init__(self, frames):
+        self.frames = frames
+
+
+class _FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+
+def _client(frames):
+    page = _FakePage(frames)
+    client = AsyncPortalClient(AppSettings(timeout_ms=1000))
+    client._context = _FakeContext([page])
+    client._page = page
+    return client
+
+
+def test_snapshot_queries_all_frames_concurrently():
+    selectors = AppSettings().selectors
+    frames = [_AsyncFrame({}, delay=0.05) for _ in range(4)]
+    frames.append(
+        _AsyncFrame(
+            {
+                resolve_selector(selectors.numero_guia): "123",
+                resolve_selector(selectors.senha): "ABC",
+            },
+            delay=0.05,
+        )
+    )
+    client = _client(frames)
+
+    started = time.monotonic()
+    context = asyncio.run(client.read_current_context())
+
+    assert context.key == "123|ABC"
+    assert time.monotonic() - started < 0.2
+
+
+def test_snapshot_uses_cached_frame_on_next_read():
+    selectors = AppSettings().selectors
+    other = _AsyncFrame({})
+    form = _AsyncFrame(
+        {
+            resolve_selector(selectors.numero_guia): "123",
+            resolve_selector(selectors.senha): "ABC",
+        }
+    )
+    client = _client([other, form])
+
+    asyncio.run(client.read_current_context())
+    asyncio.run(client.read_current_context())
+
+    assert other.evaluated == 1
+    assert form.evaluated == 2
+
+
+def test_async_fill_falls_back_to_secondary_without_waiting_for_primary():
+    selectors = AppSettings().selectors
+    frame = _AsyncFrame(
+        {
+            resolve_selector(selectors.justificativa_3052): "",
+            resolve_selector(selectors.valor_glosa): "",
+        }
+    )
+    client = _client([frame])
+
+    asyncio.run(client.fill_current_guide(10.0, "Texto", "3030"))
+
+    assert frame.filled == [(resolve_selector(selectors.justificativa_3052), "Texto")]
+
+
+def test_async_fill_regular_glosa_fills_justificativa_and_value():
+    selectors = AppSettings().selectors
+    frame = _AsyncFrame(
+        {
+            resolve_selector(selectors.justificativa): "",
+            resolve_selector(selectors.valor_glosa): "",
+        }
+    )
+    client = _client([frame])
+
+    asyncio.run(client.fill_current_guide(10.0, "Texto", "3030"))
+
+    assert frame.filled == [
+        (resolve_selector(selectors.justificativa), "Texto"),
+        (resolve_selector(selectors.valor_glosa), "10,00"),
+    ]
+
+
+class _AttachableContext(_FakeContext):
+    def on(self, _event, _handler):
+        pass
+
+    async def add_init_script(self, _script):
+        pass
+
+
+def test_attached_tab_ignores_other_tabs_of_the_context():
+    selectors = AppSettings().selectors
+    fields = {
+        resolve_selector(selectors.numero_guia): "123",
+        resolve_selector(selectors.senha): "ABC",
+    }
+    own_frame = _AsyncFrame(fields)
+    other_frame = _AsyncFrame({**fields, resolve_selector(selectors.numero_guia): "999"})
+    own_tab = _FakePage([own_frame])
+    other_tab = _FakePage([other_frame])
+    client = AsyncPortalClient(AppSettings(timeout_ms=1000))
+
+    asyncio.run(client.attach(_AttachableContext([own_tab, other_tab]), own_tab))
+    context = asyncio.run(client.read_current_context())
+
+    assert context.key == "123|ABC"
+    assert other_frame.evaluated == 0
+
+
+def test_async_cached_fallback_does_not_win_over_present_primary():
+    selectors = AppSettings().selectors
+    frame = _AsyncFrame({resolve_selector(selectors.justificativa_3052): ""})
+    client = _client([frame])
+    asyncio.run(client.fill_current_guide(10.0, "Texto", "3030"))
+    frame.fields[resolve_selector(selectors.justificativa)] = ""
+    frame.fields[resolve_selector(selectors.valor_glosa)] = ""
+    frame.filled.clear()
+
+    asyncio.run(client.fill_current_guide(10.0, "Texto", "3030"))
+
+    assert [selector for selector, _value in frame.filled] == [
+        resolve_selector(selectors.justificativa),
+        resolve_selector(selectors.valor_glosa),
+    ]
+
+
+def test_async_field_reads_are_traced_like_the_sync_client(tmp_path):
+    import json
+
+    from app.tracing import tracing
+
+    selectors = AppSettings().selectors
+    total = resolve_selector(selectors.total_guias)
+    frame = _AsyncFrame({total: "1 de 12"})
+    client = _client([frame])
+    path = tmp_path / "spans.jsonl"
+
+    with tracing(path):
+        assert asyncio.run(client.get_total_guides()) == 12
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(item["name"], item["attrs"]) for item in records] == [
+        ("cdp.read", {"selector": selectors.total_guias})
+    ]
+
+
+class _MarkingAsyncFrame(_AsyncFrame):
+    def __init__(self, fields):
+        super().__init__(fields)
+        self.mark = None
+
+    async def evaluate(self, script, arg):
+        if script == MARK_GUIDE_SCRIPT:
+            self.mark = arg[1]
+            return None
+        if script == GUIDE_MARK_LOST_SCRIPT:
+            return self.mark != arg[1]
+        return await super().evaluate(script, arg)
+
+    async def wait_for_function(self, _script, arg=None, timeout=None, polling=None):
+        # O portal redesenha a proxima guia, com a mesma chave.
+        self.mark = None
+
+
+def test_async_wait_for_guide_change_detects_next_guide_with_same_key():
+    settings = AppSettings()
+    frame = _MarkingAsyncFrame(
+        {
+            resolve_selector(settings.selectors.numero_guia): "1",
+            resolve_selector(settings.selectors.senha): "A",
+        }
+    )
+    client = _client([frame])
+
+    async def scenario():
+        await client.read_current_context()
+        await client._mark_current_guide()
+        return await client.wait_for_guide_change("1|A", timeout_ms=5000)
+
+    started = time.monotonic()
+    context = asyncio.run(scenario())
+
+    assert context.key == "1|A"
+    assert time.monotonic() - started < 1
@@ -0,0 +1,219 @@
+import queue
+import socket
+import threading
+
+import pytest
+
+from app.chrome_pool import (
+    PoolJob,
+    clone_profile,
+    current_tab_url,
+    plan_pool_jobs,
+    pool_ports,
+)
+from app.config import AppSettings
+from app.models import GuideContext, SpreadsheetRow
+from app.orchestrator import OrchestratorConfig
+from app.runtime import run_pool_worker
+
+
+def test_pool_ports_follow_the_main_debug_port():
+    assert pool_ports(9222, 3) == [9223, 9224, 9225]
+
+
+def test_single_lote_is_split_in_one_range_per_instance():
+    assert plan_pool_jobs(["https://portal/lote/1"], 3) == [
+        [PoolJob("https://portal/lote/1", 0, 3)],
+        [PoolJob("https://portal/lote/1", 1, 3)],
+        [PoolJob("https://portal/lote/1", 2, 3)],
+    ]
+
+
+def test_several_lotes_are_distributed_round_robin():
+    urls = ["u1", "u2", "u3", "u4", "u5"]
+
+    assert plan_pool_jobs(urls, 2) == [
+        [PoolJob("u1"), PoolJob("u3"), PoolJob("u5")],
+        [PoolJob("u2"), PoolJob("u4")],
+    ]
+    assert plan_pool_jobs(urls[:2], 4) == [[PoolJob("u1")], [PoolJob("u2")]]
+
+
+def test_clone_profile_skips_locks_and_caches(tmp_path):
+    template = tmp_path / "modelo"
+    (template / "Default" / "Cache").mkdir(parents=True)
+    (template / "Default" / "Cache" / "data_0").write_text("x")
+    (template / "Default" / "Cookies").write_text("sessao")
+    (template / "SingletonLock").write_text("")
+    target = tmp_path / "copia"
+    (target / "antigo").mkdir(parents=True)
+
+    clone_profile(template, target)
+
+    assert (target / "Default" / "Cookies").read_text() == "sessao"
+    assert not (target / "Default" / "Cache").exists()
+    assert not (target / "SingletonLock").exists()
+    assert not (target / "antigo").exists()
+
+
+class FakePoolPortalClient:
+    def __init__(self, lotes):
+        self.lotes = lotes
+        self.url = None
+        self.position = 0
+        self.opened = []
+        self.filled = []
+        self.closed = False
+
+    def connect(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def open_url(self, url):
+        self.url = url
+        self.position = 0
+        self.opened.append(url)
+
+    def get_total_guides(self):
+        return len(self.lotes[self.url])
+
+    def read_current_context(self):
+        return self.lotes[self.url][self.position]
+
+    def wait_for_guide_change(self, previous_key, timeout_ms):
+        return self.lotes[self.url][self.position]
+
+    def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        self.filled.append((self.url, self.read_current_context().numero_guia))
+
+    def click_next_guide(self):
+        self.position += 1
+
+
+def _drain(events):
+    items = []
+    while not events.empty():
+        items.append(events.get())
+    return items
+
+
+def test_pool_worker_runs_its_range_and_reports_through_the_queue():
+    lote = [
+        GuideContext(numero_guia=str(item), senha="A", lote="L", protocolo="P")
+        for item in range(5)
+    ]
+    rows = {f"{item}|A": SpreadsheetRow(str(item), "A", 1.0, "J") for item in range(5)}
+    portal = FakePoolPortalClient({"u1": lote})
+    events = queue.Queue()
+    commands = queue.Queue()
+
+    final = run_pool_worker(
+        AppSettings(),
+        rows,
+        OrchestratorConfig(wait_for_manual_action=False),
+        [PoolJob("u1", 1, 2)],
+        events,
+        commands,
+        4,
+        portal_client_factory=lambda _settings: portal,
+    )
+
+    assert final == {"processed": 2, "successes": 2, "errors": 0, "state": "FINALIZADO"}
+    assert portal.filled == [("u1", "3"), ("u1", "4")]
+    assert portal.closed
+    items = _drain(events)
+    assert {number for _kind, number, _payload in items} == {4}
+    assert [payload.numero_guia for kind, _n, payload in items if kind == "status"] == [
+        "3",
+        "4",
+    ]
+    assert items[-1] == ("summary", 4, final)
+    assert commands.empty()
+
+
+def test_pool_worker_accumulates_counts_across_lotes():
+    def lote(prefix, total):
+        return [
+            GuideContext(numero_guia=f"{prefix}{item}", senha="A", lote=prefix, protocolo="P")
+            for item in range(total)
+        ]
+
+    lotes = {"u1": lote("a", 2), "u2": lote("b", 3)}
+    rows = {
+        f"{guide.numero_guia}|A": SpreadsheetRow(guide.numero_guia, "A", 1.0, "J")
+        for guides in lotes.values()
+        for guide in guides
+    }
+    portal = FakePoolPortalClient(lotes)
+
+    final = run_pool_worker(
+        AppSettings(),
+        rows,
+        OrchestratorConfig(wait_for_manual_action=False),
+        [PoolJob("u1"), PoolJob("u2")],
+        queue.Queue(),
+        queue.Queue(),
+        0,
+        portal_client_factory=lambda _settings: portal,
+    )
+
+    assert final["successes"] == 5
+    assert final["processed"] == 5
+    assert portal.opened == ["u1", "u2"]
+
+
+def test_pool_worker_keeps_commands_sent_before_the_run_and_survives_bad_ones():
+    lote = [
+        GuideContext(numero_guia=str(item), senha="A", lote="L", protocolo="P")
+        for item in range(3)
+    ]
+    rows = {f"{item}|A": SpreadsheetRow(str(item), "A", 1.0, "J") for item in range(3)}
+    portal = FakePoolPortalClient({"u1": lote})
+    events = queue.Queue()
+    commands = queue.Queue()
+    # Chegam antes de existir orquestrador: o invalido nao derruba a escuta e a
+    # pausa vale para a execucao que comeca depois.
+    commands.put("comando_invalido")
+    commands.put("pause")
+    result = {}
+
+    worker = threading.Thread(
+        target=lambda: result.update(
+            run_pool_worker(
+                AppSettings(),
+                rows,
+                OrchestratorConfig(wait_for_manual_action=False),
+                [PoolJob("u1")],
+                events,
+                commands,
+                0,
+                portal_client_factory=lambda _settings: portal,
+            )
+        )
+    )
+    worker.start()
+    seen = []
+    while True:
+        kind, _number, payload = events.get(timeout=5)
+        seen.append((kind, payload))
+        if kind == "summary" and payload["state"] == "PAUSADO":
+            break
+    assert portal.filled == []
+    commands.put("resume")
+    worker.join(timeout=5)
+
+    assert result["state"] == "FINALIZADO" and result["successes"] == 3
+    assert any(
+        kind == "log" and "comando_invalido" in payload for kind, payload in seen
+    )
+
+
+def test_current_tab_url_reports_closed_chrome_clearly():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(RuntimeError, match="pool_lote_urls"):
+        current_tab_url(port)
@@ -0,0 +1,137 @@
+import asyncio
+
+from app.async_orchestrator import AsyncAutomationOrchestrator
+from app.concurrency import AimdGovernor
+from app.models import GuideContext, SpreadsheetRow
+from app.orchestrator import OrchestratorConfig
+
+
+def test_limit_grows_by_one_after_a_fast_round():
+    governor = AimdGovernor(max_limit=4, target_latency_seconds=1.0)
+
+    governor.record(0.1, ok=True)
+    assert governor.limit == 2
+    governor.record(0.1, ok=True)
+    assert governor.limit == 2
+    governor.record(0.1, ok=True)
+    assert governor.limit == 3
+
+
+def test_limit_never_exceeds_max():
+    governor = AimdGovernor(max_limit=2, target_latency_seconds=1.0)
+
+    for _ in range(10):
+        governor.record(0.1, ok=True)
+
+    assert governor.limit == 2
+
+
+def test_error_or_slow_guide_halves_limit_once_per_round():
+    governor = AimdGovernor(max_limit=8, initial_limit=8, target_latency_seconds=1.0)
+    governor.active = 4
+
+    governor.record(5.0, ok=True)
+    assert governor.limit == 4
+    # Guias que ja estavam em andamento nao cortam de novo.
+    governor.record(0.1, ok=False)
+    governor.record(0.1, ok=False)
+    governor.record(0.1, ok=False)
+    assert governor.limit == 4
+    governor.record(0.1, ok=False)
+    assert governor.limit == 2
+    assert governor.summary()["error_rate"] == 0.8
+
+
+def test_summary_reports_concurrency_and_latency_percentiles():
+    governor = AimdGovernor(max_limit=3, target_latency_seconds=10.0)
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        governor.record(latency, ok=True)
+
+    summary = governor.summary()
+
+    assert summary["concurrency"] == 3
+    assert summary["max_concurrency"] == 3
+    assert summary["latency_p50"] == 2.5
+    assert summary["latency_p99"] == 3.97
+
+
+def test_slot_keeps_active_guides_within_limit():
+    governor = AimdGovernor(max_limit=3, target_latency_seconds=10.0)
+    peak = 0
+
+    async def guide():
+        nonlocal peak
+        async with governor.slot():
+            peak = max(peak, governor.active)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(guide() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == 1
+    assert governor.active == 0
+
+
+class SlowPortalClient:
+    def __init__(self, guides, concurrent):
+        self.guides = guides
+        self.position = 0
+        self.concurrent = concurrent
+
+    async def get_total_guides(self):
+        return len(self.guides)
+
+    async def read_current_context(self):
+        return self.guides[self.position]
+
+    async def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        self.concurrent["now"] += 1
+        self.concurrent["peak"] = max(self.concurrent["peak"], self.concurrent["now"])
+        await asyncio.sleep(0.01)
+        self.concurrent["now"] -= 1
+        if justificativa == "FALHA":
+            raise RuntimeError("portal lento")
+
+    async def click_next_guide(self):
+        self.position += 1
+
+    async def wait_for_guide_change(self, previous_key, timeout_ms):
+        return self.guides[self.position]
+
+
+def test_tabs_sharing_a_governor_fill_within_the_limit():
+    governor = AimdGovernor(max_limit=3, target_latency_seconds=10.0)
+    concurrent = {"now": 0, "peak": 0}
+
+    def worker(prefix, failing=False):
+        guides = [
+            GuideContext(numero_guia=f"{prefix}{item}", senha="A", lote="L", protocolo="P")
+            for item in range(3)
+        ]
+        rows = {
+            f"{guide.numero_guia}|A": SpreadsheetRow(
+                guide.numero_guia, "A", 1.0, "FALHA" if failing else "J"
+            )
+            for guide in guides
+        }
+        return AsyncAutomationOrchestrator(
+            portal_client=SlowPortalClient(guides, concurrent),
+            spreadsheet_index=rows,
+            config=OrchestratorConfig(
+                wait_for_manual_action=False, capture_screenshot_on_error=False
+            ),
+            governor=governor,
+        )
+
+    workers = [worker("a"), worker("b"), worker("c", failing=True)]
+
+    async def main():
+        await asyncio.gather(*(item.run_async() for item in workers))
+
+    asyncio.run(main())
+
+    assert 1 < concurrent["peak"] <= governor.max_limit
+    assert (governor.samples, governor.failures) == (7, 1)
+    assert governor.active == 0
@@ -3,7 +3,14 @@ from pathlib import Path
 from openpyxl import Workbook
 import pytest
 
-from app.excel_reader import load_spreadsheet_index
+from app.excel_reader import (
+    SpreadsheetSource,
+    expand_sources,
+    iter_spreadsheet_rows,
+    load_spreadsheet_index,
+    load_spreadsheet_sources,
+    validate_spreadsheet,
+)
 
 
 def test_read_csv_builds_index(tmp_path: Path):
@@ -128,3 +135,275 @@ def test_accepts_real_amil_xlsx_headers_with_trailing_empty_columns(tmp_path: Pa
     assert index["G123|S456"].valor_glosa == 150.25
     assert index["G123|S456"].justificativa == "Texto do recurso"
     assert index["G123|S456"].codigo_glosa == "GL001"
+
+
+def test_iter_spreadsheet_rows_is_lazy_and_reports_line_numbers(tmp_path: Path):
+    source = tmp_path / "glosas.csv"
+    source.write_text(
+        (
+            "numero_guia,senha,valor_glosa,justificativa\n"
+            "123,999,10.5,Primeira\n"
+            "124,998,abc,Invalida\n"
+        ),
+        encoding="utf-8",
+    )
+
+    rows = iter_spreadsheet_rows(source)
+    line_number, first = next(rows)
+
+    assert line_number == 2
+    assert first.key == "123|999"
+    with pytest.raises(ValueError, match="linha 3"):
+        next(rows)
+
+
+def test_csv_line_numbers_count_records_with_multiline_fields(tmp_path: Path):
+    source = tmp_path / "glosas.csv"
+    source.write_text(
+        (
+            "numero_guia,senha,valor_glosa,justificativa\n"
+            '123,999,10.5,"Primeira linha\nsegunda linha"\n'
+            "123,999,11,Repetida\n"
+        ),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match=r"chave duplicada \(123\|999\) na linha 3"):
+        load_spreadsheet_index(source)
+
+
+def test_xlsx_errors_keep_sheet_line_number_after_blank_rows(tmp_path: Path):
+    source = tmp_path / "glosas.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["numero_guia", "senha", "valor_glosa", "justificativa"])
+    ws.append(["1", "A", 10, "J1"])
+    ws.append([None, None, None, None])
+    ws.append(["2", "B", None, "J2"])
+    wb.save(source)
+    wb.close()
+
+    with pytest.raises(ValueError, match="linha 4"):
+        load_spreadsheet_index(source)
+
+
+def test_csv_reads_needed_columns_by_position(tmp_path: Path):
+    source = tmp_path / "glosas.csv"
+    source.write_text(
+        (
+            "Lote,Número da Guia no Prestador,Senha,Descrição,Valor Glosa (R$),"
+            "Justificativa para recurso.,Código da Glosa da Guia\n"
+            "L1,123,999,Texto livre,\"1.234,56\",Sem cobertura,3052\n"
+            "\n"
+            "L1,124,998,Outro,10,Ajuste\n"
+        ),
+        encoding="utf-8",
+    )
+
+    index = load_spreadsheet_index(source)
+
+    assert index["123|999"].valor_glosa == 1234.56
+    assert index["123|999"].codigo_glosa == "3052"
+    assert index["124|998"].justificativa == "Ajuste"
+    assert index["124|998"].codigo_glosa is None
+
+
+def test_xml_engine_matches_openpyxl_engine(tmp_path: Path):
+    source = tmp_path / "glosas.xlsx"
+    wb = Workbook()
+    wb.active.append(["Aba ignorada"])
+    ws = wb.create_sheet("Consolidado")
+    ws.append(
+        [
+            "Lote",
+            "Número da Guia no Prestador",
+            "Senha",
+            "Valor Glosa (R$)",
+            "Justificativa para recurso.",
+            "Código da Glosa da Guia",
+        ]
+    )
+    ws.append(["L1", 123, "S1", 150.25, "Texto do recurso", 3052])
+    ws.append([None, None, None, None, None, None])
+    ws.append(["L1", "G124", "S2", "1.234,56", "Outro texto", None])
+    wb.active = 1
+    wb.save(source)
+    wb.close()
+
+    fast = load_spreadsheet_index(source, xlsx_engine="xml")
+
+    assert fast == load_spreadsheet_index(source, xlsx_engine="openpyxl")
+    assert fast["123|S1"].codigo_glosa == "3052"
+    assert fast["G124|S2"].valor_glosa == 1234.56
+
+
+def test_unknown_xlsx_engine_is_rejected(tmp_path: Path):
+    source = tmp_path / "glosas.xlsx"
+    wb = Workbook()
+    wb.save(source)
+    wb.close()
+
+    with pytest.raises(ValueError, match="Motor XLSX desconhecido"):
+        load_spreadsheet_index(source, xlsx_engine="pandas")
+
+
+def _write_two_sheet_workbook(path: Path) -> Path:
+    wb = Workbook()
+    first = wb.active
+    first.title = "Janeiro"
+    first.append(["numero_guia", "senha", "valor_glosa", "justificativa"])
+    first.append(["1", "A", 10, "J1"])
+    second = wb.create_sheet("Fevereiro")
+    second.append(["numero_guia", "senha", "valor_glosa", "justificativa"])
+    second.append(["2", "B", 20, "J2"])
+    wb.save(path)
+    wb.close()
+    return path
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xml"])
+def test_reads_selected_sheet(tmp_path: Path, engine: str):
+    source = _write_two_sheet_workbook(tmp_path / "glosas.xlsx")
+
+    index = load_spreadsheet_index(source, xlsx_engine=engine, sheet="Fevereiro")
+
+    assert list(index) == ["2|B"]
+    with pytest.raises(ValueError, match="Aba nao encontrada"):
+        load_spreadsheet_index(source, xlsx_engine=engine, sheet="Marco")
+
+
+def test_loads_multiple_files_and_sheets_into_one_index(tmp_path: Path):
+    workbook = _write_two_sheet_workbook(tmp_path / "glosas.xlsx")
+    extra = tmp_path / "extra.csv"
+    extra.write_text(
+        "numero_guia,senha,valor_glosa,justificativa\n3,C,30,J3\n", encoding="utf-8"
+    )
+
+    sources = expand_sources([workbook, extra], all_sheets=True)
+    index = load_spreadsheet_sources(sources, max_workers=2)
+
+    assert sources[:2] == [
+        SpreadsheetSource(workbook, "Janeiro"),
+        SpreadsheetSource(workbook, "Fevereiro"),
+    ]
+    assert sorted(index) == ["1|A", "2|B", "3|C"]
+
+
+def test_duplicate_key_across_files_names_the_source(tmp_path: Path):
+    first = tmp_path / "a.csv"
+    second = tmp_path / "b.csv"
+    for path in (first, second):
+        path.write_text(
+            "numero_guia,senha,valor_glosa,justificativa\n1,A,10,J\n", encoding="utf-8"
+        )
+
+    with pytest.raises(ValueError, match=r"chave duplicada \(1\|A\) na linha 2 de b.csv"):
+        load_spreadsheet_sources(
+            [SpreadsheetSource(first), SpreadsheetSource(second)], max_workers=2
+        )
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather", ".arrow"])
+def test_reads_arrow_formats_with_amil_headers(tmp_path: Path, suffix: str):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather
+    import pyarrow.parquet
+
+    table = pa.table(
+        {
+            "Número do Lote": ["L1", "L1", None],
+            "Número da Guia no Prestador": [123, 124, None],
+            "Senha": ["S1", "S2", None],
+            "Valor Glosa (R$)": [150.25, 10.0, None],
+            "Justificativa para recurso.": ["Texto", "Outro", None],
+            "Código da Glosa da Guia": ["3052", None, None],
+        }
+    )
+    source = tmp_path / f"glosas{suffix}"
+    if suffix == ".parquet":
+        pyarrow.parquet.write_table(table, source, row_group_size=1)
+    else:
+        pyarrow.feather.write_feather(table, source, chunksize=1)
+
+    index = load_spreadsheet_index(source)
+
+    assert sorted(index) == ["123|S1", "124|S2"]
+    assert index["123|S1"].valor_glosa == 150.25
+    assert index["123|S1"].codigo_glosa == "3052"
+    assert index["124|S2"].codigo_glosa is None
+
+
+def test_validate_spreadsheet_collects_every_problem(tmp_path: Path):
+    source = tmp_path / "glosas.csv"
+    source.write_text(
+        (
+            "numero_guia,senha,valor_glosa,justificativa\n"
+            "1,A,10,Ok\n"
+            "2,,abc,\n"
+            "3,C,,Sem valor\n"
+            "1,A,12,Duplicada\n"
+            '4,D,"1.234,56",Ok\n'
+            ",,5,Sem chave\n"
+        ),
+        encoding="utf-8",
+    )
+
+    report = validate_spreadsheet(source)
+
+    assert not report.is_valid
+    assert report.rows_read == 6
+    assert sorted(report.index) == ["1|A", "4|D"]
+    assert [(item.line_number, item.column) for item in report.issues] == [
+        (3, "senha"),
+        (3, "justificativa"),
+        (3, "valor_glosa"),
+        (4, "valor_glosa"),
+        (5, "numero_guia|senha"),
+        (7, "numero_guia|senha"),
+    ]
+    assert report.issues[2].message == "valor_glosa invalido na linha 3: 'abc'"
+    assert report.issues[3].reason == "valor_glosa vazio"
+    assert report.issues[4].reason == "chave duplicada (1|A)"
+    assert report.issues[5].reason == "numero_guia/senha vazios"
+    assert report.index["4|D"].valor_glosa == 1234.56
+
+    keys_only = validate_spreadsheet(source, keep_rows=False)
+    assert keys_only.issues == report.issues
+    assert len(keys_only.index) == 0
+
+
+def test_fail_fast_load_treats_blank_xlsx_cells_as_empty(tmp_path: Path):
+    source = tmp_path / "glosas.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["numero_guia", "senha", "valor_glosa", "justificativa"])
+    ws.append(["1", None, 10, "J1"])
+    wb.save(source)
+    wb.close()
+
+    with pytest.raises(ValueError, match="numero_guia/senha vazios na linha 2"):
+        load_spreadsheet_index(source)
+
+
+def test_arrow_nullable_numeric_guia_builds_integer_keys(tmp_path: Path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    # Coluna inteira com nulo: o pandas grava float64.
+    table = pa.table(
+        {
+            "Número da Guia no Prestador": pa.array([123.0, None, 125.0], pa.float64()),
+            "Senha": pa.array([7.0, None, 8.5], pa.float64()),
+            "Valor Glosa (R$)": [150.25, None, 10.0],
+            "Justificativa para recurso.": ["Texto", None, "Outro"],
+            "Código da Glosa da Guia": pa.array([3052.0, None, None], pa.float64()),
+        }
+    )
+    source = tmp_path / "glosas.parquet"
+    pyarrow.parquet.write_table(table, source)
+
+    index = load_spreadsheet_index(source)
+
+    assert sorted(index) == ["123|7", "125|8.5"]
+    assert index["123|7"].numero_guia == "123"
+    assert index["123|7"].codigo_glosa == "3052"
@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.config import AppSettings, GlosaRule, load_settings
+from app.glosa_rules import (
+    DEFAULT_FILL_PLAN,
+    FillPlan,
+    GlosaRuleTable,
+    normalize_glosa_code,
+    resolve_field_selector,
+)
+
+
+def test_default_rules_send_3052_and_1702_to_secondary_without_value():
+    table = GlosaRuleTable.from_settings(AppSettings())
+
+    for code in ("3052", "1702", " 1702 ", "Glosa 3052"):
+        plan = table.plan_for(code)
+        assert plan.justificativa_field == "justificativa_3052"
+        assert plan.fill_valor is False
+        assert plan.fallback_field is None
+
+
+def test_unlisted_codes_use_default_plan_with_fallback():
+    table = GlosaRuleTable.from_settings(AppSettings())
+
+    assert table.plan_for("3030") is DEFAULT_FILL_PLAN
+    assert table.plan_for(None) is DEFAULT_FILL_PLAN
+    assert DEFAULT_FILL_PLAN.fallback_field == "justificativa_3052"
+    assert DEFAULT_FILL_PLAN.fill_valor is True
+
+
+def test_custom_rule_with_extra_fields():
+    table = GlosaRuleTable(
+        [
+            GlosaRule(
+                codes=("2010",),
+                justificativa_field="justificativa",
+                fill_valor=True,
+                extra_fields={"//*[@id='motivo']": "Reconsideracao"},
+            )
+        ]
+    )
+
+    assert table.plan_for("2010") == FillPlan(
+        justificativa_field="justificativa",
+        fill_valor=True,
+        extra_fields=(("//*[@id='motivo']", "Reconsideracao"),),
+    )
+    assert table.codes() == ["2010"]
+
+
+def test_unknown_justificativa_field_is_rejected():
+    with pytest.raises(ValueError, match="Campo desconhecido"):
+        GlosaRuleTable([GlosaRule(codes=("1",), justificativa_field="inexistente")])
+
+
+def test_normalize_glosa_code_keeps_previous_rules():
+    assert normalize_glosa_code("GL-3052") == "3052"
+    assert normalize_glosa_code("ABC") == "ABC"
+    assert normalize_glosa_code(None) == ""
+
+
+def test_resolve_field_selector_accepts_names_and_raw_selectors():
+    selectors = AppSettings().selectors
+
+    assert resolve_field_selector(selectors, "valor_glosa") == selectors.valor_glosa
+    assert resolve_field_selector(selectors, "#outro") == "#outro"
+
+
+def test_load_settings_reads_glosa_rules(tmp_path: Path):
+    path = tmp_path / "settings.json"
+    path.write_text(
+        json.dumps(
+            {
+                "glosa_rules": [
+                    {"codes": ["1801"], "fill_valor": True, "extra_fields": {"lote": "x"}}
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    settings = load_settings(path)
+
+    assert settings.glosa_rules == [
+        GlosaRule(
+            codes=("1801",),
+            justificativa_field="justificativa_3052",
+            fill_valor=True,
+            extra_fields={"lote": "x"},
+        )
+    ]
+
+
+def test_example_settings_rules_match_defaults():
+    settings = load_settings(Path(__file__).parents[1] / "settings.example.json")
+
+    assert settings.glosa_rules == AppSettings().glosa_rules
@@ -0,0 +1,148 @@
+import os
+from pathlib import Path
+
+from app.excel_reader import load_spreadsheet_index
+from app.index_cache import SpreadsheetIndexCache
+
+
+def _write_csv(path: Path, rows: list[str]) -> Path:
+    path.write_text(
+        "numero_guia,senha,valor_glosa,justificativa,codigo_glosa\n" + "\n".join(rows) + "\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_second_load_comes_from_cache_with_same_rows(tmp_path: Path):
+    source = _write_csv(
+        tmp_path / "glosas.csv",
+        ["123,999,10.5,Sem cobertura,3052", "124,998,7,Sem cobertura,"],
+    )
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return load_spreadsheet_index(path)
+
+    first, first_hit = cache.load(source, loader=loader)
+    second, second_hit = cache.load(source, loader=loader)
+
+    assert (first_hit, second_hit) == (False, True)
+    assert len(calls) == 1
+    assert second == first
+    assert second["124|998"].codigo_glosa is None
+
+
+def test_cache_is_invalidated_when_file_changes(tmp_path: Path):
+    source = _write_csv(tmp_path / "glosas.csv", ["123,999,10.5,Primeira,"])
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    cache.load(source)
+
+    _write_csv(source, ["123,999,20,Alterada,"])
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    index, hit = cache.load(source)
+
+    assert not hit
+    assert index["123|999"].justificativa == "Alterada"
+
+
+def test_corrupted_entry_is_discarded(tmp_path: Path):
+    source = _write_csv(tmp_path / "glosas.csv", ["123,999,10.5,Primeira,"])
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    entry = cache.put(source, load_spreadsheet_index(source))
+    entry.write_bytes(b"lixo")
+
+    assert cache.get(source) is None
+    assert not entry.exists()
+
+
+def test_evicts_least_recently_used_entries_over_size_limit(tmp_path: Path):
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    sources = [
+        _write_csv(tmp_path / f"glosas-{position}.csv", [f"{position},999,1,Texto {position},"])
+        for position in range(3)
+    ]
+    entries = [cache.put(source, load_spreadsheet_index(source)) for source in sources]
+    for position, entry in enumerate(entries):
+        os.utime(entry, ns=(position * 10**9, position * 10**9))
+
+    cache.max_bytes = entries[1].stat().st_size + entries[2].stat().st_size
+    removed = cache.evict()
+
+    assert removed == [entries[0]]
+    assert cache.get(sources[0]) is None
+    assert cache.get(sources[2]) is not None
+
+
+def test_file_changed_while_loading_is_not_cached_as_current(tmp_path: Path):
+    source = _write_csv(tmp_path / "glosas.csv", ["123,999,10.5,Primeira,"])
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+
+    def loader(path):
+        index = load_spreadsheet_index(path)
+        # O arquivo muda depois de lido, antes de o indice ir para o cache.
+        _write_csv(path, ["123,999,20,Alterada,"])
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return index
+
+    cache.load(source, loader=loader)
+    index, hit = cache.load(source)
+
+    assert not hit
+    assert index["123|999"].justificativa == "Alterada"
+
+
+def test_hit_survives_entry_removed_before_lru_touch(tmp_path: Path, monkeypatch):
+    source = _write_csv(tmp_path / "glosas.csv", ["123,999,10.5,Primeira,"])
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    cache.put(source, load_spreadsheet_index(source))
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr("app.index_cache.os.utime", evicted)
+
+    index = cache.get(source)
+
+    assert index is not None
+    assert index["123|999"].justificativa == "Primeira"
+
+
+def test_hit_reads_only_the_edges_of_large_files(tmp_path: Path, monkeypatch):
+    rows = [f"{position},999,1,Texto {position}," for position in range(20000)]
+    source = _write_csv(tmp_path / "glosas.csv", rows)
+    cache = SpreadsheetIndexCache(cache_dir=tmp_path / "cache")
+    cache.put(source, load_spreadsheet_index(source))
+    real_open = Path.open
+    read_bytes = []
+
+    class CountingStream:
+        def __init__(self, stream):
+            self._stream = stream
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self._stream.close()
+
+        def read(self, size=-1):
+            data = self._stream.read(size)
+            read_bytes.append(len(data))
+            return data
+
+        def seek(self, *args):
+            return self._stream.seek(*args)
+
+    def counting_open(self, *args, **kwargs):
+        stream = real_open(self, *args, **kwargs)
+        return CountingStream(stream) if self == source else stream
+
+    monkeypatch.setattr(Path, "open", counting_open)
+
+    assert cache.get(source) is not None
+    assert sum(read_bytes) <= 2 * 64 * 1024 < source.stat().st_size
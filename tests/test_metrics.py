@@ -0,0 +1,22 @@
+import pytest
+
+from app.metrics import latency_percentiles, percentile
+
+
+def test_percentile_interpolates_between_samples():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 90) == pytest.approx(4.6)
+    assert percentile(values, 100) == 5.0
+
+
+def test_percentile_of_empty_list_is_an_error():
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+
+def test_latency_percentiles_sorts_samples_and_names_keys():
+    assert latency_percentiles([3.0, 1.0, 2.0]) == {"p50": 2.0, "p95": 2.9, "p99": 2.98}
+    assert latency_percentiles([]) == {}
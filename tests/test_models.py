@@ -10,3 +10,13 @@ def test_spreadsheet_key_normalization():
     )
     assert row.key == "123|999"
 
+
+def test_spreadsheet_row_has_precomputed_key_and_no_instance_dict():
+    row = SpreadsheetRow(
+        numero_guia="123",
+        senha="999",
+        valor_glosa=10.5,
+        justificativa="Ajuste",
+    )
+    assert row.key == "123|999"
+    assert not hasattr(row, "__dict__")
@@ -1,3 +1,7 @@
+import threading
+import time
+
+from app.glosa_rules import FillPlan
 from app.models import GuideContext, SpreadsheetRow
 from app.orchestrator import AutomationOrchestrator, OrchestratorConfig
 
@@ -145,3 +149,259 @@ def test_passes_glosa_code_to_portal_fill():
     orchestrator.run()
 
     assert portal.filled[0] == (10.0, "J1", "3052")
+
+
+def test_manual_wait_wakes_immediately_on_skip(tmp_path):
+    portal = FakePortalClient(
+        guides=[
+            GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1"),
+            GuideContext(numero_guia="2", senha="B", lote="L1", protocolo="P1"),
+        ]
+    )
+    rows = {
+        "2|B": SpreadsheetRow(numero_guia="2", senha="B", valor_glosa=1.0, justificativa="J")
+    }
+    paused = threading.Event()
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=rows,
+        config=OrchestratorConfig(
+            delay_after_next_seconds=0, error_artifacts_dir=tmp_path
+        ),
+        on_log=lambda message: paused.set() if message == "Execucao pausada." else None,
+    )
+    worker = threading.Thread(target=orchestrator.run)
+    worker.start()
+    assert paused.wait(timeout=2)
+
+    started = time.monotonic()
+    orchestrator.skip_current_guide()
+    worker.join(timeout=2)
+
+    assert time.monotonic() - started < 0.15
+    assert orchestrator.state == "FINALIZADO"
+    assert portal.filled == [(1.0, "J", None)]
+
+
+class ChangeAwarePortalClient(FakePortalClient):
+    def __init__(self, guides):
+        super().__init__(guides)
+        self.reads = 0
+        self.waited_keys = []
+
+    def read_current_context(self):
+        self.reads += 1
+        return super().read_current_context()
+
+    def wait_for_guide_change(self, previous_key, timeout_ms):
+        self.waited_keys.append((previous_key, timeout_ms))
+        return self.guides[self.next_clicks]
+
+
+def test_waits_for_guide_change_instead_of_fixed_delay():
+    portal = ChangeAwarePortalClient(
+        guides=[
+            GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1"),
+            GuideContext(numero_guia="2", senha="B", lote="L1", protocolo="P1"),
+        ]
+    )
+    rows = {
+        "1|A": SpreadsheetRow(numero_guia="1", senha="A", valor_glosa=1.0, justificativa="J"),
+        "2|B": SpreadsheetRow(numero_guia="2", senha="B", valor_glosa=2.0, justificativa="J"),
+    }
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=rows,
+        config=OrchestratorConfig(
+            delay_after_next_seconds=5, guide_change_timeout_seconds=3
+        ),
+    )
+
+    started = time.monotonic()
+    orchestrator.run()
+
+    assert time.monotonic() - started < 1
+    assert portal.waited_keys == [("1|A", 3000)]
+    assert portal.reads == 1
+    assert [item[0] for item in portal.filled] == [1.0, 2.0]
+
+
+def test_guide_change_timeout_is_logged_and_processing_continues():
+    class TimeoutPortalClient(ChangeAwarePortalClient):
+        def wait_for_guide_change(self, previous_key, timeout_ms):
+            raise RuntimeError("Portal nao mudou de guia no tempo limite.")
+
+    portal = TimeoutPortalClient(
+        guides=[
+            GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1"),
+            GuideContext(numero_guia="2", senha="B", lote="L1", protocolo="P1"),
+        ]
+    )
+    rows = {
+        "1|A": SpreadsheetRow(numero_guia="1", senha="A", valor_glosa=1.0, justificativa="J"),
+        "2|B": SpreadsheetRow(numero_guia="2", senha="B", valor_glosa=2.0, justificativa="J"),
+    }
+    logs = []
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal, spreadsheet_index=rows, on_log=logs.append
+    )
+
+    orchestrator.run()
+
+    assert orchestrator.state == "FINALIZADO"
+    assert portal.reads == 2
+    assert any("Troca de guia nao confirmada" in message for message in logs)
+
+
+class PlanAwarePortalClient(FakePortalClient):
+    def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None, fill_plan=None):
+        self.filled.append((valor_glosa, justificativa, codigo_glosa, fill_plan))
+
+
+def test_passes_precomputed_fill_plan_to_portal():
+    plan = FillPlan(justificativa_field="justificativa_3052", fill_valor=False)
+    portal = PlanAwarePortalClient(
+        guides=[GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1")]
+    )
+    rows = {
+        "1|A": SpreadsheetRow(
+            numero_guia="1",
+            senha="A",
+            valor_glosa=10.0,
+            justificativa="J1",
+            codigo_glosa="3052",
+            fill_plan=plan,
+        )
+    }
+    orchestrator = AutomationOrchestrator(portal_client=portal, spreadsheet_index=rows)
+
+    orchestrator.run()
+
+    assert portal.filled == [(10.0, "J1", "3052", plan)]
+
+
+def test_processes_only_the_configured_guide_range():
+    guides = [
+        GuideContext(numero_guia=str(item), senha="A", lote="L1", protocolo="P1")
+        for item in range(6)
+    ]
+    portal = ChangeAwarePortalClient(guides)
+    rows = {
+        f"{item}|A": SpreadsheetRow(
+            numero_guia=str(item), senha="A", valor_glosa=float(item), justificativa="J"
+        )
+        for item in range(6)
+    }
+    statuses = []
+
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=rows,
+        config=OrchestratorConfig(
+            wait_for_manual_action=False, start_guide=2, end_guide=4
+        ),
+        on_status=statuses.append,
+    )
+    orchestrator.run()
+
+    assert orchestrator.state == "FINALIZADO"
+    assert [item.numero_guia for item in statuses] == ["2", "3"]
+    assert [item.processed_index for item in statuses] == [3, 4]
+    assert [valor for valor, _texto, _codigo in portal.filled] == [2.0, 3.0]
+    # Dois cliques para chegar a faixa, um entre as guias, nenhum depois da ultima.
+    assert portal.next_clicks == 3
+    assert orchestrator.summary()["processed"] == 2
+
+
+class SlowPhasePortalClient(ChangeAwarePortalClient):
+    def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        time.sleep(0.02)
+        super().fill_current_guide(valor_glosa, justificativa, codigo_glosa)
+
+    def click_next_guide(self):
+        time.sleep(0.01)
+        super().click_next_guide()
+
+
+def test_records_phase_timings_per_guide_and_percentiles_in_summary():
+    guides = [
+        GuideContext(numero_guia=str(item), senha="A", lote="L1", protocolo="P1")
+        for item in range(3)
+    ]
+    portal = SlowPhasePortalClient(guides)
+    rows = {
+        f"{item}|A": SpreadsheetRow(
+            numero_guia=str(item), senha="A", valor_glosa=1.0, justificativa="J"
+        )
+        for item in range(3)
+    }
+    statuses = []
+
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index=rows,
+        config=OrchestratorConfig(wait_for_manual_action=False),
+        on_status=statuses.append,
+    )
+    orchestrator.run()
+
+    assert [item.processed_index for item in statuses] == [1, 2, 3]
+    first, _second, last = statuses
+    # A primeira guia e lida; as seguintes vem da espera pela troca de guia.
+    assert set(first.timings) == {"read", "fill", "next", "wait"}
+    assert set(last.timings) == {"fill"}
+    assert first.timings["fill"] >= 0.02
+    assert first.timings["next"] >= 0.01
+    phases = orchestrator.summary()["phases"]
+    assert list(phases) == ["read", "fill", "next", "wait"]
+    assert set(phases["fill"]) == {"p50", "p95", "p99"}
+    assert phases["fill"]["p50"] >= 0.02
+
+
+def test_fill_error_record_carries_fill_and_screenshot_timings(tmp_path):
+    portal = FillErrorPortalClient(
+        guides=[GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1")]
+    )
+    statuses = []
+
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index={
+            "1|A": SpreadsheetRow(
+                numero_guia="1", senha="A", valor_glosa=1.0, justificativa="J"
+            )
+        },
+        config=OrchestratorConfig(
+            wait_for_manual_action=False, error_artifacts_dir=tmp_path
+        ),
+        on_status=statuses.append,
+    )
+    orchestrator.run()
+
+    assert [item.status for item in statuses] == ["ERRO"]
+    assert set(statuses[0].timings) == {"read", "fill", "screenshot"}
+
+
+def test_advance_after_missing_row_keeps_next_and_wait_samples():
+    guides = [
+        GuideContext(numero_guia="1", senha="A", lote="L1", protocolo="P1"),
+        GuideContext(numero_guia="2", senha="A", lote="L1", protocolo="P1"),
+    ]
+    portal = SlowPhasePortalClient(guides)
+
+    orchestrator = AutomationOrchestrator(
+        portal_client=portal,
+        spreadsheet_index={
+            "2|A": SpreadsheetRow(
+                numero_guia="2", senha="A", valor_glosa=1.0, justificativa="J"
+            )
+        },
+        config=OrchestratorConfig(pause_on_missing=False, wait_for_manual_action=False),
+    )
+    orchestrator.run()
+
+    # O avanco da guia sem linha roda depois do registro dela.
+    assert len(orchestrator.phase_samples["next"]) == 1
+    assert len(orchestrator.phase_samples["wait"]) == 1
+    assert orchestrator.phase_samples["next"][0] >= 0.01
+    assert {"next", "wait"} <= set(orchestrator.summary()["phases"])
@@ -0,0 +1,169 @@
+import asyncio
+
+from app.config import AppSettings
+from app.models import GuideContext, SpreadsheetRow
+from app.orchestrator import OrchestratorConfig
+from app.parallel import OrchestratorGroup, split_guide_ranges
+from app.runtime import run_parallel_job_async
+
+
+class FakeTab:
+    def __init__(self, context, url):
+        self.context = context
+        self.url = url
+        self.position = 0
+        self.closed = False
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        self.url = url
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowserContext:
+    def __init__(self):
+        self.pages = [FakeTab(self, "https://portal/lote/7")]
+
+    async def new_page(self):
+        page = FakeTab(self, "about:blank")
+        self.pages.append(page)
+        return page
+
+
+class FakeTabPortalClient:
+    def __init__(self, lote, browser_context, clients):
+        self.lote = lote
+        self.browser_context = browser_context
+        self.page = None
+        self.filled = []
+        clients.append(self)
+
+    async def connect(self):
+        self.page = self.browser_context.pages[0]
+
+    async def attach(self, context, page=None):
+        self.page = page
+
+    async def close(self):
+        pass
+
+    async def get_total_guides(self):
+        return len(self.lote)
+
+    async def read_current_context(self):
+        await asyncio.sleep(0)
+        return self.lote[self.page.position]
+
+    async def wait_for_guide_change(self, previous_key, timeout_ms):
+        return self.lote[self.page.position]
+
+    async def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        await asyncio.sleep(0)
+        self.filled.append(self.lote[self.page.position].numero_guia)
+
+    async def click_next_guide(self):
+        self.page.position += 1
+
+
+def _lote(total):
+    return [
+        GuideContext(numero_guia=str(item), senha="A", lote="L", protocolo="P")
+        for item in range(total)
+    ]
+
+
+def _rows(total):
+    return {
+        f"{item}|A": SpreadsheetRow(str(item), "A", float(item), "J")
+        for item in range(total)
+    }
+
+
+def test_split_guide_ranges_covers_lote_without_overlap():
+    assert split_guide_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_guide_ranges(2, 5) == [(0, 1), (1, 2)]
+    assert split_guide_ranges(0, 4) == [(0, 0)]
+
+
+def test_parallel_job_processes_each_guide_once_across_tabs():
+    lote = _lote(7)
+    browser_context = FakeBrowserContext()
+    clients = []
+    statuses = []
+    logs = []
+    ready = []
+
+    group = asyncio.run(
+        run_parallel_job_async(
+            settings=AppSettings(),
+            spreadsheet_index=_rows(7),
+            on_log=logs.append,
+            on_status=statuses.append,
+            config=OrchestratorConfig(wait_for_manual_action=False),
+            on_ready=ready.append,
+            portal_client_factory=lambda _settings: FakeTabPortalClient(
+                lote, browser_context, clients
+            ),
+            tabs=3,
+        )
+    )
+
+    assert ready == [group]
+    assert group.state == "FINALIZADO"
+    summary = group.summary()
+    phases = summary.pop("phases")
+    assert summary == {
+        "state": "FINALIZADO",
+        "processed": 7,
+        "successes": 7,
+        "errors": 0,
+        "workers": 3,
+    }
+    assert set(phases) >= {"fill", "next", "wait"}
+    assert sorted(item.processed_index for item in statuses) == list(range(1, 8))
+    workers = clients[1:]
+    assert [client.filled for client in workers] == [
+        ["0", "1", "2"],
+        ["3", "4"],
+        ["5", "6"],
+    ]
+    # As abas extras abrem a URL do lote e sao fechadas ao final.
+    extra_tabs = browser_context.pages[1:]
+    assert [tab.url for tab in extra_tabs] == ["https://portal/lote/7"] * 2
+    assert all(tab.closed for tab in extra_tabs)
+    assert not browser_context.pages[0].closed
+    assert any(message.startswith("[Aba 2] Faixa de guias: 4 a 5") for message in logs)
+
+
+class FakeWorker:
+    def __init__(self, state, processed=0):
+        self.state = state
+        self.successes = processed
+        self.errors = 0
+        self.skipped = False
+        self.stopped = False
+        self._processed = processed
+
+    def summary(self):
+        return {"processed": self._processed}
+
+    def skip_current_guide(self):
+        self.skipped = True
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_group_reports_pause_first_and_skips_only_paused_workers():
+    running = FakeWorker("RUNNING", processed=3)
+    paused = FakeWorker("PAUSADO", processed=1)
+    group = OrchestratorGroup([running, paused])
+
+    group.skip_current_guide()
+    group.stop()
+
+    assert group.state == "PAUSADO"
+    assert group.processed == 4
+    assert (running.skipped, paused.skipped) == (False, True)
+    assert running.stopped and paused.stopped
@@ -0,0 +1,278 @@
+from dataclasses import replace
+import time
+
+import pytest
+
+from app.config import AppSettings, PortalSelectors
+from app.portal_client import (
+    GUIDE_CHANGE_POLL_MS,
+    POLL_INTERVAL_SECONDS,
+    PortalClient,
+    dom_query,
+    snapshot_pages,
+)
+from app.portal_scripts import GUIDE_MARK_LOST_SCRIPT, MARK_GUIDE_SCRIPT
+
+
+class _SnapshotFrame:
+    def __init__(self, values, fail=False):
+        self.values = values
+        self.fail = fail
+        self.evaluated = []
+
+    def evaluate(self, _script, fields):
+        self.evaluated.append(dict(fields))
+        if self.fail:
+            raise RuntimeError("frame desanexado")
+        return {name: self.values[name] for name in fields if name in self.values}
+
+
+class _FakePage:
+    def __init__(self, frames):
+        self.frames = frames
+
+
+class _FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+
+class _NoFallbackClient(PortalClient):
+    def _read_text_or_value(self, selector):
+        raise AssertionError("nao deveria ler campo a campo")
+
+
+def test_dom_query_translates_xpath_and_css():
+    assert dom_query("//*[@id='senha']") == {"kind": "xpath", "selector": "//*[@id='senha']"}
+    assert dom_query("#senha") == {"kind": "css", "selector": "#senha"}
+    assert dom_query("css=#senha") == {"kind": "css", "selector": "#senha"}
+
+
+def test_dom_query_rejects_playwright_only_engines():
+    assert dom_query("text=Senha") is None
+    assert dom_query("#form >> #senha") is None
+    assert dom_query("") is None
+
+
+def test_snapshot_pages_evaluates_once_per_frame_and_stops_when_complete():
+    fields = {"numero_guia": {"kind": "css", "selector": "#g"}, "senha": {"kind": "css", "selector": "#s"}}
+    first = _SnapshotFrame({"numero_guia": "123"})
+    second = _SnapshotFrame({"senha": "ABC"})
+    third = _SnapshotFrame({"senha": "outra"})
+    page = _FakePage([first, second, third])
+
+    values, locations = snapshot_pages([page], fields)
+
+    assert values == {"numero_guia": "123", "senha": "ABC"}
+    assert locations == {"numero_guia": (page, first), "senha": (page, second)}
+    assert list(second.evaluated[0]) == ["senha"]
+    assert third.evaluated == []
+
+
+def test_snapshot_pages_skips_frames_that_fail_and_prefers_last_page():
+    fields = {"numero_guia": {"kind": "css", "selector": "#g"}}
+    old_page = _FakePage([_SnapshotFrame({"numero_guia": "velha"})])
+    new_page = _FakePage([_SnapshotFrame({}, fail=True), _SnapshotFrame({"numero_guia": "nova"})])
+
+    values, locations = snapshot_pages([old_page, new_page], fields)
+
+    assert values == {"numero_guia": "nova"}
+    assert locations["numero_guia"][0] is new_page
+
+
+def test_snapshot_pages_tries_preferred_frame_first():
+    fields = {"numero_guia": {"kind": "css", "selector": "#g"}}
+    other = _SnapshotFrame({"numero_guia": "outra"})
+    cached = _SnapshotFrame({"numero_guia": "123"})
+    page = _FakePage([other, cached])
+
+    values, _locations = snapshot_pages([page], fields, preferred=[(page, cached)])
+
+    assert values == {"numero_guia": "123"}
+    assert other.evaluated == []
+
+
+def test_read_current_context_uses_single_snapshot():
+    frame = _SnapshotFrame({"numero_guia": "123", "senha": "ABC"})
+    page = _FakePage([frame])
+    client = _NoFallbackClient(AppSettings())
+    client._context = _FakeContext([page])
+    client._page = page
+
+    context = client.read_current_context()
+
+    assert (context.numero_guia, context.senha, context.lote, context.protocolo) == (
+        "123",
+        "ABC",
+        "",
+        "",
+    )
+    assert len(frame.evaluated) == 1
+
+
+class _FallbackClient(PortalClient):
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.read_selectors = []
+
+    def _read_text_or_value(self, selector):
+        self.read_selectors.append(selector)
+        return f"valor:{selector}"
+
+
+def test_read_current_context_falls_back_when_field_missing():
+    frame = _SnapshotFrame({"numero_guia": "123"})
+    page = _FakePage([frame])
+    settings = AppSettings()
+    client = _FallbackClient(settings)
+    client._context = _FakeContext([page])
+    client._page = page
+
+    context = client.read_current_context()
+
+    assert context.senha == f"valor:{settings.selectors.senha}"
+    assert client.read_selectors == [settings.selectors.numero_guia, settings.selectors.senha]
+
+
+def test_read_current_context_skips_snapshot_for_unsupported_selector():
+    settings = AppSettings(selectors=PortalSelectors(lote="text=Lote"))
+    frame = _SnapshotFrame({"numero_guia": "123", "senha": "ABC"})
+    page = _FakePage([frame])
+    client = _FallbackClient(settings)
+    client._context = _FakeContext([page])
+    client._page = page
+
+    client.read_current_context()
+
+    assert frame.evaluated == []
+
+
+def test_read_current_context_respects_disabled_batched_reads():
+    frame = _SnapshotFrame({"numero_guia": "123", "senha": "ABC"})
+    page = _FakePage([frame])
+    client = _FallbackClient(replace(AppSettings(), batched_reads=False))
+    client._context = _FakeContext([page])
+    client._page = page
+
+    client.read_current_context()
+
+    assert frame.evaluated == []
+
+
+class _ChangingFrame(_SnapshotFrame):
+    def __init__(self, values, next_values):
+        super().__init__(values)
+        self.next_values = next_values
+        self.function_waits = []
+
+    def wait_for_function(self, _script, arg=None, timeout=None, polling=None):
+        self.function_waits.append((arg[2], polling))
+        self.values = self.next_values
+
+
+def test_wait_for_guide_change_returns_new_context():
+    frame = _ChangingFrame(
+        {"numero_guia": "1", "senha": "A"}, {"numero_guia": "2", "senha": "B"}
+    )
+    page = _FakePage([frame])
+    client = _NoFallbackClient(AppSettings())
+    client._context = _FakeContext([page])
+    client._page = page
+
+    context = client.wait_for_guide_change("1|A", timeout_ms=1000)
+
+    assert context.key == "2|B"
+    assert frame.function_waits == [("1|A", GUIDE_CHANGE_POLL_MS)]
+
+
+def test_wait_for_guide_change_raises_after_timeout():
+    frame = _ChangingFrame(
+        {"numero_guia": "1", "senha": "A"}, {"numero_guia": "1", "senha": "A"}
+    )
+    page = _FakePage([frame])
+    client = _NoFallbackClient(AppSettings())
+    client._context = _FakeContext([page])
+    client._page = page
+
+    with pytest.raises(RuntimeError, match="nao mudou de guia"):
+        client.wait_for_guide_change("1|A", timeout_ms=50)
+
+
+class _MarkingFrame(_SnapshotFrame):
+    """Frame que guarda a marca da guia; `on_wait` simula o portal durante a espera."""
+
+    def __init__(self, values, on_wait=None):
+        super().__init__(values)
+        self.on_wait = on_wait
+        self.mark = None
+        self.function_waits = []
+
+    def evaluate(self, script, arg):
+        if script == MARK_GUIDE_SCRIPT:
+            self.mark = arg[1]
+            return None
+        if script == GUIDE_MARK_LOST_SCRIPT:
+            return self.mark != arg[1]
+        return super().evaluate(script, arg)
+
+    def wait_for_function(self, _script, arg=None, timeout=None, polling=None):
+        self.function_waits.append((arg[3], timeout))
+        if self.on_wait is not None:
+            self.on_wait(self)
+
+    def rerender(self):
+        self.mark = None
+
+
+def _client_for(frames):
+    page = _FakePage(frames)
+    client = _NoFallbackClient(AppSettings())
+    client._context = _FakeContext([page])
+    client._page = page
+    return client
+
+
+def test_wait_for_guide_change_detects_next_guide_with_same_key():
+    frame = _MarkingFrame({"numero_guia": "1", "senha": "A"}, on_wait=_MarkingFrame.rerender)
+    client = _client_for([frame])
+    client.read_current_context()
+    client._mark_current_guide()
+    token = frame.mark
+
+    started = time.monotonic()
+    context = client.wait_for_guide_change("1|A", timeout_ms=5000)
+
+    assert context.key == "1|A"
+    assert time.monotonic() - started < 1
+    assert [waited[0] for waited in frame.function_waits] == [token]
+    assert client._guide_mark is None
+
+
+def test_wait_for_guide_change_same_key_without_rerender_times_out():
+    frame = _MarkingFrame({"numero_guia": "1", "senha": "A"})
+    client = _client_for([frame])
+    client.read_current_context()
+    client._mark_current_guide()
+
+    with pytest.raises(RuntimeError, match="nao mudou de guia"):
+        client.wait_for_guide_change("1|A", timeout_ms=50)
+
+
+def test_wait_for_guide_change_rereads_senha_from_other_frame():
+    senha_frame = _SnapshotFrame({"senha": "A"})
+
+    def change_senha(_frame):
+        senha_frame.values = {"senha": "B"}
+
+    guia_frame = _MarkingFrame({"numero_guia": "1"}, on_wait=change_senha)
+    client = _client_for([guia_frame, senha_frame])
+    assert client.read_current_context().key == "1|A"
+
+    context = client.wait_for_guide_change("1|A", timeout_ms=5000)
+
+    assert context.key == "1|B"
+    # O script so ve o numero no frame da guia; a espera nao pode passar da
+    # fatia curta que devolve a leitura completa (com a senha) ao loop.
+    assert guia_frame.function_waits
+    limit = POLL_INTERVAL_SECONDS * 1000
+    assert all(timeout <= limit for _token, timeout in guia_frame.function_waits)
@@ -1,4 +1,5 @@
-from app.config import AppSettings
+from app.config import AppSettings, GlosaRule
+from app.glosa_rules import FillPlan
 from app.portal_client import PortalClient
 
 
@@ -8,6 +9,14 @@ class PortalClientSpy(PortalClient):
         self.calls: list[tuple[str, str]] = []
         self.fail_primary_justificativa = False
 
+    def _first_available(self, selectors: list[str]) -> str:
+        if (
+            self.fail_primary_justificativa
+            and selectors[0] == self.settings.selectors.justificativa
+        ):
+            return selectors[1]
+        return selectors[0]
+
     def _fill(self, selector: str, value: str) -> None:
         if (
             self.fail_primary_justificativa
@@ -46,3 +55,141 @@ def test_fill_regular_glosa_falls_back_to_secondary_and_skips_value_when_primary
     client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
 
     assert client.calls == [(settings.selectors.justificativa_3052, "Texto")]
+
+
+class _FillFrame:
+    def __init__(self, present, transform=lambda value: value):
+        self.present = set(present)
+        self.transform = transform
+        self.payloads = []
+
+    def locator(self, selector):
+        return _PresenceLocator(selector in self.present)
+
+    def evaluate(self, _script, payload):
+        self.payloads.append(payload)
+        selectors = [f"xpath={field['selector']}" for field in payload]
+        if any(selector not in self.present for selector in selectors):
+            return {"ok": False, "values": []}
+        return {"ok": True, "values": [self.transform(field["value"]) for field in payload]}
+
+
+class _PresenceLocator:
+    def __init__(self, present):
+        self._present = present
+        self.first = self
+
+    def count(self):
+        return int(self._present)
+
+
+class _FakePage:
+    def __init__(self, frames):
+        self.frames = frames
+
+
+class _FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+
+def _connected_spy(frame):
+    client = PortalClientSpy(AppSettings())
+    page = _FakePage([frame])
+    client._context = _FakeContext([page])
+    client._page = page
+    return client
+
+
+def _present(*selectors):
+    return {f"xpath={selector}" for selector in selectors}
+
+
+def test_batched_fill_sets_justificativa_and_value_in_one_call():
+    settings = AppSettings()
+    frame = _FillFrame(
+        _present(settings.selectors.justificativa, settings.selectors.valor_glosa)
+    )
+    client = _connected_spy(frame)
+
+    client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
+
+    assert client.calls == []
+    assert [field["value"] for field in frame.payloads[0]] == ["Texto", "10,00"]
+    assert len(frame.payloads) == 1
+
+
+def test_batched_fill_falls_back_to_per_field_when_value_is_reformatted():
+    settings = AppSettings()
+    frame = _FillFrame(
+        _present(settings.selectors.justificativa, settings.selectors.valor_glosa),
+        transform=lambda value: f"R$ {value}",
+    )
+    client = _connected_spy(frame)
+
+    client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
+
+    assert client.calls == [
+        (settings.selectors.justificativa, "Texto"),
+        (settings.selectors.valor_glosa, "10,00"),
+    ]
+
+
+def test_batched_fill_keeps_secondary_fallback_when_primary_is_missing():
+    settings = AppSettings()
+    frame = _FillFrame(_present(settings.selectors.valor_glosa))
+    client = _connected_spy(frame)
+    client.fail_primary_justificativa = True
+
+    client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
+
+    assert client.calls == [(settings.selectors.justificativa_3052, "Texto")]
+
+
+def test_fill_uses_secondary_when_primary_is_found_but_cannot_be_filled():
+    class RaceWonByPrimary(PortalClientSpy):
+        def _first_available(self, selectors):
+            return selectors[0]
+
+    settings = AppSettings()
+    client = RaceWonByPrimary(settings)
+    client.fail_primary_justificativa = True
+
+    client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
+
+    assert client.calls == [(settings.selectors.justificativa_3052, "Texto")]
+
+
+def test_fill_follows_precomputed_plan_without_racing_fields():
+    class NoRaceSpy(PortalClientSpy):
+        def _first_available(self, selectors):
+            raise AssertionError("plano sem fallback nao deveria esperar dois campos")
+
+    settings = AppSettings()
+    client = NoRaceSpy(settings)
+    plan = FillPlan(
+        justificativa_field="justificativa",
+        fill_valor=True,
+        extra_fields=(("#motivo", "Reconsideracao"),),
+    )
+
+    client.fill_current_guide(
+        valor_glosa=5.5, justificativa="Texto", codigo_glosa="3052", fill_plan=plan
+    )
+
+    assert client.calls == [
+        (settings.selectors.justificativa, "Texto"),
+        (settings.selectors.valor_glosa, "5,50"),
+        ("#motivo", "Reconsideracao"),
+    ]
+
+
+def test_fill_uses_rules_from_settings_when_row_has_no_plan():
+    settings = AppSettings(
+        glosa_rules=[GlosaRule(codes=("3030",), justificativa_field="justificativa_3052")]
+    )
+    client = PortalClientSpy(settings)
+
+    client.fill_current_guide(valor_glosa=10.0, justificativa="Texto", codigo_glosa="3030")
+
+    assert client.calls == [(settings.selectors.justificativa_3052, "Texto")]
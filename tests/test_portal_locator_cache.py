@@ -0,0 +1,280 @@
+from contextlib import contextmanager
+import time
+
+from app.config import AppSettings
+from app.portal_client import PortalClient, resolve_selector
+
+
+class _CountingLocator:
+    def __init__(self, frame, selector):
+        self._frame = frame
+        self._selector = selector
+        self.first = self
+
+    def count(self):
+        self._frame.count_calls += 1
+        return int(self._selector in self._frame.selectors)
+
+
+class _CountingFrame:
+    def __init__(self, selectors=()):
+        self.selectors = set(selectors)
+        self.count_calls = 0
+
+    def locator(self, selector):
+        return _CountingLocator(self, selector)
+
+
+class _EventPage:
+    def __init__(self, frames):
+        self.frames = frames
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, payload):
+        for handler in self.handlers.get(event, []):
+            handler(payload)
+
+
+class _FakeContext:
+    def __init__(self, pages):
+        self.pages = pages
+
+
+def _client_with(page):
+    client = PortalClient(AppSettings(timeout_ms=1000))
+    client._context = _FakeContext([page])
+    client._page = page
+    return client
+
+
+def _total_calls(frames):
+    return sum(frame.count_calls for frame in frames)
+
+
+def test_find_locator_reuses_cached_frame_with_single_call():
+    selector = AppSettings().selectors.senha
+    frames = [_CountingFrame(), _CountingFrame(), _CountingFrame({resolve_selector(selector)})]
+    client = _client_with(_EventPage(frames))
+
+    client._find_locator(selector)
+    assert _total_calls(frames) == 3
+
+    client._find_locator(selector)
+    assert _total_calls(frames) == 4
+    assert frames[2].count_calls == 2
+
+
+def test_frame_navigation_invalidates_cached_selector():
+    selector = AppSettings().selectors.senha
+    frames = [_CountingFrame(), _CountingFrame({resolve_selector(selector)})]
+    page = _EventPage(frames)
+    client = _client_with(page)
+    client._find_locator(selector)
+
+    page.emit("framenavigated", frames[1])
+
+    assert client._frame_cache == {}
+    client._find_locator(selector)
+    assert frames[0].count_calls == 2
+
+
+def test_detached_frame_and_closed_page_are_forgotten():
+    selector = AppSettings().selectors.senha
+    frames = [_CountingFrame({resolve_selector(selector)})]
+    page = _EventPage(frames)
+    client = _client_with(page)
+
+    client._find_locator(selector)
+    page.emit("framedetached", frames[0])
+    assert client._frame_cache == {}
+
+    client._find_locator(selector)
+    page.emit("close", page)
+    assert client._frame_cache == {}
+
+
+def test_stale_cache_entry_falls_back_to_full_scan():
+    settings = AppSettings()
+    resolved = resolve_selector(settings.selectors.senha)
+    old_frame = _CountingFrame({resolved})
+    new_frame = _CountingFrame()
+    page = _EventPage([old_frame, new_frame])
+    client = _client_with(page)
+    client._find_locator(settings.selectors.senha)
+
+    old_frame.selectors.clear()
+    new_frame.selectors.add(resolved)
+    client._find_locator(settings.selectors.senha)
+
+    assert client._frame_cache[resolved] == (page, new_frame)
+
+
+def test_page_listeners_are_registered_once():
+    selector = AppSettings().selectors.senha
+    page = _EventPage([_CountingFrame({resolve_selector(selector)})])
+    client = _client_with(page)
+
+    client._find_locator(selector)
+    client._frame_cache.clear()
+    client._find_locator(selector)
+
+    assert len(page.handlers["framenavigated"]) == 1
+
+
+class _ObservedFrame(_CountingFrame):
+    def __init__(self):
+        super().__init__()
+        self.watch_arguments = []
+
+    def evaluate(self, _script, arguments):
+        self.watch_arguments.append(arguments)
+        return False
+
+
+class _ConsoleMessage:
+    def __init__(self, text):
+        self.text = text
+
+
+class _EventContext(_FakeContext):
+    def __init__(self, pages, on_wait):
+        super().__init__(pages)
+        self._on_wait = on_wait
+        self.waits = []
+
+    @contextmanager
+    def expect_event(self, event, predicate=None, timeout=None):
+        # Como no Playwright: escuta desde a chamada; a espera acontece na saida do bloco.
+        self.waits.append((event, timeout))
+        yield
+        token = self._on_wait()
+        assert predicate(_ConsoleMessage(token))
+
+
+def test_find_locator_wakes_on_mutation_instead_of_polling():
+    settings = AppSettings()
+    resolved = resolve_selector(settings.selectors.senha)
+    frame = _ObservedFrame()
+    page = _EventPage([frame])
+
+    def element_appears():
+        frame.selectors.add(resolved)
+        return frame.watch_arguments[-1][1]
+
+    client = PortalClient(AppSettings(timeout_ms=5000))
+    client._context = _EventContext([page], element_appears)
+    client._page = page
+
+    started = time.monotonic()
+    locator = client._find_locator(settings.selectors.senha)
+
+    assert locator is not None
+    assert time.monotonic() - started < 0.1
+    assert client._context.waits[0][0] == "console"
+    queries, _token, timeout_ms = frame.watch_arguments[0]
+    assert queries == [{"kind": "xpath", "selector": "//*[@id='senha']"}]
+    assert 0 < timeout_ms <= 1000
+
+
+def test_find_first_locator_returns_fallback_without_waiting_for_primary():
+    settings = AppSettings()
+    primary = settings.selectors.justificativa
+    fallback = settings.selectors.justificativa_3052
+    page = _EventPage([_CountingFrame({resolve_selector(fallback)})])
+    client = PortalClient(AppSettings(timeout_ms=15000))
+    client._context = _FakeContext([page])
+    client._page = page
+
+    started = time.monotonic()
+    selector, locator = client._find_first_locator([primary, fallback])
+
+    assert selector == fallback
+    assert locator is not None
+    assert time.monotonic() - started < 0.1
+
+
+def test_find_first_locator_prefers_first_selector_when_both_exist():
+    settings = AppSettings()
+    primary = settings.selectors.justificativa
+    fallback = settings.selectors.justificativa_3052
+    page = _EventPage(
+        [_CountingFrame({resolve_selector(fallback), resolve_selector(primary)})]
+    )
+    client = _client_with(page)
+
+    assert client._find_first_locator([primary, fallback])[0] == primary
+
+
+def test_find_first_locator_wakes_when_fallback_appears():
+    settings = AppSettings()
+    primary = settings.selectors.justificativa
+    fallback = settings.selectors.justificativa_3052
+    frame = _ObservedFrame()
+    page = _EventPage([frame])
+
+    def fallback_appears():
+        frame.selectors.add(resolve_selector(fallback))
+        return frame.watch_arguments[-1][1]
+
+    client = PortalClient(AppSettings(timeout_ms=15000))
+    client._context = _EventContext([page], fallback_appears)
+    client._page = page
+
+    selector, _locator = client._find_first_locator([primary, fallback])
+
+    assert selector == fallback
+    assert [query["selector"] for query in frame.watch_arguments[0][0]] == [
+        "//*[@id='justificativa_prestador_procedimento']",
+        "//*[@id='justificativa_guia']",
+    ]
+
+
+class _EagerFrame(_ObservedFrame):
+    """Frame cujo observador dispara enquanto os frames seguintes sao armados."""
+
+    def __init__(self, context_holder):
+        super().__init__()
+        self.context_holder = context_holder
+        self.listening_when_armed = []
+
+    def evaluate(self, script, arguments):
+        self.listening_when_armed.append(bool(self.context_holder[0].waits))
+        return super().evaluate(script, arguments)
+
+
+def test_console_listener_starts_before_frames_are_armed():
+    settings = AppSettings()
+    holder = []
+    first = _EagerFrame(holder)
+    second = _EagerFrame(holder)
+    page = _EventPage([first, second])
+
+    def element_appears():
+        first.selectors.add(resolve_selector(settings.selectors.senha))
+        return first.watch_arguments[-1][1]
+
+    client = PortalClient(AppSettings(timeout_ms=5000))
+    client._context = _EventContext([page], element_appears)
+    holder.append(client._context)
+    client._page = page
+
+    client._find_locator(settings.selectors.senha)
+
+    assert first.listening_when_armed[0] and second.listening_when_armed[0]
+
+
+def test_cached_fallback_does_not_win_over_present_primary():
+    settings = AppSettings()
+    primary = settings.selectors.justificativa
+    fallback = settings.selectors.justificativa_3052
+    frame = _CountingFrame({resolve_selector(fallback)})
+    client = _client_with(_EventPage([frame]))
+    # Guia 3052: so o campo secundario existe e fica em cache.
+    assert client._find_first_locator([primary, fallback])[0] == fallback
+
+    frame.selectors.add(resolve_selector(primary))
+
+    assert client._find_first_locator([primary, fallback])[0] == primary
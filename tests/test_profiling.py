@@ -0,0 +1,39 @@
+from collections import Counter
+import pstats
+import sys
+import time
+
+from app.profiling import RunProfiler, frame_stack, write_collapsed_stacks
+
+
+def _busy_wait(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_frame_stack_goes_from_root_to_leaf():
+    def inner():
+        return frame_stack(sys._getframe())
+
+    stack = inner().split(";")
+
+    assert stack[-1].startswith("inner (test_profiling.py:")
+    assert stack[-2].startswith("test_frame_stack_goes_from_root_to_leaf ")
+
+
+def test_write_collapsed_stacks_sorts_by_count(tmp_path):
+    target = write_collapsed_stacks(Counter({"a;b": 1, "a;c": 3}), tmp_path / "x.folded")
+
+    assert target.read_text(encoding="utf-8") == "a;c 3\na;b 1\n"
+
+
+def test_run_profiler_writes_profile_and_collapsed_stacks(tmp_path):
+    with RunProfiler(tmp_path / "reports", interval=0.001, stamp="teste") as profiler:
+        _busy_wait(0.1)
+
+    assert [path.name for path in profiler.files] == ["perfil-teste.prof", "perfil-teste.folded"]
+    functions = {name for _file, _line, name in pstats.Stats(str(profiler.profile_path)).stats}
+    assert "_busy_wait" in functions
+    lines = profiler.stacks_path.read_text(encoding="utf-8").splitlines()
+    assert lines and any("_busy_wait (test_profiling.py:" in line for line in lines)
@@ -1,7 +1,11 @@
 from pathlib import Path
 
-from app.models import GuideStatusRecord
-from app.reporting import export_status_report
+from app.models import GuideStatusRecord, SpreadsheetIssue
+from app.reporting import (
+    export_phase_report,
+    export_status_report,
+    export_validation_report,
+)
 
 
 def test_export_status_report_creates_csv(tmp_path: Path):
@@ -31,3 +35,53 @@ def test_export_status_report_creates_csv(tmp_path: Path):
     assert "numero_guia" in content
     assert "123" in content
     assert "Nao encontrada" in content
+
+
+def test_export_validation_report_lists_issues(tmp_path: Path):
+    issues = [
+        SpreadsheetIssue(3, "valor_glosa", "valor_glosa invalido", "abc"),
+        SpreadsheetIssue(4, "senha", "numero_guia/senha vazios"),
+    ]
+
+    target = export_validation_report(issues, output_dir=tmp_path, source_name="glosas jan")
+
+    assert target.name.startswith("validacao-glosas_jan-")
+    lines = target.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "linha,coluna,motivo,valor"
+    assert lines[1] == "3,valor_glosa,valor_glosa invalido,abc"
+    assert lines[2] == "4,senha,numero_guia/senha vazios,"
+
+
+def test_status_report_has_one_column_per_phase(tmp_path: Path):
+    record = GuideStatusRecord(
+        processed_index=1,
+        total_guides=1,
+        numero_guia="123",
+        senha="999",
+        status="SUCESSO",
+        message="OK",
+        timestamp="10:00:00",
+        timings={"read": 0.25, "fill": 1.5},
+    )
+
+    target = export_status_report([record], output_dir=tmp_path)
+
+    header, line = target.read_text(encoding="utf-8").splitlines()
+    assert header.endswith(
+        "tempo_leitura_s,tempo_preenchimento_s,tempo_proxima_s,tempo_espera_s,"
+        "tempo_screenshot_s"
+    )
+    assert line == "10:00:00,1,1,123,999,SUCESSO,OK,0.250,1.500,,,"
+
+
+def test_export_phase_report_lists_percentiles(tmp_path: Path):
+    phases = {"read": {"p50": 0.1, "p95": 0.4, "p99": 0.5}, "fill": {"p50": 1.0, "p95": 2.0, "p99": 3.0}}
+
+    target = export_phase_report(phases, output_dir=tmp_path, lot_id="L-1")
+
+    assert target.name.startswith("relatorio-fases-L-1-")
+    assert target.read_text(encoding="utf-8").splitlines() == [
+        "fase,p50_s,p95_s,p99_s",
+        "leitura,0.1,0.4,0.5",
+        "preenchimento,1.0,2.0,3.0",
+    ]
@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from app.config import AppSettings
+from app.glosa_rules import DEFAULT_FILL_PLAN, GlosaRuleTable
+from app.models import SpreadsheetRow
+from app.spreadsheet_index import DuplicateKeyError, SpreadsheetIndex
+
+
+def _rows():
+    return [
+        SpreadsheetRow("1", "A", 10.5, "Texto repetido", "3052"),
+        SpreadsheetRow("2", "B", 11.0, "Texto repetido"),
+        SpreadsheetRow("3|x", "C", 12.25, "Outro texto", "1702"),
+    ]
+
+
+def test_index_returns_equal_rows_and_deduplicates_texts():
+    index = SpreadsheetIndex.from_rows(_rows())
+
+    assert len(index) == 3
+    assert list(index) == ["1|A", "2|B", "3|x|C"]
+    assert index["3|x|C"] == SpreadsheetRow("3|x", "C", 12.25, "Outro texto", "1702")
+    assert index.get("2|B").codigo_glosa is None
+    assert index.get("9|Z") is None
+    assert index.distinct_texts() == 2
+    assert index == {row.key: row for row in _rows()}
+
+
+def test_index_rejects_duplicate_keys():
+    index = SpreadsheetIndex.from_rows(_rows())
+
+    with pytest.raises(DuplicateKeyError, match="chave duplicada"):
+        index.add(SpreadsheetRow("1", "A", 1.0, "Outra"), 7)
+
+
+def test_index_round_trips_through_columns_and_pickle():
+    index = SpreadsheetIndex()
+    for line_number, row in enumerate(_rows(), start=2):
+        index.add(row, line_number)
+
+    restored = SpreadsheetIndex.from_columns(index.to_columns())
+    unpickled = pickle.loads(pickle.dumps(index))
+
+    assert restored == index
+    assert unpickled == index
+    assert restored.line_of("2|B") == 3
+    assert list(restored.iter_with_lines())[0] == (2, _rows()[0])
+
+
+def test_apply_rules_attaches_precomputed_fill_plans():
+    index = SpreadsheetIndex.from_rows(_rows())
+    assert index["1|A"].fill_plan is None
+
+    index.apply_rules(GlosaRuleTable.from_settings(AppSettings()))
+    index.add(SpreadsheetRow("4", "D", 1.0, "Novo", "1801"))
+
+    assert index["1|A"].fill_plan.justificativa_field == "justificativa_3052"
+    assert index["2|B"].fill_plan is DEFAULT_FILL_PLAN
+    assert index["4|D"].fill_plan is DEFAULT_FILL_PLAN
+    assert index["1|A"] == _rows()[0]
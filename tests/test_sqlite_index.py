@@ -0,0 +1,100 @@
+from pathlib import Path
+import pickle
+
+import pytest
+
+from app.config import AppSettings
+from app.excel_reader import load_spreadsheet_index
+from app.glosa_rules import DEFAULT_FILL_PLAN, GlosaRuleTable
+from app.models import SpreadsheetRow
+from app.sqlite_index import SqliteSpreadsheetIndex
+
+
+def _numbered_rows(total: int):
+    for position in range(total):
+        yield position + 2, SpreadsheetRow(
+            numero_guia=str(position),
+            senha="S",
+            valor_glosa=float(position),
+            justificativa=f"Texto {position % 3}",
+            codigo_glosa="3052" if position % 2 else None,
+        )
+
+
+def test_sqlite_index_serves_rows_with_bounded_cache(tmp_path: Path):
+    index = SqliteSpreadsheetIndex.build(
+        tmp_path / "indice.sqlite3", _numbered_rows(50), cache_size=4
+    )
+
+    assert len(index) == 50
+    assert list(index)[:3] == ["0|S", "1|S", "2|S"]
+    assert index["7|S"] == SpreadsheetRow("7", "S", 7.0, "Texto 1", "3052")
+    assert index.get("99|S") is None
+    for position in range(10):
+        index.get(f"{position}|S")
+    assert len(index._cache) == 4
+    index.close()
+
+
+def test_sqlite_index_reports_duplicate_line_across_batches(tmp_path: Path):
+    index = SqliteSpreadsheetIndex.create(tmp_path / "indice.sqlite3")
+    rows = list(_numbered_rows(7))
+    rows.append((30, SpreadsheetRow("3", "S", 1.0, "Repetida")))
+
+    with pytest.raises(ValueError, match=r"chave duplicada \(3\|S\) na linha 30 de b.csv"):
+        index.extend(rows, label="b.csv", batch_size=3)
+    index.close()
+
+
+def test_sqlite_index_keeps_texts_consistent_after_rejected_batch(tmp_path: Path):
+    index = SqliteSpreadsheetIndex.create(tmp_path / "indice.sqlite3")
+    index.extend([(2, SpreadsheetRow("1", "S", 1.0, "Primeira"))])
+
+    with pytest.raises(ValueError, match="chave duplicada"):
+        index.extend(
+            [
+                (3, SpreadsheetRow("2", "S", 2.0, "Nova")),
+                (4, SpreadsheetRow("1", "S", 3.0, "Repetida")),
+            ]
+        )
+    index.extend([(5, SpreadsheetRow("3", "S", 4.0, "Nova"))])
+
+    assert index["3|S"].justificativa == "Nova"
+    assert "2|S" not in index
+    index.close()
+
+
+def test_sqlite_index_can_be_reopened_after_pickle(tmp_path: Path):
+    index = SqliteSpreadsheetIndex.build(tmp_path / "indice.sqlite3", _numbered_rows(3))
+
+    reopened = pickle.loads(pickle.dumps(index))
+
+    assert reopened["2|S"].justificativa == "Texto 2"
+    reopened.close()
+    index.close(delete=True)
+    assert not (tmp_path / "indice.sqlite3").exists()
+
+
+def test_load_spreadsheet_index_can_use_sqlite_backend(tmp_path: Path):
+    source = tmp_path / "glosas.csv"
+    source.write_text(
+        "numero_guia,senha,valor_glosa,justificativa\n123,999,10.5,Sem cobertura\n",
+        encoding="utf-8",
+    )
+
+    index = load_spreadsheet_index(source, sqlite_path=tmp_path / "db" / "indice.sqlite3")
+
+    assert isinstance(index, SqliteSpreadsheetIndex)
+    assert index["123|999"].valor_glosa == 10.5
+    index.close()
+
+
+def test_sqlite_index_attaches_fill_plans_after_apply_rules(tmp_path: Path):
+    index = SqliteSpreadsheetIndex.build(tmp_path / "indice.sqlite3", _numbered_rows(4))
+    assert index["1|S"].fill_plan is None
+
+    index.apply_rules(GlosaRuleTable.from_settings(AppSettings()))
+
+    assert index["1|S"].fill_plan.fill_valor is False
+    assert index["2|S"].fill_plan is DEFAULT_FILL_PLAN
+    index.close()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+from app.models import GuideContext, SpreadsheetRow
+from app.orchestrator import AutomationOrchestrator, OrchestratorConfig
+from app.trace_report import load_spans, operation_table, timeline
+from app.tracing import JsonlTraceWriter, span, tracing
+
+
+class FakePortalClient:
+    def __init__(self, guides):
+        self.guides = guides
+        self.next_clicks = 0
+
+    def get_total_guides(self):
+        return len(self.guides)
+
+    def read_current_context(self):
+        with span("cdp.evaluate", script="snapshot"):
+            return self.guides[self.next_clicks]
+
+    def fill_current_guide(self, valor_glosa, justificativa, codigo_glosa=None):
+        with span("cdp.evaluate", script="fill"):
+            pass
+
+    def click_next_guide(self):
+        with span("cdp.click"):
+            self.next_clicks += 1
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_span_is_noop_without_active_tracer():
+    with span("fill") as current:
+        current.set(key="1|A")
+        current.end()
+
+
+def test_orchestrator_spans_nest_job_guide_phase_and_cdp_calls(tmp_path):
+    guides = [
+        GuideContext(numero_guia=str(item), senha="A", lote="L1", protocolo="P1")
+        for item in range(2)
+    ]
+    rows = {
+        f"{item}|A": SpreadsheetRow(
+            numero_guia=str(item), senha="A", valor_glosa=1.0, justificativa="J"
+        )
+        for item in range(2)
+    }
+    target = tmp_path / "spans.jsonl"
+
+    with tracing(target) as tracer, span("job", runner="sync"):
+        AutomationOrchestrator(
+            portal_client=FakePortalClient(guides),
+            spreadsheet_index=rows,
+            config=OrchestratorConfig(
+                wait_for_manual_action=False,
+                wait_for_guide_change=False,
+                delay_after_next_seconds=0,
+            ),
+        ).run()
+
+    records = _read(target)
+    by_id = {record["id"]: record for record in records}
+
+    def path_of(record):
+        names = []
+        while record is not None:
+            names.append(record["name"])
+            record = by_id.get(record["parent"])
+        return "/".join(reversed(names))
+
+    assert {record["trace"] for record in records} == {tracer.trace_id}
+    assert records[-1]["name"] == "job" and records[-1]["parent"] is None
+    guides_done = [record for record in records if record["name"] == "guide"]
+    assert [record["attrs"] for record in guides_done] == [
+        {"position": 1, "key": "0|A", "status": "SUCESSO"},
+        {"position": 2, "key": "1|A", "status": "SUCESSO"},
+    ]
+    paths = [path_of(record) for record in records]
+    assert "job/guide/read/cdp.evaluate" in paths
+    assert "job/guide/fill/cdp.evaluate" in paths
+    assert "job/guide/next/cdp.click" in paths
+
+
+def test_span_records_error_and_async_tasks_keep_their_parent(tmp_path):
+    target = tmp_path / "spans.jsonl"
+
+    async def tab(number):
+        with span("guide", tab=number):
+            await asyncio.sleep(0.01)
+            with span("fill"):
+                await asyncio.sleep(0.01)
+
+    async def job():
+        with span("job"):
+            await asyncio.gather(tab(1), tab(2))
+
+    with tracing(target):
+        asyncio.run(job())
+        try:
+            with span("click"):
+                raise RuntimeError("falhou")
+        except RuntimeError:
+            pass
+
+    records = {record["id"]: record for record in _read(target)}
+    fills = [record for record in records.values() if record["name"] == "fill"]
+    assert sorted(records[item["parent"]]["attrs"]["tab"] for item in fills) == [1, 2]
+    assert {records[item["parent"]]["parent"] for item in fills} == {
+        next(key for key, item in records.items() if item["name"] == "job")
+    }
+    click = next(item for item in records.values() if item["name"] == "click")
+    assert click["parent"] is None and click["attrs"] == {"error": "RuntimeError"}
+
+
+def test_writer_rotates_and_report_reads_all_files(tmp_path):
+    target = tmp_path / "spans.jsonl"
+    writer = JsonlTraceWriter(target, max_bytes=200, backups=2)
+    for item in range(12):
+        writer.write(
+            {
+                "trace": "t",
+                "id": item + 1,
+                "parent": None,
+                "name": "fill",
+                "start": 100.0 + item,
+                "duration": 0.5,
+            }
+        )
+    writer.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "spans.jsonl",
+        "spans.jsonl.1",
+        "spans.jsonl.2",
+    ]
+    spans = load_spans(target)
+    ids = [record["id"] for record in spans]
+    assert ids == sorted(ids) and ids[-1] == 12 and len(ids) < 12
+
+
+def test_operation_table_and_timeline():
+    spans = [
+        {"id": 2, "parent": 1, "name": "fill", "start": 10.0, "duration": 1.0},
+        {
+            "id": 3,
+            "parent": 1,
+            "name": "fill",
+            "start": 11.0,
+            "duration": 3.0,
+            "attrs": {"error": "RuntimeError"},
+        },
+        {"id": 1, "parent": None, "name": "job", "start": 10.0, "duration": 4.0},
+    ]
+
+    rows = operation_table(spans)
+    assert [row["name"] for row in rows] == ["fill", "job"]
+    assert rows[0] == {
+        "name": "fill",
+        "count": 2,
+        "errors": 1,
+        "total": 4.0,
+        "p50": 2.0,
+        "p95": 2.9,
+        "p99": 2.98,
+        "max": 3.0,
+    }
+    lines = timeline(spans, width=8)
+    assert lines == [
+        "    0.000s     4.000s |########| job",
+        "    0.000s     1.000s |##      |   fill",
+        "    1.000s     3.000s |  ######|   fill error=RuntimeError",
+    ]
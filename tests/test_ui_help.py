@@ -1,4 +1,13 @@
-from app.ui import build_usage_instructions
+from pathlib import Path
+
+from app.config import AppSettings
+from app.ui import (
+    build_latency_line,
+    build_phase_line,
+    build_usage_instructions,
+    parse_selected_files,
+    select_runner,
+)
 
 
 def test_usage_instructions_contains_expected_steps():
@@ -9,3 +18,61 @@ def test_usage_instructions_contains_expected_steps():
     assert "Importacao" in text
     assert "Execucao" in text
     assert "Passo 2" in text
+
+
+def test_parse_selected_files_splits_multiple_paths():
+    assert parse_selected_files("C:/a.xlsx; C:/b.csv;") == [
+        Path("C:/a.xlsx"),
+        Path("C:/b.csv"),
+    ]
+    assert parse_selected_files("  ") == []
+
+
+def test_latency_line_lists_percentiles_from_summary():
+    summary = {"state": "FINALIZADO", "latency_p50": 1.5, "latency_p95": 3.25}
+
+    assert build_latency_line(summary) == "Latencia por guia: p50 1.50s | p95 3.25s\n"
+    assert build_latency_line({"state": "FINALIZADO"}) == ""
+
+
+def test_phase_line_uses_portuguese_phase_names():
+    summary = {"phases": {"read": {"p50": 0.1, "p95": 0.2, "p99": 0.3}}}
+
+    assert build_phase_line(summary) == "Tempo por fase (p50/p95/p99): leitura 0.10/0.20/0.30s"
+    assert build_phase_line({}) == ""
+
+
+def test_select_runner_follows_settings_priority():
+    assert select_runner(AppSettings()) == "sync"
+    assert select_runner(AppSettings(async_runtime=True)) == "async"
+    assert select_runner(AppSettings(async_runtime=True, parallel_tabs=3)) == "abas"
+    assert select_runner(AppSettings(parallel_tabs=3, chrome_pool_size=2)) == "pool"
+
+
+def test_sqlite_and_multi_source_loads_run_the_full_validation(tmp_path: Path):
+    import pytest
+
+    from app.ui import AutomationApp
+
+    first = tmp_path / "a.csv"
+    first.write_text(
+        "numero_guia,senha,valor_glosa,justificativa\n1,A,abc,\n2,B,5,Ok\n",
+        encoding="utf-8",
+    )
+    second = tmp_path / "b.csv"
+    second.write_text(
+        "numero_guia,senha,valor_glosa,justificativa\n3,C,5,Ok\n", encoding="utf-8"
+    )
+    app = AutomationApp.__new__(AutomationApp)
+    app.settings = AppSettings(index_backend="sqlite")
+    app.sqlite_index_path = tmp_path / "indice.sqlite3"
+    app.reports_dir = tmp_path / "reports"
+    app._log = lambda message: None
+
+    with pytest.raises(ValueError, match="2 problema\\(s\\) em 2 linhas lidas"):
+        app._load_spreadsheet([first])
+    with pytest.raises(ValueError, match="em 3 linhas lidas. Primeiro: a.csv: "):
+        app._load_spreadsheet([first, second])
+
+    assert list(app.reports_dir.glob("validacao-a-*.csv"))
+    assert not app.sqlite_index_path.exists()